@@ -1,6 +1,6 @@
 # Import package(s)
 import streamlit as st
-import requests
+from http_client.http_client import APIError, post
 from st_pages import show_pages, Page, hide_pages
 
 # Set page configuration
@@ -12,7 +12,11 @@ st.set_page_config(page_title="RFin", layout="wide",
 def login(username, password):
     url = 'http://127.0.0.1:8000/api/login'
     data = {'username': username, 'password': password}
-    response = requests.post(url, data=data)
+    try:
+        response = post(url, data=data)
+    except APIError:
+        st.error("The server is unreachable, please try again later")
+        return
     if response.status_code == 200:
         st.session_state['access'] = response.json().get('access')
         st.success(f"Login successful. Welcome {username}")
@@ -22,7 +26,11 @@ def login(username, password):
 def signup(email, username, password, first_name, last_name):
     url = 'http://127.0.0.1:8000/api/signup'
     data = {'email': email, 'username': username, 'password': password, 'first_name': first_name, 'last_name': last_name}
-    response = requests.post(url, data=data)
+    try:
+        response = post(url, data=data)
+    except APIError:
+        st.error("The server is unreachable, please try again later")
+        return
     if response.status_code == 200:
         st.success('User created successfully, please login!')
     else:
@@ -33,11 +41,12 @@ show_pages(
         Page("app.py", "Login Page", icon="🏠"),
         Page("pages/rfin_mini_dashboard.py", "RFin Mini Dashboard", icon="📊"),
         Page("pages/rfin_chat_ai.py", "RFin AI-ChatBot", icon="💬"),
+        Page("pages/rfin_compare.py", "RFin Compare", icon="📈"),
     ]
 )
 
 if 'access' not in st.session_state:
-    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot"])
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
     st.title("RFin - IDX Mini Dashboard") 
     st.write("Welcome to the RFin! Please log in or sign up to get started.")
     login_tab, signup_tab = st.tabs(["Login", "Sign Up"])
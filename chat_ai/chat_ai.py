@@ -1,8 +1,10 @@
 # Import package(s)
 import os
 from dotenv import load_dotenv
-import requests
-from datetime import datetime, timedelta
+from http_client.http_client import APIError, get_json
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from datetime import date, datetime, timedelta
 from pytanggalmerah import TanggalMerah
 from typing import Union, Literal, Optional
 import pandas as pd
@@ -20,6 +22,7 @@ from langchain.agents import create_tool_calling_agent, AgentExecutor
 load_dotenv()
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 SECTORS_API_KEY = os.getenv('SECTORS_API_KEY')
+RFIN_API_URL = "http://127.0.0.1:8000/api"
 
 def _retrieve_from_endpoint(url: str):
     """
@@ -28,15 +31,9 @@ def _retrieve_from_endpoint(url: str):
     Arg(s): 
         - url (str): The url to Sectors API hit
     Return(s):
-        a Python string that contains requested financial data
+        a Python string that contains requested financial data, raises an APIError if the call failed
     """
-    headers = {"Authorization": SECTORS_API_KEY}
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as err:
-        raise SystemExit(err)
+    return get_json(url, headers={"Authorization": SECTORS_API_KEY})
     
 def is_saturday_sunday(date: datetime) -> bool:
     """
@@ -53,6 +50,82 @@ def is_saturday_sunday(date: datetime) -> bool:
     else:
         return False
     
+class TradingCalendar:
+    """
+    Sorted array of IDX trading days for O(log n) date arithmetic with bisect.
+    Years missing from the RFin trading calendar are filled from TanggalMerah, fetched once per process.
+    """
+    def __init__(self, trading_days: list, covered_years: set):
+        self.trading_days = sorted(trading_days)
+        self.covered_years = set(covered_years)
+        self._holidays = None
+
+    @classmethod
+    def from_endpoint(cls, url: str = f"{RFIN_API_URL}/trading-calendar") -> "TradingCalendar":
+        """
+        Build the calendar from the RFin `/api/trading-calendar` endpoint.
+
+        Arg(s):
+            - url (str): The url to RFin trading calendar endpoint
+        Return(s):
+            a TradingCalendar, empty if the endpoint is unreachable
+        """
+        try:
+            returned_data = get_json(url)
+        except APIError:
+            returned_data = []
+        days = [date.fromisoformat(d["date"]) for d in returned_data]
+        return cls([d for d, row in zip(days, returned_data) if row["is_trading_day"]], {d.year for d in days})
+
+    def _ensure_year(self, year: int):
+        if year in self.covered_years:
+            return
+        if self._holidays is None:
+            self._holidays = TanggalMerah(cache_path=None, cache_time=600)
+        day = date(year, 1, 1)
+        new_days = []
+        while day.year == year:
+            # Read the holiday list directly, is_holiday() cannot record a day with several holidays
+            if day.weekday() < 5 and day.isoformat() not in self._holidays.data:
+                new_days.append(day)
+            day += timedelta(days=1)
+        self.trading_days = sorted(self.trading_days + new_days)
+        self.covered_years.add(year)
+
+    def is_trading_day(self, day: date) -> bool:
+        self._ensure_year(day.year)
+        i = bisect_left(self.trading_days, day)
+        return i < len(self.trading_days) and self.trading_days[i] == day
+
+    def previous_trading_day(self, day: date) -> date:
+        """
+        Get the latest trading day strictly before the date.
+        """
+        self._ensure_year(day.year)
+        i = bisect_left(self.trading_days, day)
+        if i == 0:
+            self._ensure_year(min(self.covered_years) - 1)
+            return self.previous_trading_day(day)
+        return self.trading_days[i - 1]
+
+    def last_n_trading_days(self, n: int, end: date) -> list:
+        """
+        Get the last n trading days on or before the end date, in ascending order.
+        """
+        self._ensure_year(end.year)
+        i = bisect_right(self.trading_days, end)
+        while i < n:
+            self._ensure_year(min(self.covered_years) - 1)
+            i = bisect_right(self.trading_days, end)
+        return self.trading_days[i - n:i]
+
+@lru_cache(maxsize=1)
+def trading_calendar() -> TradingCalendar:
+    """
+    Get the process-wide trading calendar, loaded once from the RFin backend.
+    """
+    return TradingCalendar.from_endpoint()
+
 def is_weekend_holiday(date: datetime) -> bool:
     """
     Check a date either weekend or holiday
@@ -62,12 +135,7 @@ def is_weekend_holiday(date: datetime) -> bool:
     Return(s):
         a Python boolean True if the date is either weekend or holiday
     """
-    t = TanggalMerah(cache_path=None, cache_time=600)
-    t.set_date(date.year, date.month, date.day)
-    if is_saturday_sunday(date) is True or t.is_holiday() is True:
-        return True 
-    else:
-        return False
+    return not trading_calendar().is_trading_day(date.date())
     
 def get_last_n_dates(last_n_dates: int = 5) -> dict:
     """
@@ -79,16 +147,9 @@ def get_last_n_dates(last_n_dates: int = 5) -> dict:
     Return(s):
         a Python dictionary that contains proper start and end date range
     """
-    end_date = datetime.today() - timedelta(days=1)
-    list_of_dates = []
-    while last_n_dates > 0:
-        date_to_check = end_date
-        if is_weekend_holiday(date_to_check) is False:
-            list_of_dates.append(date_to_check)
-            last_n_dates -= 1
-        end_date = end_date - timedelta(days=1)
-    return {'start_date': list_of_dates[-1].strftime('%Y-%m-%d'), 
-            'end_date': list_of_dates[0].strftime('%Y-%m-%d')}
+    list_of_dates = trading_calendar().last_n_trading_days(last_n_dates, (datetime.today() - timedelta(days=1)).date())
+    return {'start_date': list_of_dates[0].strftime('%Y-%m-%d'), 
+            'end_date': list_of_dates[-1].strftime('%Y-%m-%d')}
 
 def helper_list_subsectors() -> list:
     """
@@ -0,0 +1,144 @@
+# Import package(s)
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+# Sent as X-Service-Token, so the backend exempts the frontends from its per-client throttles
+API_SERVICE_TOKEN = os.getenv('API_SERVICE_TOKEN')
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+# Connections kept alive per host, a Streamlit process serves many sessions and threads at once
+POOL_MAXSIZE = 32
+# Bounded retries with exponential backoff, for idempotent methods only
+RETRY = Retry(
+    total=3,
+    connect=3,
+    read=2,
+    status=3,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+class APIError(Exception):
+    """
+    Raised when a backend call fails, either without a response or with an HTTP error status.
+    """
+    def __init__(self, message: str, url: str, status_code: int = None):
+        super().__init__(message)
+        self.url = url
+        self.status_code = status_code
+
+class LatencyMetrics:
+    """
+    Per-endpoint call count, error count, and latency of the recent calls, kept in process memory.
+    """
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._calls = defaultdict(lambda: {"count": 0, "errors": 0, "latencies": deque(maxlen=self.window)})
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str, seconds: float, failed: bool):
+        parts = urlsplit(url)
+        with self._lock:
+            stats = self._calls[f"{method} {parts.netloc}{parts.path}"]
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["latencies"].append(seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Get the metrics of every endpoint called so far.
+
+        Return(s):
+            a Python dictionary of "METHOD host/path" to count, errors, and p50/p95/max latency in milliseconds
+        """
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._calls.items():
+                latencies = sorted(stats["latencies"])
+                result[endpoint] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                    "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+                    "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+                }
+            return result
+
+metrics = LatencyMetrics()
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(url: str) -> requests.Session:
+    """
+    Get the pooled keep-alive session of the url's scheme and host, created once per process.
+
+    Arg(s):
+        - url (str): Any url of the host, e.g. http://127.0.0.1:8000/api/ticker-list
+    Return(s):
+        a requests Session shared by every caller of the host
+    """
+    parts = urlsplit(url)
+    base_url = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(base_url)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                if API_SERVICE_TOKEN:
+                    session.headers["X-Service-Token"] = API_SERVICE_TOKEN
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=RETRY)
+                session.mount(f"{base_url}/", adapter)
+                _sessions[base_url] = session
+    return session
+
+def request(method: str, url: str, timeout=DEFAULT_TIMEOUT, raise_for_status: bool = True, **kwargs) -> requests.Response:
+    """
+    Send a request through the host's pooled session, with timeouts, retries for idempotent methods, and metrics.
+
+    Arg(s):
+        - method (str): HTTP method, e.g. GET or POST
+        - url (str): The url to hit
+        - timeout (tuple): (connect, read) timeouts in seconds
+        - raise_for_status (bool): Raise an APIError on an HTTP error status
+        - kwargs: Passed to `requests.Session.request`, e.g. params, data, headers
+    Return(s):
+        a requests Response
+    """
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = get_session(url).request(method, url, timeout=timeout, **kwargs)
+        failed = response.status_code >= 400
+    except requests.exceptions.RequestException as err:
+        raise APIError(f"{method} {url} failed: {err}", url) from err
+    finally:
+        metrics.record(method, url, time.perf_counter() - started, failed)
+    if raise_for_status and failed:
+        raise APIError(f"{method} {url} returned {response.status_code}: {response.text[:200]}", url, response.status_code)
+    return response
+
+def get_json(url: str, **kwargs):
+    """
+    GET a url and decode its JSON body, see `request` for the arguments.
+    """
+    return request("GET", url, **kwargs).json()
+
+def post(url: str, **kwargs) -> requests.Response:
+    """
+    POST to a url without retries, the response is returned whatever its status, see `request` for the arguments.
+    """
+    return request("POST", url, raise_for_status=False, **kwargs)
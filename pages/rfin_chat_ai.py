@@ -1,6 +1,7 @@
 # Import package(s)
 import streamlit as st
 from chat_ai.chat_ai import ChatAgent
+from http_client.http_client import APIError
 
 # Set page configuration
 st.set_page_config(page_title="RFin", layout="wide", 
@@ -10,7 +11,7 @@ st.set_page_config(page_title="RFin", layout="wide",
 
 if 'access' not in st.session_state:
     st.switch_page("app.py")
-    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot"])
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
 
 st.title("💬 RFin Bot")
 example_questions = [
@@ -38,11 +39,14 @@ if prompt := st.chat_input("Send something about IDX to RFin"):
     with st.chat_message("assistant"):
         st.write("🧠 Thinking...")
         chat_agent = ChatAgent(chat_input=prompt)
-        response = chat_agent._execute_agent()
+        try:
+            response = chat_agent._execute_agent()
+        except APIError as err:
+            response = f"Sorry, I could not retrieve the data right now ({err.status_code or 'no response'}), please try again later."
         st.write(response)
     st.session_state.messages.append({"role": "assistant", "content": response})
 
 if st.sidebar.button("Log Out"):
     del st.session_state["access"]
     st.switch_page("app.py")
-    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot"])
\ No newline at end of file
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
\ No newline at end of file
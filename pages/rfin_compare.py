@@ -0,0 +1,179 @@
+# Import package(s)
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from http_client.http_client import APIError, get_json
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from urllib.parse import urlencode
+
+from st_pages import hide_pages
+# Set page configuration
+st.set_page_config(page_title="RFin", layout="wide",
+                   page_icon="pages/assets/rf_logo.png",
+                   initial_sidebar_state="collapsed",
+                   menu_items={'About': "RFin is a Simple IDX Stocks Dashboard"})
+
+COMPARE_URL = "http://127.0.0.1:8000/api/compare"
+TICKER_SEARCH_URL = "http://127.0.0.1:8000/api/ticker-search"
+# Same bound as the backend, every selected ticker is loaded by a single request
+MAX_COMPARE_SYMBOLS = 20
+TICKER_SEARCH_LIMIT = 20
+# Seconds a comparison is reused across reruns and sessions, and the number of selection sets kept
+COMPARE_CACHE_TTL = 300
+COMPARE_CACHE_MAX_ENTRIES = 128
+COMPARE_WINDOWS = {"1 Year": relativedelta(years=-1), "3 Years": relativedelta(years=-3), "5 Years": relativedelta(years=-5), "Max": None}
+FUNDAMENTAL_METRICS = {
+    "Total Revenue (Rp Billion)": ("income_statement", "total_revenue", 1e9),
+    "Net Income (Rp Billion)": ("income_statement", "net_income", 1e9),
+    "Assets (Rp Trillion)": ("balance_sheet", "assets", 1e12),
+    "Liabilities (Rp Trillion)": ("balance_sheet", "liabilities", 1e12),
+    "Operating Cash Flow (Rp Billion)": ("cash_flow", "operating_cf", 1e9),
+}
+
+@st.cache_data(ttl=COMPARE_CACHE_TTL, max_entries=COMPARE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _search_tickers(query: str) -> list:
+    return get_json(f"{TICKER_SEARCH_URL}?{urlencode({'q': query.strip(), 'limit': TICKER_SEARCH_LIMIT})}")
+
+@st.cache_data(ttl=COMPARE_CACHE_TTL, max_entries=COMPARE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _fetch_comparison(symbols: tuple, start_date: str = None) -> dict:
+    query = {"symbols": ",".join(symbols)}
+    if start_date:
+        query["start_date"] = start_date
+    return get_json(f"{COMPARE_URL}?{urlencode(query)}")
+
+def retrieve_comparison(symbols: list, window: str) -> dict:
+    """
+    Retrieve the prices, overviews, and fundamentals of the selected tickers with one backend request,
+    memoized per selection set, so reordering the selection or rerunning the page costs no backend call.
+
+    Arg(s):
+        - symbols (list): Selected symbols, e.g. ["BBRI.JK", "BBCA.JK"]
+        - window (str): One of COMPARE_WINDOWS
+    Return(s):
+        a Python dictionary of prices, overview, and fundamentals, raises an APIError if the backend call failed
+    """
+    offset = COMPARE_WINDOWS[window]
+    start_date = str((datetime.today() + offset).date()) if offset else None
+    return _fetch_comparison(tuple(sorted(symbols)), start_date)
+
+def performance_chart(prices: dict):
+    """
+    A helper function to get the normalized performance figure, every close rebased to 100 at the window's start.
+
+    Arg(s):
+        - prices (dict): the prices of the compare endpoint, i.e. dates and a series per symbol
+    """
+    df = pd.DataFrame(prices["series"], index=pd.to_datetime(prices["dates"])).rename_axis("Date")
+    df = df.reset_index().melt(id_vars="Date", var_name="Symbol", value_name="Performance (Start = 100)")
+    fig = px.line(df, x="Date", y="Performance (Start = 100)", color="Symbol", template="ggplot2", render_mode="webgl")
+    fig.add_hline(y=100, line_dash="dot", line_color="grey")
+    fig.update_layout(legend=dict(orientation='h', x=0.5, y=1.02, xanchor='center', yanchor='bottom'))
+    return fig
+
+def fundamentals_table(fundamentals: dict, overview: dict) -> pd.DataFrame:
+    """
+    A helper function to get the latest fiscal year's fundamentals of every symbol side by side.
+
+    Arg(s):
+        - fundamentals (dict): the fundamentals of the compare endpoint, a list of fiscal years per symbol
+        - overview (dict): the overview of the compare endpoint, company name and sector per symbol
+    """
+    rows = []
+    for symbol, years in fundamentals.items():
+        latest = years[-1] if years else {}
+        income = latest.get("income_statement") or {}
+        balance = latest.get("balance_sheet") or {}
+        cash_flow = latest.get("cash_flow") or {}
+        revenue, net_income = income.get("total_revenue"), income.get("net_income")
+        assets, liabilities = balance.get("assets"), balance.get("liabilities")
+        equity = assets - liabilities if assets is not None and liabilities is not None else None
+        rows.append({
+            "Symbol": symbol,
+            "Company": overview.get(symbol, {}).get("company_name"),
+            "Sub Sector": overview.get(symbol, {}).get("sub_sector"),
+            "Fiscal Year": latest.get("fiscal_year"),
+            "Revenue (Rp Billion)": revenue / 1e9 if revenue is not None else None,
+            "Net Income (Rp Billion)": net_income / 1e9 if net_income is not None else None,
+            "NPM (%)": net_income / revenue * 100 if revenue and net_income is not None else None,
+            "Assets (Rp Trillion)": assets / 1e12 if assets is not None else None,
+            "Liabilities (Rp Trillion)": liabilities / 1e12 if liabilities is not None else None,
+            "DER (%)": liabilities / equity * 100 if equity else None,
+            "Operating Cash Flow (Rp Billion)": cash_flow.get("operating_cf") / 1e9 if cash_flow.get("operating_cf") is not None else None,
+        })
+    return pd.DataFrame(rows).set_index("Symbol")
+
+def fundamentals_chart(fundamentals: dict, metric: str):
+    """
+    A helper function to get a grouped bar figure of one metric per fiscal year across the symbols.
+
+    Arg(s):
+        - fundamentals (dict): the fundamentals of the compare endpoint, a list of fiscal years per symbol
+        - metric (str): One of FUNDAMENTAL_METRICS
+    """
+    statement, field, unit = FUNDAMENTAL_METRICS[metric]
+    rows = [{"Year": str(year["fiscal_year"]), "Symbol": symbol, metric: year[statement][field] / unit}
+            for symbol, years in fundamentals.items() for year in years
+            if year.get(statement) and year[statement].get(field) is not None]
+    df = pd.DataFrame(rows, columns=["Year", "Symbol", metric])
+    fig = px.bar(df, x="Year", y=metric, color="Symbol", barmode="group", template="ggplot2")
+    fig.update_layout(legend=dict(orientation='h', x=0.5, y=1.02, xanchor='center', yanchor='bottom'))
+    return fig
+
+if 'access' not in st.session_state:
+    st.switch_page("app.py")
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
+
+st.title("RFin - Compare Stocks")
+# Company names of the selected symbols, kept while the search moves on to other matches
+company_names = st.session_state.setdefault("compare_names", {})
+# The selection outlives the multiselect, whose state resets whenever a new search changes its options
+selected = st.session_state.setdefault("compare_selection", [])
+col1, col2 = st.columns([1, 3])
+with col1:
+    query = st.text_input("Search ticker", key="compare_query", placeholder="e.g. BBRI or bank rakyat")
+    window = st.selectbox("Period", list(COMPARE_WINDOWS), key="compare_window")
+try:
+    matches = _search_tickers(query)
+except APIError as err:
+    st.error(f"Could not search the tickers: {err}")
+    matches = []
+company_names.update({match["symbol"]: match["company_name"] for match in matches})
+with col2:
+    symbols = st.multiselect("Tickers", selected + [match["symbol"] for match in matches if match["symbol"] not in selected],
+                             default=selected, max_selections=MAX_COMPARE_SYMBOLS,
+                             format_func=lambda symbol: f"{symbol} - {company_names.get(symbol, '')}",
+                             placeholder=f"Choose up to {MAX_COMPARE_SYMBOLS} tickers")
+    st.session_state["compare_selection"] = symbols
+
+if not symbols:
+    st.info("Select the tickers to compare.")
+else:
+    try:
+        comparison = retrieve_comparison(symbols, window)
+    except APIError as err:
+        st.error(f"Could not load the comparison: {err}")
+        st.stop()
+    st.header("Normalized Price Performance")
+    missing = comparison["prices"].get("missing", [])
+    if missing:
+        st.warning(f"No prices for {', '.join(missing)}.")
+    if comparison["prices"]["series"] and comparison["prices"]["dates"]:
+        st.plotly_chart(performance_chart(comparison["prices"]), use_container_width=True)
+    else:
+        st.info(f"No prices in the last {window.lower()} for the selected tickers.")
+    st.header("Fundamentals")
+    st.dataframe(fundamentals_table(comparison["fundamentals"], comparison["overview"]), use_container_width=True,
+                 column_config={"Fiscal Year": st.column_config.NumberColumn(format="%d")})
+    metric = st.selectbox("Metric", list(FUNDAMENTAL_METRICS), key="compare_metric")
+    st.plotly_chart(fundamentals_chart(comparison["fundamentals"], metric), use_container_width=True)
+
+if st.sidebar.button("Refresh Data"):
+    _fetch_comparison.clear()
+    _search_tickers.clear()
+    st.rerun()
+
+if st.sidebar.button("Log Out"):
+    del st.session_state["access"]
+    st.switch_page("app.py")
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
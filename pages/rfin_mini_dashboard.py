@@ -3,10 +3,17 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
-import requests
+import pyarrow as pa
+from http_client.http_client import APIError, get_json, metrics, request
+import json
 from datetime import datetime
 from dateutil.relativedelta import relativedelta 
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from st_pages import hide_pages
 # Set page configuration
@@ -15,23 +22,160 @@ st.set_page_config(page_title="RFin", layout="wide",
                    initial_sidebar_state="collapsed",
                    menu_items={'About': "RFin is a Simple IDX Stocks Dashboard"})
 
+# Seconds a backend response is reused across reruns and sessions, and the number of responses kept
+ENDPOINT_CACHE_TTL = 300
+ENDPOINT_CACHE_MAX_ENTRIES = 256
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def _normalize_url(url: str) -> str:
+    """
+    Normalize a url so that equivalent requests share a cache entry, i.e. lowercase scheme and host, sorted query.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+@st.cache_data(ttl=ENDPOINT_CACHE_TTL, max_entries=ENDPOINT_CACHE_MAX_ENTRIES, show_spinner=False)
+def _fetch_endpoint(url: str):
+    response = request("GET", url)
+    if response.headers.get("Content-Type") == ARROW_STREAM_MEDIA_TYPE:
+        # Columns are decoded straight into typed arrays, e.g. datetime64 dates and int64 volumes
+        return pa.ipc.open_stream(response.content).read_pandas(date_as_object=False)
+    return response.json()
+
 def _retrieve_from_endpoint(url: str):
     """
-    Retrieve the financial data from the Sectors API according to the url.
+    Retrieve the financial data from the Sectors API according to the url, memoized per normalized url
+    for every session of this Streamlit process, so a rerun with an unchanged selection costs no backend call.
+    Urls with `format=arrow` are served as Arrow IPC streams and decoded into a DataFrame.
 
     Arg(s): 
         - url (str): The url to Sectors API hit
     Return(s):
-        a Python string that contains requested financial data
+        a Pandas DataFrame for Arrow responses, the decoded JSON otherwise, raises an APIError if the backend call failed
+    """
+    return _fetch_endpoint(_normalize_url(url))
+
+def _load_concurrently(urls: dict) -> dict:
+    """
+    Retrieve several endpoints at once on a thread pool, the page then waits for the slowest call only.
+
+    Arg(s):
+        - urls (dict): a dictionary of name to the url to Sectors API hit
+    Return(s):
+        a Python dictionary of name to the requested financial data
+    """
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=len(urls), initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+        futures = {name: executor.submit(_retrieve_from_endpoint, url) for name, url in urls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def clear_endpoint_cache():
+    """
+    Drop every memoized backend response and the figures drawn from them, e.g. after new market data is ingested.
+    """
+    _fetch_endpoint.clear()
+    _fetch_data_versions.clear()
+    _cached_figure_json.clear()
+
+DATA_VERSION_URL = "http://127.0.0.1:8000/api/data-version"
+# Seconds the dataset versions are reused, a re-ingested dataset shows up within this delay
+DATA_VERSION_TTL = 30
+# Number of serialized figures kept, each keyed by (chart type, dataset version, symbol, window)
+FIGURE_CACHE_MAX_ENTRIES = 512
+
+@st.cache_data(ttl=DATA_VERSION_TTL, show_spinner=False)
+def _fetch_data_versions():
+    return get_json(DATA_VERSION_URL)
+
+@st.cache_resource
+def _seen_data_versions() -> dict:
+    return {}
+
+def _data_versions() -> dict:
+    """
+    Get the current version of every dataset, dropping the memoized responses and figures once any of them was re-ingested.
+
+    Return(s):
+        a Python dictionary of dataset to version, empty if the backend is unreachable
     """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as err:
-        raise SystemExit(err)
+        versions = _fetch_data_versions()
+    except APIError:
+        return {}
+    seen = _seen_data_versions()
+    if seen and seen != versions:
+        _fetch_endpoint.clear()
+        _cached_figure_json.clear()
+    seen.update(versions)
+    return versions
+
+@st.cache_data(ttl=ENDPOINT_CACHE_TTL, max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_figure_json(chart_type: str, version: int, key: str, window: str, _build) -> str:
+    return pio.to_json(_build(), validate=False)
+
+def _figure_spec(chart_type: str, version: int, key: str, window: str, build) -> go.Figure:
+    """
+    Get a figure's serialized spec, built once per (chart type, dataset version, symbol, window)
+    for every session of this Streamlit process, so reruns skip rebuilding its traces and layout.
+
+    Arg(s):
+        - chart_type (str): name of the chart, e.g. candlestick
+        - version (int): version of the dataset the figure is drawn from, None to build without caching
+        - key (str): symbol or index code the figure is drawn for
+        - window (str): first date of the figure's window, None for the full history
+        - build (callable): zero-argument callable building the Plotly figure on a miss
+    Return(s):
+        a Plotly figure
+    """
+    if version is None:
+        return build()
+    # The spec was validated when it was built, a Figure (unlike a dict) is not validated again by st.plotly_chart
+    return go.Figure(json.loads(_cached_figure_json(chart_type, version, key, window, build)), _validate=False)
 
-def simple_line_chart(df: pd.DataFrame, x_y_axis: list, x_y_label: list = None, chart_title: str = None, markers: bool = False):
+# The dashboard's chart tabs and the window of data each of them shows
+DASHBOARD_WINDOWS = {"2 Weeks": relativedelta(weeks=-2), "1 Month": relativedelta(months=-1), "3 Months": relativedelta(months=-3)}
+WIDEST_WINDOW = relativedelta(months=-3)
+# Long-range tabs, downsampled by the backend to about one point per pixel of the chart, "Max" is the full history
+LONG_RANGE_WINDOWS = {"1 Year": relativedelta(years=-1), "5 Years": relativedelta(years=-5), "Max": None}
+# Points of a long-range line in a half-width column, and bars of a long-range full-width candlestick
+LINE_POINTS = 700
+CANDLE_POINTS = 300
+
+def _to_time_indexed(df: pd.DataFrame, date_column: str = "date") -> pd.DataFrame:
+    """
+    Index the endpoint's dataframe by a sorted DatetimeIndex, so windows are sliced by binary search.
+
+    Arg(s):
+        - df (DataFrame): a dataframe decoded from the endpoint's Arrow stream
+        - date_column (str): name of the datetime64 date column
+    Return(s):
+        a Pandas DataFrame indexed by date, ascending
+    """
+    return df.set_index(date_column).sort_index()
+
+def _window_start(window: relativedelta) -> pd.Timestamp:
+    return pd.Timestamp((datetime.today() + window).date())
+
+def _window_slice(df: pd.DataFrame, window: relativedelta) -> pd.DataFrame:
+    """
+    Slice the rows from today + window onwards, a searchsorted lookup on the sorted DatetimeIndex.
+    """
+    return df.iloc[df.index.searchsorted(_window_start(window), side="left"):]
+
+def _long_range_url(url: str, window: relativedelta, points: int) -> str:
+    """
+    Get the url of a long-range tab, the backend buckets the window's rows into at most `points` rows.
+
+    Arg(s):
+        - url (str): The url of the full history, e.g. http://127.0.0.1:8000/api/index-daily?index_code=IHSG&format=arrow
+        - window (relativedelta): Window of the tab, None for the full history
+        - points (int): Number of points the chart is drawn with
+    """
+    start_date = f"&start_date={_window_start(window).date()}" if window else ""
+    return f"{url}{start_date}&points={points}"
+
+def simple_line_chart(df: pd.DataFrame, x_y_axis: list, x_y_label: list = None, chart_title: str = None, markers: bool = False, webgl: bool = False):
     """
     A helper function to get a simple line chart figure using Plotly Express.
 
@@ -40,8 +184,9 @@ def simple_line_chart(df: pd.DataFrame, x_y_axis: list, x_y_label: list = None,
         - x_y_axis (list): a list for x and y axis name
         - x_y_label (list): a list for x and y axis label display in chart
         - chart_title (str): desired chart title
+        - webgl (bool): draw with WebGL (Scattergl) rather than SVG, for long series
     """
-    return px.line(df, x=x_y_axis[0], y=x_y_axis[1], template="ggplot2", title=chart_title, labels={x_y_axis[0]: x_y_label[0], x_y_axis[1]:x_y_label[1]}, line_shape="spline", markers=markers)
+    return px.line(df, x=x_y_axis[0], y=x_y_axis[1], template="ggplot2", title=chart_title, labels={x_y_axis[0]: x_y_label[0], x_y_axis[1]:x_y_label[1]}, line_shape="linear" if webgl else "spline", markers=markers, render_mode="webgl" if webgl else "auto")
 
 def simple_candlestick(df: pd.DataFrame, x_y_label: list = None, chart_title: str = None):
     """
@@ -66,128 +211,18 @@ def simple_candlestick(df: pd.DataFrame, x_y_label: list = None, chart_title: st
     ])
     return fig
 
-if 'access' not in st.session_state:
-    st.switch_page("app.py")
-    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot"])
-
-st.title("RFin - IDX Mini Dashboard") 
-col1, col2 = st.columns(2)
-with col1:
-    st.header("Indonesia Stock Exchange (IDX) Total Market Capitalization")
-    tabs = st.tabs(["2 Weeks", "1 Month", "3 Months"])
-    with tabs[0]:
-        returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/idx-total-market-cap?start_date={(datetime.today() + relativedelta(weeks=-2)).strftime('%Y-%m-%d')}")
-        data = {"Date": [d["date"] for d in returned_data],
-                "Market Capitalization (Rp Trillion)" : [d["idx_total_market_cap"]/1e12 for d in returned_data]}
-        idx_df = pd.DataFrame(data)
-        fig = simple_line_chart(df=idx_df, x_y_axis=["Date", "Market Capitalization (Rp Trillion)"], x_y_label=["Date", "Market Capitalization (Rp Trillion)"])
-        st.plotly_chart(fig, use_container_width=True)
-
-    with tabs[1]:
-        returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/idx-total-market-cap?start_date={(datetime.today() + relativedelta(months=-1)).strftime('%Y-%m-%d')}")
-        data = {"Date": [d["date"] for d in returned_data],
-                "Market Capitalization (Rp Trillion)" : [d["idx_total_market_cap"]/1e12 for d in returned_data]}
-        idx_df = pd.DataFrame(data)
-        fig = simple_line_chart(df=idx_df, x_y_axis=["Date", "Market Capitalization (Rp Trillion)"], x_y_label=["Date", "Market Capitalization (Rp Trillion)"])
-        st.plotly_chart(fig, use_container_width=True)
-
-    with tabs[2]:
-        returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/idx-total-market-cap?start_date={(datetime.today() + relativedelta(months=-3)).strftime('%Y-%m-%d')}")
-        data = {"Date": [d["date"] for d in returned_data],
-                "Market Capitalization (Rp Trillion)" : [d["idx_total_market_cap"]/1e12 for d in returned_data]}
-        idx_df = pd.DataFrame(data)
-        fig = simple_line_chart(df=idx_df, x_y_axis=["Date", "Market Capitalization (Rp Trillion)"], x_y_label=["Date", "Market Capitalization (Rp Trillion)"])
-        st.plotly_chart(fig, use_container_width=True)
+def income_statement_chart(df: pd.DataFrame):
+    """
+    A helper function to get the income statement figure of a stock, or a "No Data Available" figure.
 
-with col2:
-    st.header("Movement of Index in IDX")
-    selected_index = st.selectbox("Choose an index", ["FTSE", "IDX30", "IDXBUMN20", "IDXESGL", "IDXG30", "IDXHIDIV20", "IDXQ30", "IDXV30", "IHSG", "JII70", "KOMPAS100", "LQ45", "SRI-KEHATI", "STI"], index=8)
-    returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/index-daily?index_code={selected_index}")
-    data = {"Date": [d["date"] for d in returned_data],
-            "Price": [d["price"] for d in returned_data]}
-    index_df = pd.DataFrame(data).sort_values("Date", ascending=True)
-    tabs = st.tabs(["2 Weeks", "1 Month", "3 Months"])
-    with tabs[0]:
-        fig = simple_line_chart(df=index_df[index_df["Date"] >= (datetime.today() + relativedelta(weeks=-2)).strftime('%Y-%m-%d')], x_y_axis=["Date", "Price"],  x_y_label=['Date', ' '])
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[1]:
-        fig = simple_line_chart(df=index_df[index_df["Date"] >= (datetime.today() + relativedelta(months=-1)).strftime('%Y-%m-%d')], x_y_axis=["Date", "Price"],  x_y_label=['Date', ' '])
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[2]:
-        fig = simple_line_chart(df=index_df[index_df["Date"] >= (datetime.today() + relativedelta(months=-3)).strftime('%Y-%m-%d')], x_y_axis=["Date", "Price"],  x_y_label=['Date', ' '])
-        st.plotly_chart(fig, use_container_width=True)
-
-ticker_list = [f"{d['symbol']} | {d['company_name']}" for d in _retrieve_from_endpoint("http://127.0.0.1:8000/api/ticker-list")]
-selected_ticker = st.selectbox(label="Type or dropdown a stock symbol here, e.g. BBRI or Bank Rakyat Indonesia", options=ticker_list)
-
-st.header(f"{str(selected_ticker)[:7]} Overview")
-returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/ticker-overview?symbol={str(selected_ticker)[:7]}")
-get_dict = returned_data[0]
-company_info = {
-    "Symbol": get_dict["symbol"],
-    "Company Name": get_dict["company_name"],
-    "Sector": get_dict["sector"],
-    "Sub-Sector": get_dict["sub_sector"],
-    "Industry": get_dict["sub_industry"],
-    "Listing Date": get_dict["listing_date"],
-    "Website": get_dict["website"]
-}
-st.markdown("""
-<style>
-.info-box {
-    background-color: #f9f9f9;
-    padding: 10px;
-    border-radius: 5px;
-    margin-bottom: 10px;
-}
-.info-key {
-    font-weight: bold;
-    color: #333;
-}
-.info-value {
-    color: #555;
-}
-</style>
-""", unsafe_allow_html=True)
-
-for key, value in company_info.items():
-    st.markdown(f"""
-    <div class="info-box">
-        <span class="info-key">{key}:</span> <span class="info-value">{value}</span>
-    </div>
-    """, unsafe_allow_html=True)
-
-st.header(f"{str(selected_ticker)[:7]} Prices Movement")
-returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/ticker-daily?symbol={str(selected_ticker)[:7]}")
-data = {"date": [d["date"] for d in returned_data],
-        "symbol": [d["symbol"] for d in returned_data],
-        "open": [d["open"] for d in returned_data],
-        "high": [d["high"] for d in returned_data],
-        "low": [d["low"] for d in returned_data],
-        "close": [d["close"] for d in returned_data],
-        "volume": [d["volume"] for d in returned_data]}
-ticker_daily_df = pd.DataFrame(data)
-ticker_daily_df['date'] = pd.to_datetime(ticker_daily_df['date'])
-tabs = st.tabs(["2 Weeks", "1 Month", "3 Months"])
-with tabs[0]:
-    fig = simple_candlestick(df=ticker_daily_df[ticker_daily_df["date"] >= (datetime.today() + relativedelta(weeks=-2)).strftime('%Y-%m-%d')], x_y_label=["Date", "Price (Rp/Share)"])
-    st.plotly_chart(fig, use_container_width=True)
-with tabs[1]:
-    fig = simple_candlestick(df=ticker_daily_df[ticker_daily_df["date"] >= (datetime.today() + relativedelta(months=-1)).strftime('%Y-%m-%d')], x_y_label=["Date", "Price (Rp/Share)"])
-    st.plotly_chart(fig, use_container_width=True)
-with tabs[2]:
-    fig = simple_candlestick(df=ticker_daily_df[ticker_daily_df["date"] >= (datetime.today() + relativedelta(months=-3)).strftime('%Y-%m-%d')], x_y_label=["Date", "Price (Rp/Share)"])
-    st.plotly_chart(fig, use_container_width=True)
-
-st.header(f"{str(selected_ticker)[:7]} Financial Informations")
-col1, col2, col3 = st.columns(3)
-with col1:
-    returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/income-statement?symbol={str(selected_ticker)[:7]}")
-    data = {"Year": [d["year"] for d in returned_data],
-        "Total Revenue (Rp Billion)": [d["total_revenue"]/1e9 for d in returned_data],
-        "Net Income (Rp Billion)": [d["net_income"]/1e9 for d in returned_data],
-        "NPM (%)": [(d["net_income"]/d["total_revenue"])*100 if d["total_revenue"] != 0 else 0 for d in returned_data]}
-    if not data["Year"] or not data["Total Revenue (Rp Billion)"] or not data["Net Income (Rp Billion)"] or not data["NPM (%)"]:
+    Arg(s):
+        - df (DataFrame): a dataframe returned by the income-statement endpoint, one row per fiscal year
+    """
+    data = {"Year": df["fiscal_year"].astype(str),
+        "Total Revenue (Rp Billion)": df["total_revenue"]/1e9,
+        "Net Income (Rp Billion)": df["net_income"]/1e9,
+        "NPM (%)": (df["net_income"]/df["total_revenue"]*100).where(df["total_revenue"] != 0, 0)}
+    if df.empty:
         fig = go.Figure()
         fig.add_annotation(
             text="No Data Available",
@@ -225,16 +260,22 @@ with col1:
             barmode='group',  
             legend=dict(orientation='h', x=0.5, y=1.1, xanchor='center', yanchor='bottom'),
             margin=dict(t=150, b=70))
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-with col2:
-    returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/balance-sheet?symbol={str(selected_ticker)[:7]}")
-    data = {"Year": [d["year"] for d in returned_data],
-        "Assets (Rp Trillion)": [d["assets"]/1e12 for d in returned_data],
-        "Liabilities (Rp Trillion)": [d["liabilities"]/1e12 for d in returned_data],
-        "Equity (Rp Trillion)": [(d["assets"] - d["liabilities"])/1e12 for d in returned_data],
-        "DER (%)": [(d["liabilities"]/(d["assets"] - d["liabilities"]))*100 if (d["assets"] - d["liabilities"]) != 0 else 0 for d in returned_data]}
-    if not data["Year"] or not data["Assets (Rp Trillion)"] or not data["Liabilities (Rp Trillion)"] or not data["Equity (Rp Trillion)"] or not data["DER (%)"]:
+def balance_sheet_chart(df: pd.DataFrame):
+    """
+    A helper function to get the balance sheet figure of a stock, or a "No Data Available" figure.
+
+    Arg(s):
+        - df (DataFrame): a dataframe returned by the balance-sheet endpoint, one row per fiscal year
+    """
+    equity = df["assets"] - df["liabilities"]
+    data = {"Year": df["fiscal_year"].astype(str),
+        "Assets (Rp Trillion)": df["assets"]/1e12,
+        "Liabilities (Rp Trillion)": df["liabilities"]/1e12,
+        "Equity (Rp Trillion)": equity/1e12,
+        "DER (%)": (df["liabilities"]/equity*100).where(equity != 0, 0)}
+    if df.empty:
         fig = go.Figure()
         fig.add_annotation(
             text="No Data Available",
@@ -245,7 +286,7 @@ with col2:
             xanchor='center', yanchor='middle'
         )
         fig.update_layout(
-            title={"text": "Cash Flow", "x":0.5, "xanchor": "center", "yanchor": "top"},
+            title={"text": "Balance Sheet", "x":0.5, "xanchor": "center", "yanchor": "top"},
             xaxis=dict(visible=False),
             yaxis=dict(visible=False),
             plot_bgcolor="white",
@@ -272,15 +313,20 @@ with col2:
             barmode='group',  
             legend=dict(orientation='h', x=0.5, y=1.1, xanchor='center', yanchor='bottom'),
             margin=dict(t=150, b=70))
-    st.plotly_chart(fig, use_container_width=True)
-
-with col3:
-    returned_data = _retrieve_from_endpoint(f"http://127.0.0.1:8000/api/cash-flow?symbol={str(selected_ticker)[:7]}")
-    data = {"Year": [d["year"] for d in returned_data],
-        "Operating Cash Flow (Rp Billion)": [d["operating_cf"]/1e9 for d in returned_data],
-        "Investing Cash Flow (Rp Billion)": [d["investing_cf"]/1e9 for d in returned_data],
-        "Financing Cash Flow (Rp Billion)": [d["financing_cf"]/1e9 for d in returned_data]}
-    if not data["Year"] or not data["Operating Cash Flow (Rp Billion)"] or not data["Investing Cash Flow (Rp Billion)"] or not data["Financing Cash Flow (Rp Billion)"]:
+    return fig
+
+def cash_flow_chart(df: pd.DataFrame):
+    """
+    A helper function to get the cash flow figure of a stock, or a "No Data Available" figure.
+
+    Arg(s):
+        - df (DataFrame): a dataframe returned by the cash-flow endpoint, one row per fiscal year
+    """
+    data = {"Year": df["fiscal_year"].astype(str),
+        "Operating Cash Flow (Rp Billion)": df["operating_cf"]/1e9,
+        "Investing Cash Flow (Rp Billion)": df["investing_cf"]/1e9,
+        "Financing Cash Flow (Rp Billion)": df["financing_cf"]/1e9}
+    if df.empty:
         fig = go.Figure()
         fig.add_annotation(
             text="No Data Available",
@@ -318,9 +364,223 @@ with col3:
             barmode='group',  
             legend=dict(orientation='h', x=0.5, y=1.1, xanchor='center', yanchor='bottom'),
             margin=dict(t=150, b=70))
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+INDEX_CODES = ["FTSE", "IDX30", "IDXBUMN20", "IDXESGL", "IDXG30", "IDXHIDIV20", "IDXQ30", "IDXV30", "IHSG", "JII70", "KOMPAS100", "LQ45", "SRI-KEHATI", "STI"]
+TICKER_SEARCH_URL = "http://127.0.0.1:8000/api/ticker-search"
+# Number of matches offered for a search
+TICKER_SEARCH_LIMIT = 20
+
+def _ticker_search_url(query: str) -> str:
+    return f"{TICKER_SEARCH_URL}?{urlencode({'q': query.strip(), 'limit': TICKER_SEARCH_LIMIT})}"
+
+def _market_cap_url() -> str:
+    # The widest market cap window is fetched once, the other tabs are slices of it
+    return f"http://127.0.0.1:8000/api/idx-total-market-cap?start_date={(datetime.today() + WIDEST_WINDOW).strftime('%Y-%m-%d')}&format=arrow"
+
+def _index_daily_url(index_code: str) -> str:
+    return f"http://127.0.0.1:8000/api/index-daily?index_code={index_code}&format=arrow"
+
+def _index_urls(index_code: str) -> dict:
+    # The index's full history and its long-range tabs
+    return {
+        "index_daily": _index_daily_url(index_code),
+        **{label: _long_range_url(_index_daily_url(index_code), window, LINE_POINTS) for label, window in LONG_RANGE_WINDOWS.items()},
+    }
+
+def _ticker_urls(symbol: str) -> dict:
+    # The stock's overview, full history, long-range tabs, and financial statements
+    return {
+        "overview": f"http://127.0.0.1:8000/api/ticker-overview?symbol={symbol}",
+        "ticker_daily": f"http://127.0.0.1:8000/api/ticker-daily?symbol={symbol}&format=arrow",
+        **{label: _long_range_url(f"http://127.0.0.1:8000/api/ticker-daily?symbol={symbol}&format=arrow", window, CANDLE_POINTS) for label, window in LONG_RANGE_WINDOWS.items()},
+        "income_statement": f"http://127.0.0.1:8000/api/income-statement?symbol={symbol}&format=arrow",
+        "balance_sheet": f"http://127.0.0.1:8000/api/balance-sheet?symbol={symbol}&format=arrow",
+        "cash_flow": f"http://127.0.0.1:8000/api/cash-flow?symbol={symbol}&format=arrow",
+    }
+
+def _prefetch_dashboard():
+    """
+    Warm the cache of every section in one concurrent batch, so a full run waits for about the slowest call only.
+    The selected stock, or the first match on a cold load, is known once the search returns, its endpoints are
+    queued then while the other calls are still in flight.
+    """
+    ctx = get_script_run_ctx()
+    urls = [_market_cap_url(), *_index_urls(st.session_state.get("selected_index", "IHSG")).values()]
+    with ThreadPoolExecutor(max_workers=16, initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+        search = executor.submit(_retrieve_from_endpoint, _ticker_search_url(st.session_state.get("ticker_query", "")))
+        futures = [executor.submit(_retrieve_from_endpoint, url) for url in urls]
+        symbols = [match["symbol"] for match in search.result()]
+        if symbols:
+            selected = st.session_state.get("selected_ticker")
+            symbol = selected if selected in symbols else symbols[0]
+            futures += [executor.submit(_retrieve_from_endpoint, url) for url in _ticker_urls(symbol).values()]
+        for future in futures:
+            future.result()
+
+@st.fragment
+def market_cap_section():
+    """
+    The IDX total market capitalization tabs, a fragment without inputs, so no widget of the page reruns it.
+    """
+    version = _data_versions().get("idx_total_market_cap")
+    try:
+        market_cap = _retrieve_from_endpoint(_market_cap_url())
+    except APIError as err:
+        st.error(f"Could not load the market capitalization: {err}")
+        return
+    idx_df = _to_time_indexed(market_cap)
+    idx_df["Market Capitalization (Rp Trillion)"] = idx_df["idx_total_market_cap"] / 1e12
+    tabs = st.tabs(list(DASHBOARD_WINDOWS))
+    for tab, window in zip(tabs, DASHBOARD_WINDOWS.values()):
+        with tab:
+            spec = _figure_spec("market_cap_line", version, "IDX", str(_window_start(window).date()), lambda: simple_line_chart(df=_window_slice(idx_df, window).rename_axis("Date").reset_index(), x_y_axis=["Date", "Market Capitalization (Rp Trillion)"], x_y_label=["Date", "Market Capitalization (Rp Trillion)"]))
+            st.plotly_chart(spec, use_container_width=True)
+
+@st.fragment
+def index_section():
+    """
+    The index selectbox and its price tabs, changing the index reruns this fragment only.
+    """
+    selected_index = st.selectbox("Choose an index", INDEX_CODES, index=INDEX_CODES.index("IHSG"), key="selected_index")
+    version = _data_versions().get("index_daily")
+    try:
+        index_data = _load_concurrently(_index_urls(selected_index))
+    except APIError as err:
+        st.error(f"Could not load the index prices: {err}")
+        return
+    index_df = _to_time_indexed(index_data["index_daily"]).rename(columns={"price": "Price"})
+    tabs = st.tabs(list(DASHBOARD_WINDOWS) + list(LONG_RANGE_WINDOWS))
+    for tab, window in zip(tabs, DASHBOARD_WINDOWS.values()):
+        with tab:
+            spec = _figure_spec("index_line", version, selected_index, str(_window_start(window).date()), lambda: simple_line_chart(df=_window_slice(index_df, window).rename_axis("Date").reset_index(), x_y_axis=["Date", "Price"],  x_y_label=['Date', ' ']))
+            st.plotly_chart(spec, use_container_width=True)
+    for tab, (label, window) in zip(tabs[len(DASHBOARD_WINDOWS):], LONG_RANGE_WINDOWS.items()):
+        with tab:
+            spec = _figure_spec("index_line_webgl", version, selected_index, str(_window_start(window).date()) if window else None, lambda: simple_line_chart(df=index_data[label].rename(columns={"date": "Date", "price": "Price"}), x_y_axis=["Date", "Price"],  x_y_label=['Date', ' '], webgl=True))
+            st.plotly_chart(spec, use_container_width=True)
+
+@st.fragment
+def ticker_section():
+    """
+    The ticker search with the overview, prices, and financials of the selected stock,
+    searching or changing the ticker reruns this fragment only and loads the stock's endpoints concurrently.
+    """
+    query = st.text_input(label="Search a stock by symbol or company name, e.g. BBRI or Bank Rakyat Indonesia", key="ticker_query")
+    try:
+        matches = _retrieve_from_endpoint(_ticker_search_url(query))
+    except APIError as err:
+        st.error(f"Could not search the stocks: {err}")
+        return
+    if not matches:
+        st.info(f"No stock matches \"{query}\"")
+        return
+    company_names = {d["symbol"]: d["company_name"] for d in matches}
+    symbol = st.selectbox(label="Choose a stock", options=list(company_names), format_func=lambda s: f"{s} | {company_names[s]}", key="selected_ticker")
+    versions = _data_versions()
+    try:
+        ticker_data = _load_concurrently(_ticker_urls(symbol))
+    except APIError as err:
+        st.error(f"Could not load the stock data: {err}")
+        return
+
+    st.header(f"{symbol} Overview")
+    if not ticker_data["overview"]:
+        st.info(f"No overview available for {symbol}.")
+    else:
+        get_dict = ticker_data["overview"][0]
+        company_info = {
+            "Symbol": get_dict["symbol"],
+            "Company Name": get_dict["company_name"],
+            "Sector": get_dict["sector"],
+            "Sub-Sector": get_dict["sub_sector"],
+            "Industry": get_dict["sub_industry"],
+            "Listing Date": get_dict["listing_date"],
+            "Website": get_dict["website"]
+        }
+        st.markdown("""
+        <style>
+        .info-box {
+            background-color: #f9f9f9;
+            padding: 10px;
+            border-radius: 5px;
+            margin-bottom: 10px;
+        }
+        .info-key {
+            font-weight: bold;
+            color: #333;
+        }
+        .info-value {
+            color: #555;
+        }
+        </style>
+        """, unsafe_allow_html=True)
+
+        for key, value in company_info.items():
+            st.markdown(f"""
+            <div class="info-box">
+                <span class="info-key">{key}:</span> <span class="info-value">{value}</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+    st.header(f"{symbol} Prices Movement")
+    ticker_daily_df = _to_time_indexed(ticker_data["ticker_daily"])
+    tabs = st.tabs(list(DASHBOARD_WINDOWS) + list(LONG_RANGE_WINDOWS))
+    for tab, window in zip(tabs, DASHBOARD_WINDOWS.values()):
+        with tab:
+            spec = _figure_spec("candlestick", versions.get("ticker_daily"), symbol, str(_window_start(window).date()), lambda: simple_candlestick(df=_window_slice(ticker_daily_df, window).reset_index(), x_y_label=["Date", "Price (Rp/Share)"]))
+            st.plotly_chart(spec, use_container_width=True)
+    # Each long-range bar aggregates several sessions, drawn from the backend's bucketed OHLCV rows
+    for tab, (label, window) in zip(tabs[len(DASHBOARD_WINDOWS):], LONG_RANGE_WINDOWS.items()):
+        with tab:
+            spec = _figure_spec("candlestick_bucketed", versions.get("ticker_daily"), symbol, str(_window_start(window).date()) if window else None, lambda: simple_candlestick(df=ticker_data[label], x_y_label=["Date", "Price (Rp/Share)"]))
+            st.plotly_chart(spec, use_container_width=True)
+
+    st.header(f"{symbol} Financial Informations")
+    col1, col2, col3 = st.columns(3)
+    for col, dataset, name, chart in zip([col1, col2, col3], ["income_stmt", "balance_sh", "cash_flow"], ["income_statement", "balance_sheet", "cash_flow"], [income_statement_chart, balance_sheet_chart, cash_flow_chart]):
+        with col:
+            spec = _figure_spec(name, versions.get(dataset), symbol, None, lambda: chart(ticker_data[name]))
+            st.plotly_chart(spec, use_container_width=True)
+
+if 'access' not in st.session_state:
+    st.switch_page("app.py")
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
+
+# A full run warms the cache of every section at once, the fragments then render from it.
+# Later interactions rerun only the fragment they belong to
+_data_versions()
+try:
+    _prefetch_dashboard()
+except APIError as err:
+    st.error(f"Could not load the dashboard data: {err}")
+    st.stop()
+
+st.title("RFin - IDX Mini Dashboard") 
+col1, col2 = st.columns(2)
+with col1:
+    st.header("Indonesia Stock Exchange (IDX) Total Market Capitalization")
+    market_cap_section()
+with col2:
+    st.header("Movement of Index in IDX")
+    index_section()
+
+ticker_section()
+
+# Backend calls made by this Streamlit process since it started, across every session
+with st.sidebar.expander("Backend Latency"):
+    backend_metrics = metrics.snapshot()
+    if backend_metrics:
+        st.dataframe(pd.DataFrame.from_dict(backend_metrics, orient="index").rename_axis("Endpoint"),
+                     use_container_width=True)
+    else:
+        st.caption("No backend calls yet.")
+
+if st.sidebar.button("Refresh Data"):
+    clear_endpoint_cache()
+    st.rerun()
 
 if st.sidebar.button("Log Out"):
     del st.session_state["access"]
     st.switch_page("app.py")
-    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot"])
\ No newline at end of file
+    hide_pages(["RFin Mini Dashboard", "RFin AI-ChatBot", "RFin Compare"])
\ No newline at end of file
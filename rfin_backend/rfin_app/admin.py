@@ -9,4 +9,7 @@ admin.site.register(TickerDaily)
 admin.site.register(BalanceSh)
 admin.site.register(CashFlow)
 admin.site.register(IncomeStatement)
-admin.site.register(TickerOverview)
\ No newline at end of file
+admin.site.register(TickerOverview)
+admin.site.register(SectorDaily)
+admin.site.register(TradingCalendar)
+admin.site.register(Job)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import APIException, ValidationError
+
+
+class AnalyticsUnavailable(APIException):
+    status_code = 503
+    default_detail = "Analytics snapshots are not available, run `manage.py export_parquet` first."
+    default_code = "analytics_unavailable"
+
+
+class QueryTimeout(APIException):
+    status_code = 504
+    default_detail = "The analytics query exceeded its time limit, narrow down its parameters."
+    default_code = "query_timeout"
+
+
+# Parameter parsers, each raises a ValidationError keyed by the parameter name
+def integer(minimum: int, maximum: int):
+    def parse(name, value):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: f"Invalid integer: {value}"})
+        if not minimum <= value <= maximum:
+            raise ValidationError({name: f"Must be between {minimum} and {maximum}"})
+        return value
+    return parse
+
+
+def iso_date(name, value):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValidationError({name: f"Invalid date: {value}, must be YYYY-MM-DD"})
+
+
+def choice(*choices):
+    def parse(name, value):
+        if value not in choices:
+            raise ValidationError({name: f"Invalid value: {value}, must be one of {list(choices)}"})
+        return value
+    return parse
+
+
+def codes():
+    def parse(name, value):
+        values = sorted({code.strip().upper() for code in str(value).split(",") if code.strip()})
+        if not values or len(values) > 50:
+            raise ValidationError({name: "Between 1 and 50 comma separated values are required"})
+        return values
+    return parse
+
+
+# Whitelisted query templates. `{table}` placeholders are replaced by snapshot paths, `{level}` is validated
+# against its choices, every other parameter is bound by DuckDB.
+QUERY_TEMPLATES = {
+    "sector_returns": {
+        "description": "Equal-weighted yearly and cumulative returns per sector or sub-sector",
+        "params": {
+            "level": (choice("sector", "sub_sector"), "sub_sector"),
+            "start_year": (integer(1990, 2100), None),
+            "end_year": (integer(1990, 2100), None),
+        },
+        "sql": """
+            WITH yearly AS (
+                SELECT symbol, year, arg_min(close, date) AS first_close, arg_max(close, date) AS last_close
+                FROM {ticker_daily}
+                WHERE year BETWEEN $start_year AND $end_year AND close > 0
+                GROUP BY symbol, year
+            ), returns AS (
+                SELECT symbol, year,
+                       last_close / coalesce(lag(last_close) OVER (PARTITION BY symbol ORDER BY year), first_close) - 1
+                       AS yearly_return
+                FROM yearly
+            ), sectors AS (
+                SELECT o.{level} AS name, r.year, avg(r.yearly_return) AS mean_return,
+                       median(r.yearly_return) AS median_return, count(*) AS constituents
+                FROM returns r JOIN {ticker_overview} o USING (symbol)
+                GROUP BY ALL
+            )
+            SELECT name, year, mean_return, median_return, constituents,
+                   exp(sum(ln(1 + mean_return)) OVER (PARTITION BY name ORDER BY year)) - 1 AS cumulative_return
+            FROM sectors
+            ORDER BY name, year
+        """,
+    },
+    "volume_rank": {
+        "description": "Daily top symbols by their rolling average volume over `window` trading days",
+        "params": {
+            "start_date": (iso_date, None),
+            "end_date": (iso_date, None),
+            "window": (integer(2, 250), 20),
+            "top": (integer(1, 100), 10),
+        },
+        "sql": """
+            WITH rolling AS (
+                SELECT symbol, date,
+                       avg(volume) OVER (PARTITION BY symbol ORDER BY date
+                                         ROWS BETWEEN {window} - 1 PRECEDING AND CURRENT ROW) AS avg_volume
+                FROM {ticker_daily}
+                WHERE year BETWEEN year($scan_start) AND year($end_date) AND date BETWEEN $scan_start AND $end_date
+            )
+            SELECT date, symbol, avg_volume,
+                   rank() OVER (PARTITION BY date ORDER BY avg_volume DESC) AS volume_rank
+            FROM rolling
+            WHERE date >= $start_date AND avg_volume IS NOT NULL
+            QUALIFY volume_rank <= $top
+            ORDER BY date, volume_rank
+        """,
+    },
+    "index_drawdown": {
+        "description": "Yearly return and maximum drawdown of indices",
+        "params": {
+            "index_code": (codes(), None),
+            "start_year": (integer(1990, 2100), None),
+            "end_year": (integer(1990, 2100), None),
+        },
+        "sql": """
+            WITH prices AS (
+                SELECT index_code, year, date, price,
+                       price / max(price) OVER (PARTITION BY index_code, year ORDER BY date) - 1 AS drawdown
+                FROM {index_daily}
+                WHERE index_code IN (SELECT unnest($index_code)) AND year BETWEEN $start_year AND $end_year
+            )
+            SELECT index_code, year, arg_max(price, date) / arg_min(price, date) - 1 AS yearly_return,
+                   min(drawdown) AS max_drawdown
+            FROM prices
+            GROUP BY ALL
+            ORDER BY index_code, year
+        """,
+    },
+}
+
+
+def snapshot_path() -> Path:
+    """
+    Resolve the `current` snapshot once per query, so a concurrent export swapping it cannot mix snapshots.
+    """
+    current = Path(settings.SNAPSHOT_DIR) / "current"
+    if not (current / "_manifest.json").exists():
+        raise AnalyticsUnavailable()
+    return current.resolve()
+
+
+def parse_params(template: dict, query_params) -> dict:
+    params = {}
+    for name, (parse, default) in template["params"].items():
+        value = query_params.get(name, None)
+        if value is None:
+            if default is None:
+                raise ValidationError({name: "This parameter is required"})
+            params[name] = default
+        else:
+            params[name] = parse(name, value)
+    if params.get("start_year", 0) > params.get("end_year", 1):
+        raise ValidationError({"start_year": "Must not be after end_year"})
+    if params.get("start_date", date.min) > params.get("end_date", date.max):
+        raise ValidationError({"start_date": "Must not be after end_date"})
+    return params
+
+
+def execute(snapshot: Path, template: dict, params: dict) -> dict:
+    """
+    Run a query template on an in-memory DuckDB connection, interrupted after `ANALYTICS_QUERY_TIMEOUT` seconds.
+    """
+    tables = {
+        name: f"read_parquet('{snapshot / name}/**/*.parquet', hive_partitioning = true)"
+        for name in ("ticker_daily", "index_daily")
+    }
+    tables["ticker_overview"] = f"read_parquet('{snapshot / 'ticker_overview'}/*.parquet')"
+    bound = {name: value for name, value in params.items() if name not in ("level", "window")}
+    if "window" in params:
+        # Scan enough calendar days before start_date to fill the first rolling window
+        bound["scan_start"] = params["start_date"] - timedelta(days=params["window"] * 2 + 10)
+    sql = template["sql"].format(level=params.get("level"), window=params.get("window"), **tables)
+
+    con = duckdb.connect(config={"threads": settings.ANALYTICS_THREADS,
+                                 "memory_limit": settings.ANALYTICS_MEMORY_LIMIT})
+    timer = threading.Timer(settings.ANALYTICS_QUERY_TIMEOUT, con.interrupt)
+    timer.start()
+    try:
+        cursor = con.execute(sql, bound)
+        rows = cursor.fetchmany(settings.ANALYTICS_MAX_ROWS + 1)
+        columns = [column[0] for column in cursor.description]
+    except duckdb.InterruptException:
+        raise QueryTimeout()
+    finally:
+        timer.cancel()
+        con.close()
+    return {
+        "columns": columns,
+        "rows": [list(row) for row in rows[:settings.ANALYTICS_MAX_ROWS]],
+        "truncated": len(rows) > settings.ANALYTICS_MAX_ROWS,
+    }
+
+
+def run_query(name: str, query_params) -> dict:
+    """
+    Run a whitelisted analytics query over the current Parquet snapshot, cached per snapshot.
+
+    Arg(s):
+        - name (str): Query template name, one of QUERY_TEMPLATES
+        - query_params (QueryDict): Request query parameters holding the template parameters
+    Return(s):
+        a Python dictionary with the template name, snapshot, columns, rows, and whether rows were truncated
+    """
+    template = QUERY_TEMPLATES.get(name)
+    if template is None:
+        raise ValidationError({"template": f"Invalid template: {name}, must be one of {list(QUERY_TEMPLATES)}"})
+    params = parse_params(template, query_params)
+    snapshot = snapshot_path()
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    cache_key = f"analytics: {snapshot.name}-{name}-{digest}"
+    result = cache.get(cache_key)
+    if result is None:
+        print("Hitting snapshot")
+        result = {"template": name, "snapshot": snapshot.name, **execute(snapshot, template, params)}
+        cache.set(cache_key, result, settings.ANALYTICS_CACHE_TIMEOUT)
+    else:
+        print("Cache retrieved!")
+    return result
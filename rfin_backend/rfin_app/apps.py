@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RfinAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rfin_app'
+
+    def ready(self):
+        from . import checks  # noqa: F401
@@ -0,0 +1,289 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .analytics import choice, integer
+from .local_cache import get_data_version
+from .models import SeriesBlock, TickerDaily
+from .series_store import decode_block
+
+TRADING_DAYS = 252
+
+
+@dataclass
+class PriceMatrix:
+    """
+    Closes and volumes of every symbol aligned on the union of trading dates, NaN where a symbol did not trade.
+    """
+    version: int
+    dates: np.ndarray
+    symbols: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def _aligned(dates: np.ndarray, symbols: np.ndarray, row_dates: np.ndarray, row_symbols: np.ndarray, values: list):
+    date_index = np.searchsorted(dates, row_dates)
+    symbol_index = np.searchsorted(symbols, row_symbols)
+    matrices = []
+    for column in values:
+        matrix = np.full((len(dates), len(symbols)), np.nan)
+        matrix[date_index, symbol_index] = column
+        matrices.append(matrix)
+    return matrices
+
+
+def load_price_matrix(version: int) -> PriceMatrix:
+    """
+    Load the ticker_daily closes and volumes from the series blocks, or from the table when there are none.
+    """
+    blocks = SeriesBlock.objects.filter(dataset="ticker_daily").values_list("key", "payload")
+    row_symbols, row_dates, close, volume = [], [], [], []
+    for key, payload in blocks.iterator():
+        dates, columns = decode_block("ticker_daily", bytes(payload))
+        row_symbols.append(np.full(len(dates), key, dtype=object))
+        row_dates.append(dates)
+        close.append(np.where(columns["close"][1], np.nan, columns["close"][0]))
+        volume.append(np.where(columns["volume"][1], np.nan, columns["volume"][0]))
+    if row_dates:
+        row_symbols, row_dates = np.concatenate(row_symbols), np.concatenate(row_dates)
+        close, volume = np.concatenate(close), np.concatenate(volume)
+    else:
+        frame = pd.DataFrame.from_records(
+            TickerDaily.objects.values_list("symbol", "date", "close", "volume").iterator(chunk_size=10000),
+            columns=["symbol", "date", "close", "volume"])
+        row_symbols = frame["symbol"].to_numpy(dtype=object)
+        row_dates = frame["date"].to_numpy(dtype="datetime64[D]")
+        close = frame["close"].to_numpy(dtype=float)
+        volume = frame["volume"].to_numpy(dtype=float)
+    dates = np.unique(row_dates)
+    symbols = np.unique(row_symbols).astype(str)
+    close, volume = _aligned(dates, symbols, row_dates, row_symbols.astype(str), [close, volume])
+    return PriceMatrix(version, dates, symbols, close, volume)
+
+
+def price_matrix() -> PriceMatrix:
+    """
+    Get the process-level price matrix, reloaded once the ticker_daily data version changes.
+    """
+    global _matrix
+    version = get_data_version("ticker_daily")
+    if _matrix is not None and _matrix.version == version:
+        return _matrix
+    with _matrix_lock:
+        if _matrix is None or _matrix.version != version:
+            _matrix = load_price_matrix(version)
+        return _matrix
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return values[index, np.arange(values.shape[1])]
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    # NaN until a symbol has `window` valid values, without letting its leading NaNs poison the running sums
+    valid = ~np.isnan(values)
+    padding = np.zeros((1, values.shape[1]))
+    sums = np.cumsum(np.vstack([padding, np.where(valid, values, 0)]), axis=0)
+    counts = np.cumsum(np.vstack([padding, valid]), axis=0)
+    result = np.full(values.shape, np.nan)
+    full = counts[window:] - counts[:-window] == window
+    result[window - 1:] = np.where(full, (sums[window:] - sums[:-window]) / window, np.nan)
+    return result
+
+
+# Strategies map forward-filled closes to target weights, decided at the close of each date
+def ma_crossover(close: np.ndarray, volume: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    """
+    Hold an equal sleeve of every symbol whose fast moving average is above its slow one.
+    """
+    signal = _rolling_mean(close, fast) > _rolling_mean(close, slow)
+    return signal / close.shape[1]
+
+
+def rsi_threshold(close: np.ndarray, volume: np.ndarray, period: int, lower: int, upper: int) -> np.ndarray:
+    """
+    Hold an equal sleeve of a symbol from its RSI closing below `lower` until it closes above `upper`.
+    """
+    change = pd.DataFrame(np.diff(close, axis=0, prepend=np.nan))
+    gain = change.clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+    loss = (-change.clip(upper=0)).ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / loss)
+    state = np.full(close.shape, np.nan)
+    state[rsi < lower] = 1
+    state[rsi > upper] = 0
+    state = _forward_fill(state)
+    return np.nan_to_num(state) / close.shape[1]
+
+
+def rank_rebalance(close: np.ndarray, volume: np.ndarray, lookback: int, top: int, every: int,
+                   rank_by: str) -> np.ndarray:
+    """
+    Every `every` dates, hold the `top` symbols by `lookback` momentum or average traded value, equally weighted.
+    """
+    if rank_by == "momentum":
+        score = np.full(close.shape, np.nan)
+        score[lookback:] = close[lookback:] / close[:-lookback] - 1
+    else:
+        score = _rolling_mean(np.nan_to_num(close * volume), lookback)
+    weights = np.full(close.shape, np.nan)
+    for t in range(lookback, len(close), every):
+        scores = np.where(np.isnan(score[t]), -np.inf, score[t])
+        ranked = np.argsort(-scores, kind="stable")[:top]
+        ranked = ranked[np.isfinite(scores[ranked])]
+        weights[t] = 0
+        if len(ranked):
+            weights[t, ranked] = 1 / len(ranked)
+    return np.nan_to_num(_forward_fill(weights))
+
+
+# Strategy functions and their parameters as (parser, default), parsed like the analytics query templates
+STRATEGIES = {
+    "ma_crossover": {
+        "function": ma_crossover,
+        "params": {"fast": (integer(2, 250), 20), "slow": (integer(3, 500), 50)},
+    },
+    "rsi": {
+        "function": rsi_threshold,
+        "params": {"period": (integer(2, 100), 14), "lower": (integer(1, 99), 30), "upper": (integer(1, 99), 70)},
+    },
+    "rank_rebalance": {
+        "function": rank_rebalance,
+        "params": {"lookback": (integer(5, 500), 126), "top": (integer(1, 200), 10), "every": (integer(1, 250), 21),
+                   "rank_by": (choice("momentum", "value"), "momentum")},
+    },
+}
+
+
+def run_backtest(strategy: str, params: dict, symbols: list = None, start_date=None, end_date=None,
+                 cost_bps: float = 10) -> dict:
+    """
+    Run a strategy across symbols at once on the process-level price matrix.
+
+    Arg(s):
+        - strategy (str): One of STRATEGIES
+        - params (dict): Keyword arguments of the strategy, e.g. fast and slow for ma_crossover
+        - symbols (list): Symbols traded, default to every symbol
+        - start_date (date): First date of the backtest, indicators are warmed up on the preceding data
+        - end_date (date): Last date of the backtest
+        - cost_bps (float): Transaction cost in basis points of the traded value
+    Return(s):
+        a Python dictionary of the summary statistics and the daily equity curve
+    """
+    matrix = price_matrix()
+    columns = np.arange(len(matrix.symbols))
+    if symbols:
+        columns = np.flatnonzero(np.isin(matrix.symbols, symbols))
+    close = _forward_fill(matrix.close[:, columns])
+    volume = matrix.volume[:, columns]
+    weights = STRATEGIES[strategy]["function"](close, volume, **params)
+
+    returns = np.nan_to_num(close[1:] / close[:-1] - 1)
+    held = weights[:-1]
+    turnover = np.abs(np.diff(weights, axis=0)).sum(axis=1)
+    daily = (held * returns).sum(axis=1) - turnover * cost_bps / 10000
+    dates = matrix.dates[1:]
+
+    selected = np.ones(len(dates), dtype=bool)
+    if start_date:
+        selected &= dates >= np.datetime64(start_date)
+    if end_date:
+        selected &= dates <= np.datetime64(end_date)
+    dates, daily, turnover = dates[selected], daily[selected], turnover[selected]
+    if not len(dates):
+        return {"symbols": len(columns), "days": 0, "equity_curve": []}
+
+    equity = np.cumprod(1 + daily)
+    drawdown = equity / np.maximum.accumulate(np.maximum(equity, 1)) - 1
+    years = len(dates) / TRADING_DAYS
+    volatility = daily.std() * np.sqrt(TRADING_DAYS)
+    return {
+        "symbols": len(columns),
+        "days": len(dates),
+        "total_return": float(equity[-1] - 1),
+        "cagr": float(equity[-1] ** (1 / years) - 1) if equity[-1] > 0 else -1.0,
+        "volatility": float(volatility),
+        "sharpe": float(daily.mean() * TRADING_DAYS / volatility) if volatility else None,
+        "max_drawdown": float(drawdown.min()),
+        "annual_turnover": float(turnover.sum() / years),
+        "equity_curve": [
+            {"date": day, "equity": value, "drawdown": loss}
+            for day, value, loss in zip(np.datetime_as_string(dates, unit="D").tolist(), equity.round(6).tolist(),
+                                        drawdown.round(6).tolist())
+        ],
+    }
+
+
+def correlation_matrix(symbols: list, start_date=None, end_date=None, min_periods: int = 20) -> dict:
+    """
+    Correlate the daily returns of symbols on the process-level price matrix.
+
+    Arg(s):
+        - symbols (list): Symbols to correlate, default to every symbol
+        - start_date (date): First date of the returns
+        - end_date (date): Last date of the returns
+        - min_periods (int): Minimum number of overlapping returns, pairs with fewer are null
+    Return(s):
+        a Python dictionary of the symbols and their correlation matrix, row by row
+    """
+    matrix = price_matrix()
+    columns = np.flatnonzero(np.isin(matrix.symbols, symbols)) if symbols else np.arange(len(matrix.symbols))
+    close = matrix.close[:, columns]
+    returns = close[1:] / close[:-1] - 1
+    dates = matrix.dates[1:]
+    selected = np.ones(len(dates), dtype=bool)
+    if start_date:
+        selected &= dates >= np.datetime64(start_date)
+    if end_date:
+        selected &= dates <= np.datetime64(end_date)
+    correlation = pd.DataFrame(returns[selected]).corr(min_periods=min_periods).to_numpy()
+    return {
+        "symbols": matrix.symbols[columns].tolist(),
+        "matrix": [[None if np.isnan(value) else round(value, 6) for value in row] for row in correlation.tolist()],
+    }
+
+
+def normalized_performance(symbols: list, start_date=None, end_date=None) -> dict:
+    """
+    Rebase the closes of symbols to 100 at their first close of the window, on the process-level price matrix.
+
+    Arg(s):
+        - symbols (list): Symbols to compare
+        - start_date (date): First date of the window, default to the full history
+        - end_date (date): Last date of the window
+    Return(s):
+        a Python dictionary of the window's dates, each symbol's rebased closes, null before its first close,
+        and the symbols without any close in the price matrix
+    """
+    matrix = price_matrix()
+    columns = np.flatnonzero(np.isin(matrix.symbols, symbols))
+    missing = sorted(set(symbols) - set(matrix.symbols[columns].tolist()))
+    close = _forward_fill(matrix.close[:, columns])
+    selected = np.ones(len(matrix.dates), dtype=bool)
+    if start_date:
+        selected &= matrix.dates >= np.datetime64(start_date)
+    if end_date:
+        selected &= matrix.dates <= np.datetime64(end_date)
+    close = close[selected]
+    if not len(close):
+        return {"dates": [], "series": {symbol: [] for symbol in matrix.symbols[columns].tolist()}, "missing": missing}
+    valid = ~np.isnan(close)
+    first = np.where(valid.any(axis=0), close[valid.argmax(axis=0), np.arange(close.shape[1])], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rebased = np.round(close / first * 100, 4)
+    return {
+        "dates": np.datetime_as_string(matrix.dates[selected], unit="D").tolist(),
+        "series": {symbol: [None if np.isnan(value) else value for value in rebased[:, i].tolist()]
+                   for i, symbol in enumerate(matrix.symbols[columns].tolist())},
+        "missing": missing,
+    }
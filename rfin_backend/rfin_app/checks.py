@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_stream_broker(app_configs, **kwargs):
+    # The memory broker only reaches SSE clients of the process that publishes, e.g. not the ASGI workers'
+    # clients when `manage.py post_ingest` publishes, it is meant for tests
+    if settings.STREAM_BROKER == "memory":
+        return [Warning(
+            "STREAM_BROKER is 'memory', newly ingested bars only reach SSE clients of the ingesting process.",
+            hint="Use STREAM_BROKER=redis outside of tests.",
+            id="rfin_app.W001",
+        )]
+    return []
@@ -0,0 +1,69 @@
+import gzip
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred content codings when the client accepts several with the same quality
+ENCODING_PREFERENCE = ["br", "gzip", "identity"]
+
+
+def compress_variants(body: bytes) -> dict:
+    """
+    Compress a rendered response body once into every supported content coding.
+
+    Arg(s):
+        - body (bytes): The rendered response body
+    Return(s):
+        a Python dictionary of content coding to compressed body, identity is derived from gzip on demand
+    """
+    variants = {"gzip": gzip.compress(body, compresslevel=6)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=5)
+    return variants
+
+
+def decompress_body(variants: dict) -> bytes:
+    return gzip.decompress(variants["gzip"])
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """
+    Pick the content coding to serve from an Accept-Encoding header, by quality then by preference.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    candidates = [coding for coding in ENCODING_PREFERENCE if coding == "identity" or coding in available]
+    wildcard = qualities.get("*", 0.0)
+    # Identity is acceptable unless refused, but only served uncompressed when no listed coding is available
+    unlisted_identity = qualities.get("*", 0.001)
+    scored = [(qualities.get(coding, unlisted_identity if coding == "identity" else wildcard), -rank)
+              for rank, coding in enumerate(candidates)]
+    quality, rank = max(scored)
+    return candidates[-rank] if quality > 0 else "identity"
+
+
+def precompressed_response(variants: dict, request, content_type: str = "application/json") -> HttpResponse:
+    """
+    Serve a precompressed variant negotiated from the request's Accept-Encoding header.
+    """
+    encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), variants)
+    if encoding == "identity":
+        response = HttpResponse(decompress_body(variants), content_type=content_type)
+    else:
+        response = HttpResponse(variants[encoding], content_type=content_type)
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
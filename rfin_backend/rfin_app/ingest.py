@@ -0,0 +1,28 @@
+from .local_cache import bump_data_version
+from .rollups import materialize_sector_daily
+from .series_store import SERIES_DATASETS, sync_series_blocks
+from .streaming import publish_new_bars
+from .warmup import dashboard_requests, warm_cache
+
+
+def on_ingest(datasets: list, warm: bool = True, workers: int = 8, progress=None):
+    """
+    Run everything that derives from freshly ingested datasets.
+
+    Arg(s):
+        - datasets (list): Ingested dataset names, e.g. ticker_daily, index_daily
+        - warm (bool): Prewarm the dashboard's responses once the derived data is up to date
+        - workers (int): Number of threads used to warm the cache
+        - progress (callable): Progress callback passed to `warm_cache`
+    """
+    # The bump comes first, blocks are checked against the table until they are synced at the new version
+    bump_data_version(*datasets)
+    for dataset in datasets:
+        if dataset in SERIES_DATASETS:
+            sync_series_blocks(dataset)
+    if "ticker_daily" in datasets:
+        materialize_sector_daily(incremental=True)
+        bump_data_version("sector_daily")
+        publish_new_bars()
+    if warm:
+        return warm_cache(dashboard_requests(), workers=workers, progress=progress)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .analytics import run_query, snapshot_path
+from .backtest import correlation_matrix, run_backtest
+from .local_cache import get_data_version
+from .models import Job
+
+# Job kinds: the function running the parsed parameters and the version of the data the result derives from
+JOB_KINDS = {
+    "backtest": (lambda params: run_backtest(**params), lambda: get_data_version("ticker_daily")),
+    "correlation": (lambda params: correlation_matrix(**params), lambda: get_data_version("ticker_daily")),
+    "analytics": (lambda params: run_query(params["template"], params["params"]), lambda: snapshot_path().name),
+}
+
+
+def dedupe_key(kind: str, params: dict) -> str:
+    version = JOB_KINDS[kind][1]()
+    payload = json.dumps([kind, params, version], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def submit_job(kind: str, params: dict) -> tuple:
+    """
+    Queue a job, or reuse a queued, running, or succeeded job of the same kind and parameters on the same data.
+
+    Arg(s):
+        - kind (str): One of JOB_KINDS
+        - params (dict): Validated parameters of the job
+    Return(s):
+        a Python tuple of the job and whether it was newly created
+    """
+    key = dedupe_key(kind, params)
+    job = Job.objects.filter(dedupe_key=key).exclude(status=Job.FAILED).first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, params=params, dedupe_key=key), True
+    except IntegrityError:
+        # A concurrent submission queued it first, job_dedupe_key_uniq allows one job per key that has not failed
+        return Job.objects.exclude(status=Job.FAILED).get(dedupe_key=key), False
+
+
+def claim_job(worker: str):
+    """
+    Take the oldest queued job, rows locked by another worker are skipped rather than waited for.
+    """
+    with transaction.atomic():
+        job = (Job.objects.select_for_update(skip_locked=True).filter(status=Job.QUEUED)
+               .order_by("created_at").first())
+        if job is None:
+            return None
+        # Conditional update, so backends without row locks cannot hand the job to two workers either
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=F("attempts") + 1, started_at=now, heartbeat_at=now)
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def beat(job_id, stop: threading.Event):
+    """
+    Stamp the heartbeat of a running job every `JOB_HEARTBEAT_INTERVAL` seconds until `stop` is set.
+    """
+    try:
+        while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            try:
+                Job.objects.filter(pk=job_id, status=Job.RUNNING).update(heartbeat_at=timezone.now())
+            except DatabaseError as err:
+                print(f"Could not beat for job {job_id}: {err}")
+    finally:
+        # The thread's own connection
+        connection.close()
+
+
+def run_job(job: Job):
+    run = JOB_KINDS[job.kind][0]
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=beat, args=(job.pk, stop), daemon=True)
+    heartbeat.start()
+    try:
+        job.result = json.loads(json.dumps(run(job.params), cls=DjangoJSONEncoder))
+        job.status = Job.SUCCEEDED
+    except Exception as err:
+        job.error = f"{err}\n{traceback.format_exc()}"
+        job.status = Job.FAILED
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.finished_at = timezone.now()
+    job.save(update_fields=["result", "status", "error", "finished_at"])
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Requeue jobs whose worker missed its heartbeats, i.e. died mid-run, failing them after `JOB_MAX_ATTEMPTS` attempts.
+    A job may run for any length of time while its worker keeps beating.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT)
+    stale = Job.objects.filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+                               status=Job.RUNNING)
+    stale.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Job.FAILED, error="Lost the worker on every attempt", finished_at=timezone.now())
+    return stale.update(status=Job.QUEUED)
+
+
+def prune_jobs() -> int:
+    expired = Job.objects.filter(finished_at__lt=timezone.now() - timedelta(seconds=settings.JOB_RESULT_TTL))
+    return expired.delete()[0]
+
+
+def work(poll_interval: float = 1.0, max_jobs: int = None):
+    """
+    Run jobs until interrupted, the loop of each `manage.py run_workers` process.
+
+    Arg(s):
+        - poll_interval (float): Seconds to sleep when the queue is empty
+        - max_jobs (int): Exit after running this many jobs or once the queue is empty, default to run forever
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    last_maintenance = float("-inf")
+    while max_jobs is None or done < max_jobs:
+        close_old_connections()
+        try:
+            if time.monotonic() - last_maintenance > 60:
+                requeue_stale_jobs()
+                prune_jobs()
+                last_maintenance = time.monotonic()
+            job = claim_job(worker)
+        except DatabaseError as err:
+            print(f"{worker} could not claim a job: {err}")
+            time.sleep(poll_interval)
+            continue
+        if job is None:
+            if max_jobs is not None:
+                return
+            time.sleep(poll_interval)
+            continue
+        print(f"{worker} running {job.kind} job {job.id}")
+        run_job(job)
+        done += 1
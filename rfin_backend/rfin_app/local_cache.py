@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Redis pub/sub channel announcing the dataset whose version was bumped
+DATA_VERSION_CHANNEL = "rfin:data-version"
+
+
+class LocalCache:
+    """
+    Per-process TTL + LRU cache that sits in front of django.core.cache (Redis).
+
+    Keys are namespaced by dataset, so a data version bump of a dataset drops only its entries.
+    Each invalidation also moves the dataset to a new generation, so values loaded before it are not stored.
+    """
+    def __init__(self, max_entries: int = 1024, timeout: int = 300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._cleared = 0
+
+    def get(self, dataset: str, key: str, default=None):
+        _ensure_listener()
+        with self._lock:
+            item = self._data.get((dataset, key))
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[(dataset, key)]
+                return default
+            self._data.move_to_end((dataset, key))
+            return value
+
+    def generation(self, dataset: str) -> tuple:
+        """
+        Get the generation of a dataset, to be read before its data version and passed to `set`.
+        """
+        return self._cleared, self._generations.get(dataset, 0)
+
+    def set(self, dataset: str, key: str, value, timeout: int = None, generation: tuple = None):
+        expires_at = time.monotonic() + (timeout or self.timeout)
+        with self._lock:
+            if generation is not None and generation != self.generation(dataset):
+                # Loaded before the dataset was invalidated, possibly from the previous version
+                return
+            self._data[(dataset, key)] = (expires_at, value)
+            self._data.move_to_end((dataset, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, dataset: str):
+        with self._lock:
+            self._generations[dataset] = self._generations.get(dataset, 0) + 1
+            for cache_key in [k for k in self._data if k[0] == dataset]:
+                del self._data[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._cleared += 1
+            self._data.clear()
+
+    def shared_key(self, dataset: str, key: str) -> str:
+        """
+        Get the Redis key of a value, versioned by the current data version of its dataset.
+        """
+        return f"{dataset}: v{get_data_version(dataset)}-{key}"
+
+    def get_or_set(self, dataset: str, key: str, loader, timeout: int = None):
+        """
+        Read through the local cache, then Redis, then the loader.
+
+        Arg(s):
+            - dataset (str): Dataset name the value derives from, e.g. ticker_list
+            - key (str): Key of the value within the dataset
+            - loader (callable): Zero-argument callable producing the value on a miss
+            - timeout (int): TTL in seconds for both cache layers, default to the local cache timeout
+        Return(s):
+            the cached or freshly loaded value
+        """
+        value = self.get(dataset, key)
+        if value is not None:
+            return value
+        generation = self.generation(dataset)
+        shared_key = self.shared_key(dataset, key)
+        value = cache.get(shared_key)
+        if value is None:
+            value = loader()
+            cache.set(shared_key, value, timeout or self.timeout)
+        self.set(dataset, key, value, timeout, generation)
+        return value
+
+
+local_cache = LocalCache(
+    max_entries=getattr(settings, "LOCAL_CACHE_MAX_ENTRIES", 1024),
+    timeout=getattr(settings, "LOCAL_CACHE_TIMEOUT", 300),
+)
+
+
+def get_data_version(dataset: str) -> int:
+    """
+    Get the current version of a dataset, bumped every time the dataset is re-ingested.
+    """
+    return cache.get(f"data-version: {dataset}", 0)
+
+
+def bump_data_version(*datasets: str):
+    """
+    Bump the version of datasets and announce it to every worker's local cache.
+
+    Arg(s):
+        - datasets (str): Dataset names, e.g. ticker_list, ticker_overview
+    """
+    for dataset in datasets:
+        version_key = f"data-version: {dataset}"
+        cache.add(version_key, 0, None)
+        cache.incr(version_key)
+        local_cache.invalidate(dataset)
+        connection = redis_connection()
+        if connection is not None:
+            connection.publish(DATA_VERSION_CHANNEL, dataset)
+
+
+def redis_connection():
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        # Not a django-redis cache backend, local entries then only expire by TTL
+        return None
+
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener():
+    """
+    Start the data version subscriber thread once per worker process.
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+        if redis_connection() is None:
+            return
+        threading.Thread(target=_listen, name="rfin-data-version-listener", daemon=True).start()
+
+
+def _listen():
+    while True:
+        try:
+            pubsub = redis_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(DATA_VERSION_CHANNEL)
+            # Anything cached before the (re)subscription may have missed a bump
+            local_cache.clear()
+            for message in pubsub.listen():
+                local_cache.invalidate(message["data"].decode())
+        except Exception as err:
+            print(f"Data version listener disconnected: {err}")
+            time.sleep(5)
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rfin_app.models import IDXTotalMarketCap, IndexDaily, TickerDaily, TickerList, TickerOverview
+from rfin_app.serializers import (IDXTotalMarketCapSerializer, IndexDailySerializer, TickerDailySerializer,
+                                  TickerListSerializer, TickerOverviewSerializer, serialize_values)
+
+DATASETS = {
+    "ticker_daily": (TickerDaily, TickerDailySerializer),
+    "index_daily": (IndexDaily, IndexDailySerializer),
+    "idx_total_market_cap": (IDXTotalMarketCap, IDXTotalMarketCapSerializer),
+    "ticker_list": (TickerList, TickerListSerializer),
+    "ticker_overview": (TickerOverview, TickerOverviewSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of ModelSerializer against the values_list() fast path on list endpoints' data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", choices=list(DATASETS), action="append", dest="datasets",
+                            help="Dataset to benchmark, can be repeated, default to all")
+        parser.add_argument("--limit", type=int, default=50000, help="Maximum rows read per dataset")
+        parser.add_argument("--fields", default=None, help="Comma separated sparse fieldset, e.g. date,close")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per path, the best one is reported")
+
+    def _best_of(self, repeat, func):
+        best, result = float("inf"), None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    def handle(self, *args, **options):
+        for dataset in options["datasets"] or list(DATASETS):
+            model, serializer_class = DATASETS[dataset]
+            fields = options["fields"].split(",") if options["fields"] else list(serializer_class().fields)
+            ids = list(model.objects.values_list("pk", flat=True)[:options["limit"]])
+            if not ids:
+                self.stdout.write(f"{dataset}: no rows, skipped")
+                continue
+
+            def model_path():
+                data = serializer_class(model.objects.filter(pk__in=ids), many=True).data
+                return [{name: row[name] for name in fields} for row in data]
+
+            def values_path():
+                return serialize_values(model.objects.filter(pk__in=ids), serializer_class, fields)
+
+            model_seconds, model_rows = self._best_of(options["repeat"], model_path)
+            values_seconds, values_rows = self._best_of(options["repeat"], values_path)
+            if sorted(map(repr, model_rows)) != sorted(map(repr, values_rows)):
+                self.stderr.write(self.style.ERROR(f"{dataset}: values_list() output differs from ModelSerializer"))
+            self.stdout.write(
+                f"{dataset} ({len(ids)} rows, fields={','.join(fields)}): "
+                f"ModelSerializer {len(ids) / model_seconds:,.0f} rows/sec, "
+                f"values_list {len(ids) / values_seconds:,.0f} rows/sec, "
+                f"{model_seconds / values_seconds:.1f}x faster"
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from rfin_app.local_cache import bump_data_version
+from rfin_app.series_store import SERIES_DATASETS, sync_series_blocks
+
+
+class Command(BaseCommand):
+    help = "Build the compact per-(symbol, year) series blocks read by the ticker-daily and index-daily views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", action="append", choices=list(SERIES_DATASETS), default=None,
+                            help="Dataset to build, can be repeated, default to every dataset")
+        parser.add_argument("--full", action="store_true",
+                            help="Rebuild every block instead of the ones whose table rows changed")
+
+    def handle(self, *args, **options):
+        datasets = options["dataset"] or list(SERIES_DATASETS)
+        bump_data_version(*datasets)
+        for dataset in datasets:
+            written = sync_series_blocks(dataset, full=options["full"])
+            self.stdout.write(f"{dataset}: {written} blocks")
+        self.stdout.write(self.style.SUCCESS(f"Built series blocks for {', '.join(datasets)}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from rfin_app.local_cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Bump the version of re-ingested datasets, invalidating their cached responses in every worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("datasets", nargs="+", help="Dataset names, e.g. ticker_list ticker_overview")
+
+    def handle(self, *args, **options):
+        bump_data_version(*options["datasets"])
+        self.stdout.write(self.style.SUCCESS(f"Bumped data version of {', '.join(options['datasets'])}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rfin_app.snapshots import SNAPSHOT_TABLES, export_snapshot
+
+
+class Command(BaseCommand):
+    help = "Export the market and statement tables to Parquet snapshots partitioned by symbol and year"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--table", action="append", choices=list(SNAPSHOT_TABLES), default=None,
+                            help="Table to export, can be repeated, default to every table")
+        parser.add_argument("--output", default=None, help="Snapshots directory, default to SNAPSHOT_DIR")
+        parser.add_argument("--keep", type=int, default=2, help="Number of most recent snapshots kept on disk")
+
+    def handle(self, *args, **options):
+        if options["keep"] < 1:
+            raise CommandError("--keep must be at least 1")
+        manifest = export_snapshot(tables=options["table"], root=options["output"], keep=options["keep"])
+        for name, rows in manifest["tables"].items():
+            self.stdout.write(f"{name}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(f"Exported snapshot to {manifest['path']}"))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from rfin_app.rollups import materialize_sector_daily
+
+
+class Command(BaseCommand):
+    help = "Materialize per-sector and per-sub-sector daily rollups into the sector_daily table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-date", type=date.fromisoformat, default=None,
+                            help="First date to materialize (YYYY-MM-DD), default to the first date in ticker_daily")
+        parser.add_argument("--end-date", type=date.fromisoformat, default=None,
+                            help="Last date to materialize (YYYY-MM-DD), default to the last date in ticker_daily")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Only materialize dates after the last date already in sector_daily")
+
+    def handle(self, *args, **options):
+        written = materialize_sector_daily(
+            start_date=options["start_date"],
+            end_date=options["end_date"],
+            incremental=options["incremental"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Materialized {written} sector_daily rows"))
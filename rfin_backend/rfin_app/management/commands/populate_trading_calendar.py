@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from pytanggalmerah import TanggalMerah
+
+from rfin_app.local_cache import bump_data_version
+from rfin_app.models import TradingCalendar
+
+
+def holiday_description(summary) -> str:
+    # Days with several holidays list every one of them
+    if isinstance(summary, str):
+        return summary[:255]
+    return ", ".join(summary)[:255]
+
+
+class Command(BaseCommand):
+    help = "Populate the trading_calendar table with IDX trading days, weekends, and holidays of whole years"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, action="append", dest="years",
+                            help="Year to populate, can be repeated, default to the current and next year")
+
+    def handle(self, *args, **options):
+        years = options["years"] or [date.today().year, date.today().year + 1]
+        # A single TanggalMerah fetches the holiday list once for every year
+        holidays = TanggalMerah(cache_path=None, cache_time=600)
+        rows = []
+        for year in years:
+            day = date(year, 1, 1)
+            while day.year == year:
+                # Read the holiday list directly, is_holiday() cannot record a day with several holidays
+                holiday = holidays.data.get(day.isoformat())
+                if day.weekday() >= 5:
+                    rows.append(TradingCalendar(date=day, is_trading_day=False, description=day.strftime("%A")))
+                elif holiday is not None:
+                    rows.append(TradingCalendar(date=day, is_trading_day=False,
+                                                description=holiday_description(holiday["summary"])))
+                else:
+                    rows.append(TradingCalendar(date=day, is_trading_day=True))
+                day += timedelta(days=1)
+        TradingCalendar.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["date"],
+            update_fields=["is_trading_day", "description"],
+        )
+        bump_data_version("trading_calendar")
+        trading_days = sum(row.is_trading_day for row in rows)
+        self.stdout.write(self.style.SUCCESS(f"Populated {len(rows)} days ({trading_days} trading days) of {', '.join(map(str, years))}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from rfin_app.ingest import on_ingest
+
+
+class Command(BaseCommand):
+    help = "Invalidate, re-derive, and prewarm everything that depends on freshly ingested datasets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("datasets", nargs="+", help="Ingested dataset names, e.g. ticker_daily index_daily")
+        parser.add_argument("--no-warm", action="store_true", help="Skip prewarming the dashboard's responses")
+        parser.add_argument("--workers", type=int, default=8, help="Number of threads warming the cache")
+
+    def progress(self, done, total, failed, elapsed):
+        self.stdout.write(f"{done}/{total} responses ({failed} failed), {done / elapsed:,.1f} responses/sec")
+
+    def handle(self, *args, **options):
+        stats = on_ingest(options["datasets"], warm=not options["no_warm"], workers=options["workers"],
+                          progress=self.progress)
+        self.stdout.write(self.style.SUCCESS(f"Post-ingest done for {', '.join(options['datasets'])}"))
+        if stats:
+            self.stdout.write(self.style.SUCCESS(
+                f"Warmed {stats['warmed']} responses ({stats['failed']} failed) in {stats['seconds']:.1f}s"))
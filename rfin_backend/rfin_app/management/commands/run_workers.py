@@ -0,0 +1,34 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from rfin_app.jobs import work
+
+
+class Command(BaseCommand):
+    help = "Run a pool of worker processes executing the jobs queued by /api/jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2, help="Number of worker processes")
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds a worker sleeps when the queue is empty")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        # Forked workers must open their own database connections
+        connections.close_all()
+        max_jobs = float("inf") if options["burst"] else None
+        # Forked explicitly, spawned workers would import the jobs before Django is set up
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=work, args=(options["poll_interval"], max_jobs), daemon=True)
+                   for _ in range(options["processes"])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {len(workers)} workers"))
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
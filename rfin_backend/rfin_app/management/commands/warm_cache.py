@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from rfin_app.warmup import dashboard_requests, warm_cache
+
+
+class Command(BaseCommand):
+    help = "Precompute and cache the dashboard's responses for every symbol in TickerList and every dashboard index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Number of threads rendering responses")
+        parser.add_argument("--batch-size", type=int, default=100, help="Entries written per pipelined Redis call")
+        parser.add_argument("--timeout", type=int, default=None, help="Seconds the entries stay cached")
+
+    def progress(self, done, total, failed, elapsed):
+        self.stdout.write(f"{done}/{total} responses ({failed} failed), {done / elapsed:,.1f} responses/sec")
+
+    def handle(self, *args, **options):
+        stats = warm_cache(dashboard_requests(), workers=options["workers"], batch_size=options["batch_size"],
+                           timeout=options["timeout"], progress=self.progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {stats['warmed']} responses ({stats['failed']} failed) in {stats['seconds']:.1f}s"))
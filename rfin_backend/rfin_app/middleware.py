@@ -0,0 +1,92 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.http import JsonResponse
+from redis.exceptions import RedisError
+from .local_cache import redis_connection
+from .throttling import get_client_ip, is_trusted_client
+
+# Drop slots older than the stale timeout (leaked by killed workers), then take a slot of the whole API
+# and of the client (KEYS[2], absent for trusted clients) if both have one free. Returns 1 when taken,
+# 2 when the client is over its share, 0 when the API is at capacity
+ACQUIRE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local stale_timeout = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - stale_timeout)
+if #KEYS > 1 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - stale_timeout)
+    if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[5]) then
+        return 2
+    end
+end
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('EXPIRE', key, math.ceil(stale_timeout))
+end
+return 1
+"""
+SLOT_BUSY, SLOT_ACQUIRED, SLOT_OVER_CLIENT_SHARE = 0, 1, 2
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Shed load on the data API before the request reaches the view and the ORM: a client with
+    `API_MAX_CONCURRENT_REQUESTS_PER_CLIENT` requests in flight gets a 429, and everyone gets a 503 once
+    `API_MAX_CONCURRENT_REQUESTS` requests are in flight across all workers, both with Retry-After.
+    Trusted clients, i.e. the project's own frontends, are only held to the API-wide limit.
+    """
+    slots_key = "concurrency: api"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.max_requests = settings.API_MAX_CONCURRENT_REQUESTS
+        self.max_client_requests = settings.API_MAX_CONCURRENT_REQUESTS_PER_CLIENT
+        self.stale_timeout = settings.API_REQUEST_STALE_TIMEOUT
+        self._script = None
+
+    def get_slots_keys(self, request) -> list:
+        if is_trusted_client(request):
+            return [self.slots_key]
+        # Clients are told apart by IP the way the IP token bucket does, the user is not authenticated yet
+        return [self.slots_key, f"{self.slots_key}-{get_client_ip(request)}"]
+
+    def acquire(self, connection, keys: list, token: str) -> int:
+        if self._script is None:
+            self._script = connection.register_script(ACQUIRE_SLOT_SCRIPT)
+        return int(self._script(keys=keys,
+                                args=[time.time(), self.stale_timeout, self.max_requests, token, self.max_client_requests],
+                                client=connection))
+
+    def __call__(self, request):
+        connection = redis_connection()
+        if not request.path.startswith("/api/") or connection is None:
+            return self.get_response(request)
+        token = uuid.uuid4().hex
+        keys = self.get_slots_keys(request)
+        try:
+            acquired = self.acquire(connection, keys, token)
+        except RedisError as err:
+            print(f"Concurrency limit skipped: {err}")
+            return self.get_response(request)
+        if acquired == SLOT_OVER_CLIENT_SHARE:
+            response = JsonResponse({"detail": "Too many concurrent requests, please retry shortly."}, status=429)
+            response["Retry-After"] = "1"
+            return response
+        if acquired == SLOT_BUSY:
+            response = JsonResponse({"detail": "Server is busy, please retry shortly."}, status=503)
+            response["Retry-After"] = "1"
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            try:
+                pipeline = connection.pipeline()
+                for key in keys:
+                    pipeline.zrem(key, token)
+                pipeline.execute()
+            except RedisError:
+                pass
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0020_rename_total_assets_balancesh_assets_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('level', models.CharField(max_length=20)),
+                ('name', models.CharField(max_length=255)),
+                ('value_weighted_return', models.FloatField(blank=True, null=True)),
+                ('equal_weighted_return', models.FloatField(blank=True, null=True)),
+                ('total_volume', models.BigIntegerField(blank=True, null=True)),
+                ('advancers', models.IntegerField(default=0)),
+                ('decliners', models.IntegerField(default=0)),
+                ('unchanged', models.IntegerField(default=0)),
+                ('constituents', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sector_daily',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sectordaily',
+            constraint=models.UniqueConstraint(fields=('level', 'name', 'date'), name='sector_daily_level_name_date_uniq'),
+        ),
+    ]
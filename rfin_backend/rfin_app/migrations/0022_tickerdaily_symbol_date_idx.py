@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0021_sectordaily'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tickerdaily',
+            index=models.Index(fields=['symbol', 'date'], name='ticker_daily_symbol_date_idx'),
+        ),
+    ]
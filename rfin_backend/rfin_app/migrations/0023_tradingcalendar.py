@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0022_tickerdaily_symbol_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradingCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('is_trading_day', models.BooleanField()),
+                ('description', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'db_table': 'trading_calendar',
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+import re
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.db.models.functions import Cast
+
+STATEMENT_MODELS = ["balancesh", "cashflow", "incomestatement"]
+
+
+def year_to_fiscal_year(apps, schema_editor):
+    for model_name in STATEMENT_MODELS:
+        model = apps.get_model("rfin_app", model_name)
+        for row in model.objects.only("id", "year").iterator():
+            match = re.search(r"\d{4}", row.year)
+            if match is None:
+                raise ValueError(f"Cannot parse a fiscal year from {model._meta.db_table}.year={row.year!r} (id={row.id})")
+            row.fiscal_year = int(match.group())
+            row.save(update_fields=["fiscal_year"])
+
+
+def drop_duplicate_fiscal_years(apps, schema_editor):
+    # The unique constraints below fail on duplicates. Rows repeating the same statement values are dropped,
+    # the latest of them is kept. Rows with conflicting values fail the migration, a person picks the right one
+    conflicts = []
+    for model_name in STATEMENT_MODELS:
+        model = apps.get_model("rfin_app", model_name)
+        values = [field.name for field in model._meta.concrete_fields
+                  if field.name not in ("id", "symbol", "year", "fiscal_year")]
+        duplicates = (model.objects.values("symbol", "fiscal_year")
+                      .annotate(latest_id=Max("id"), rows=Count("id")).filter(rows__gt=1))
+        dropped = []
+        for group in list(duplicates):
+            rows = list(model.objects.filter(symbol=group["symbol"], fiscal_year=group["fiscal_year"])
+                        .order_by("id").values_list("id", *values))
+            if len({row[1:] for row in rows}) > 1:
+                conflicts.append(f"{model._meta.db_table} {group['symbol']} {group['fiscal_year']}: "
+                                 f"ids {[row[0] for row in rows]}")
+                continue
+            ids = [row[0] for row in rows if row[0] != group["latest_id"]]
+            model.objects.filter(id__in=ids).delete()
+            dropped += ids
+        if dropped:
+            print(f"\n  Dropped {len(dropped)} duplicate rows of {model._meta.db_table}, ids {dropped}")
+    if conflicts:
+        raise RuntimeError("Statements of the same symbol and fiscal year with different values, "
+                           "delete the wrong rows and migrate again:\n" + "\n".join(conflicts))
+
+
+def fiscal_year_to_year(apps, schema_editor):
+    for model_name in STATEMENT_MODELS:
+        model = apps.get_model("rfin_app", model_name)
+        model.objects.update(year=Cast("fiscal_year", models.CharField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0023_tradingcalendar'),
+    ]
+
+    operations = [
+        *[migrations.AddField(
+            model_name=model_name,
+            name='fiscal_year',
+            field=models.PositiveSmallIntegerField(null=True),
+        ) for model_name in STATEMENT_MODELS],
+        migrations.RunPython(year_to_fiscal_year, fiscal_year_to_year),
+        migrations.RunPython(drop_duplicate_fiscal_years, migrations.RunPython.noop),
+        *[migrations.RemoveField(
+            model_name=model_name,
+            name='year',
+        ) for model_name in STATEMENT_MODELS],
+        *[migrations.AlterField(
+            model_name=model_name,
+            name='fiscal_year',
+            field=models.PositiveSmallIntegerField(),
+        ) for model_name in STATEMENT_MODELS],
+        migrations.AddConstraint(
+            model_name='balancesh',
+            constraint=models.UniqueConstraint(fields=('symbol', 'fiscal_year'), name='balance_sh_symbol_fiscal_year_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='cashflow',
+            constraint=models.UniqueConstraint(fields=('symbol', 'fiscal_year'), name='cash_flow_symbol_fiscal_year_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='incomestatement',
+            constraint=models.UniqueConstraint(fields=('symbol', 'fiscal_year'), name='income_stmt_symbol_fiscal_year_uniq'),
+        ),
+    ]
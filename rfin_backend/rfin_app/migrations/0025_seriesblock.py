@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0024_fiscal_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=20)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('rows', models.IntegerField()),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('payload', models.BinaryField()),
+            ],
+            options={
+                'db_table': 'series_block',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seriesblock',
+            constraint=models.UniqueConstraint(fields=('dataset', 'key', 'year'), name='series_block_dataset_key_year_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0026_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seriesblock',
+            name='checksum',
+            field=models.CharField(default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    # The unique constraint below fails on jobs queued twice by concurrent submissions, the oldest of each is kept
+    Job = apps.get_model("rfin_app", "Job")
+    active = Job.objects.exclude(status="failed")
+    duplicates = active.values("dedupe_key").annotate(jobs=Count("id")).filter(jobs__gt=1)
+    for group in list(duplicates):
+        jobs = list(active.filter(dedupe_key=group["dedupe_key"]).order_by("created_at"))
+        Job.objects.filter(id__in=[job.id for job in jobs[1:]]).update(
+            status="failed", error=f"Duplicate of job {jobs[0].id}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfin_app', '0027_seriesblock_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'failed'), _negated=True), fields=('dedupe_key',), name='job_dedupe_key_uniq'),
+        ),
+    ]
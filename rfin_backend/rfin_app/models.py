@@ -1,3 +1,6 @@
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 # Models
@@ -34,18 +37,24 @@ class TickerDaily(models.Model):
 
     class Meta:
         db_table = "ticker_daily"
+        indexes = [
+            models.Index(fields=["symbol", "date"], name="ticker_daily_symbol_date_idx"),
+        ]
 
 class BalanceSh(models.Model):
-    year = models.CharField(max_length=6)
+    fiscal_year = models.PositiveSmallIntegerField()
     symbol = models.CharField(max_length=10)
     assets = models.BigIntegerField(blank=True, null=True)
     liabilities = models.BigIntegerField(blank=True, null=True)
 
     class Meta:
         db_table = "balance_sh"
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "fiscal_year"], name="balance_sh_symbol_fiscal_year_uniq"),
+        ]
 
 class CashFlow(models.Model):
-    year = models.CharField(max_length=10)
+    fiscal_year = models.PositiveSmallIntegerField()
     symbol = models.CharField(max_length=10)
     operating_cf = models.BigIntegerField(blank=True, null=True)
     investing_cf = models.BigIntegerField(blank=True, null=True)
@@ -53,15 +62,21 @@ class CashFlow(models.Model):
 
     class Meta:
         db_table = "cash_flow"
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "fiscal_year"], name="cash_flow_symbol_fiscal_year_uniq"),
+        ]
 
 class IncomeStatement(models.Model):
-    year = models.CharField(max_length=10)
+    fiscal_year = models.PositiveSmallIntegerField()
     symbol = models.CharField(max_length=10)
     total_revenue = models.BigIntegerField(blank=True, null=True)
     net_income = models.BigIntegerField(blank=True, null=True)
 
     class Meta:
         db_table = "income_stmt"
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "fiscal_year"], name="income_stmt_symbol_fiscal_year_uniq"),
+        ]
 
 class TickerOverview(models.Model):
     symbol = models.CharField(primary_key=True, max_length=10)
@@ -74,4 +89,83 @@ class TickerOverview(models.Model):
     website = models.CharField(max_length=255)
 
     class Meta:
-        db_table = "ticker_overview"
\ No newline at end of file
+        db_table = "ticker_overview"
+
+class SectorDaily(models.Model):
+    date = models.DateField()
+    level = models.CharField(max_length=20)
+    name = models.CharField(max_length=255)
+    value_weighted_return = models.FloatField(blank=True, null=True)
+    equal_weighted_return = models.FloatField(blank=True, null=True)
+    total_volume = models.BigIntegerField(blank=True, null=True)
+    advancers = models.IntegerField(default=0)
+    decliners = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+    constituents = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "sector_daily"
+        constraints = [
+            models.UniqueConstraint(fields=["level", "name", "date"], name="sector_daily_level_name_date_uniq"),
+        ]
+
+class TradingCalendar(models.Model):
+    date = models.DateField(unique=True)
+    is_trading_day = models.BooleanField()
+    description = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        db_table = "trading_calendar"
+
+class SeriesBlock(models.Model):
+    # One year of a symbol's (or index's) daily columns, encoded by rfin_app/series_store.py
+    dataset = models.CharField(max_length=20)
+    key = models.CharField(max_length=20)
+    year = models.PositiveSmallIntegerField()
+    rows = models.IntegerField()
+    first_date = models.DateField()
+    last_date = models.DateField()
+    payload = models.BinaryField()
+    # Fingerprint of the table rows the block was built from, a mismatch makes the sync rebuild the block
+    checksum = models.CharField(max_length=40, default="")
+
+    class Meta:
+        db_table = "series_block"
+        constraints = [
+            models.UniqueConstraint(fields=["dataset", "key", "year"], name="series_block_dataset_key_year_uniq"),
+        ]
+
+class Job(models.Model):
+    # Long-running analytics queued by /api/jobs and run by `manage.py run_workers`
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (SUCCEEDED, "Succeeded"), (FAILED, "Failed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(encoder=DjangoJSONEncoder)
+    # Hash of the kind, parameters, and data version, identical jobs on the same data share a row
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(encoder=DjangoJSONEncoder, blank=True, null=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Last beat of the worker running the job, see rfin_app/jobs.py
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "job"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="job_status_created_at_idx"),
+        ]
+        constraints = [
+            # Concurrent submissions of the same job cannot both queue it, failed jobs may be resubmitted
+            models.UniqueConstraint(fields=["dedupe_key"], condition=~models.Q(status="failed"),
+                                    name="job_dedupe_key_uniq"),
+        ]
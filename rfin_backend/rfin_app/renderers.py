@@ -0,0 +1,63 @@
+import pyarrow as pa
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .snapshots import ARROW_TYPES
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Columns are compressed inside the IPC stream, readers decompress them transparently
+ARROW_WRITE_OPTIONS = pa.ipc.IpcWriteOptions(compression="zstd")
+
+
+def _typed_array(values: list, field) -> pa.Array:
+    # Rendered rows carry ISO dates and, with COERCE_DECIMAL_TO_STRING, decimal strings
+    kind = field.get_internal_type()
+    if kind == "DecimalField":
+        return pa.array(values).cast(pa.float64())
+    if kind == "DateField":
+        return pa.array(values, type=pa.string()).cast(pa.date32())
+    if kind in ARROW_TYPES:
+        return pa.array(values, type=ARROW_TYPES[kind])
+    return pa.array(values)
+
+
+def rows_to_ipc(rows: list, serializer_class, fields: list) -> bytes:
+    """
+    Encode rendered rows as an Arrow IPC stream, typed by the serializer's model fields,
+    e.g. date32 dates, int64 volumes, and float64 decimals.
+
+    Arg(s):
+        - rows (list): Rows rendered by `serialize_values` or `read_series_rows`
+        - serializer_class (ModelSerializer): Serializer whose fields define the columns
+        - fields (list): Serializer field names, in column order
+    Return(s):
+        the IPC stream bytes
+    """
+    model = serializer_class.Meta.model
+    serializer_fields = serializer_class().fields
+    arrays = [_typed_array([row[name] for row in rows], model._meta.get_field(serializer_fields[name].source))
+              for name in fields]
+    table = pa.Table.from_arrays(arrays, names=fields)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=ARROW_WRITE_OPTIONS) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Serve list endpoints as an Arrow IPC stream, selected with `?format=arrow`
+    or `Accept: application/vnd.apache.arrow.stream`.
+    """
+    media_type = ARROW_STREAM_MEDIA_TYPE
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        # Error details are not tabular, they are rendered as JSON
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return JSONRenderer().render(data, renderer_context=renderer_context)
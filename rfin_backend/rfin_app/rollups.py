@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import Max, Min
+
+from .models import SectorDaily, TickerDaily, TickerOverview
+
+# Classification levels of TickerOverview that are rolled up into sector_daily
+ROLLUP_LEVELS = ["sector", "sub_sector"]
+# Calendar days read before the requested range so the first day has a previous close
+LOOKBACK_DAYS = 14
+
+
+def _load_prices(start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    Load daily close and volume of every ticker within date range, plus a short lookback window.
+
+    Arg(s):
+        - start_date (date): The first date to materialize
+        - end_date (date): The last date to materialize
+    Return(s):
+        a Pandas DataFrame with date, symbol, close, and volume columns sorted by symbol and date
+    """
+    rows = TickerDaily.objects.filter(
+        date__range=[start_date - timedelta(days=LOOKBACK_DAYS), end_date]
+    ).values_list("date", "symbol", "close", "volume")
+    df = pd.DataFrame.from_records(rows.iterator(chunk_size=10000), columns=["date", "symbol", "close", "volume"])
+    return df.sort_values(["symbol", "date"], ignore_index=True)
+
+
+def _compute_rollups(prices: pd.DataFrame, sectors: pd.DataFrame, start_date: date) -> list:
+    """
+    Aggregate per-ticker daily returns into per-sector and per-sub-sector daily rows.
+
+    Returns are weighted by the previous day's traded value (close x volume), since no shares
+    outstanding are stored to derive a true market capitalization.
+
+    Arg(s):
+        - prices (DataFrame): Output of `_load_prices`
+        - sectors (DataFrame): symbol, sector, and sub_sector of every ticker
+        - start_date (date): Rows before this date only serve as the lookback window
+    Return(s):
+        a Python list of unsaved SectorDaily objects
+    """
+    if prices.empty:
+        return []
+    close = prices["close"].astype("float64")
+    volume = prices["volume"].astype("float64")
+    prev_close = close.groupby(prices["symbol"], sort=False).shift()
+    prev_volume = volume.groupby(prices["symbol"], sort=False).shift()
+    df = prices.assign(ret=close / prev_close - 1, weight=prev_close * prev_volume)
+    df = df[df["date"] >= start_date].merge(sectors, on="symbol", how="inner")
+    df["ret"] = df["ret"].replace([np.inf, -np.inf], np.nan)
+    df["weight"] = df["weight"].where(df["ret"].notna() & (df["weight"] > 0), 0).fillna(0)
+    df["weighted_ret"] = df["ret"].fillna(0) * df["weight"]
+    df["advancer"] = df["ret"] > 0
+    df["decliner"] = df["ret"] < 0
+    df["unchanged"] = df["ret"] == 0
+
+    objs = []
+    for level in ROLLUP_LEVELS:
+        agg = df.groupby(["date", level], sort=False).agg(
+            equal_weighted_return=("ret", "mean"),
+            weighted_ret=("weighted_ret", "sum"),
+            weight=("weight", "sum"),
+            total_volume=("volume", "sum"),
+            advancers=("advancer", "sum"),
+            decliners=("decliner", "sum"),
+            unchanged=("unchanged", "sum"),
+            constituents=("symbol", "count"),
+        ).reset_index()
+        agg["value_weighted_return"] = (agg["weighted_ret"] / agg["weight"]).where(agg["weight"] > 0)
+        for row in agg.itertuples(index=False):
+            objs.append(SectorDaily(
+                date=row.date,
+                level=level,
+                name=getattr(row, level),
+                value_weighted_return=None if pd.isna(row.value_weighted_return) else float(row.value_weighted_return),
+                equal_weighted_return=None if pd.isna(row.equal_weighted_return) else float(row.equal_weighted_return),
+                total_volume=int(row.total_volume),
+                advancers=int(row.advancers),
+                decliners=int(row.decliners),
+                unchanged=int(row.unchanged),
+                constituents=int(row.constituents),
+            ))
+    return objs
+
+
+def materialize_sector_daily(start_date: date = None, end_date: date = None, incremental: bool = False, chunk_days: int = 366) -> int:
+    """
+    Materialize sector and sub-sector daily rollups into the sector_daily table.
+
+    Arg(s):
+        - start_date (date): The first date to materialize, default to the first date in ticker_daily
+        - end_date (date): The last date to materialize, default to the last date in ticker_daily
+        - incremental (bool): Only materialize dates after the last one already in sector_daily
+        - chunk_days (int): Number of calendar days processed per batch to bound memory
+    Return(s):
+        a Python integer of the number of rows written
+    """
+    bounds = TickerDaily.objects.aggregate(first=Min("date"), last=Max("date"))
+    if bounds["first"] is None:
+        return 0
+    start_date = start_date or bounds["first"]
+    end_date = end_date or bounds["last"]
+    if incremental:
+        last_materialized = SectorDaily.objects.aggregate(last=Max("date"))["last"]
+        if last_materialized is not None:
+            start_date = max(start_date, last_materialized + timedelta(days=1))
+
+    sectors = pd.DataFrame.from_records(
+        TickerOverview.objects.values_list("symbol", *ROLLUP_LEVELS),
+        columns=["symbol", *ROLLUP_LEVELS],
+    )
+    written = 0
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        objs = _compute_rollups(_load_prices(chunk_start, chunk_end), sectors, chunk_start)
+        SectorDaily.objects.bulk_create(
+            objs,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["level", "name", "date"],
+            update_fields=["value_weighted_return", "equal_weighted_return", "total_volume",
+                           "advancers", "decliners", "unchanged", "constituents"],
+        )
+        written += len(objs)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
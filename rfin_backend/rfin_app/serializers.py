@@ -2,6 +2,42 @@ from rest_framework import serializers
 from .models import *
 from django.contrib.auth.models import User
 
+# Serializer fields whose to_representation returns the database value unchanged
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.FloatField, serializers.CharField, serializers.BooleanField)
+
+def serialize_values(queryset, serializer_class, fields: list) -> list:
+    """
+    Render a queryset the way `serializer_class(queryset, many=True).data` does, but straight from
+    `values_list()` rows instead of model instances.
+
+    Arg(s):
+        - queryset (QuerySet): The queryset to render
+        - serializer_class (ModelSerializer): Serializer whose fields define the representation
+        - fields (list): Serializer field names to render
+    Return(s):
+        a Python list of dictionary, one per row
+    """
+    serializer_fields = serializer_class().fields
+    sources = [serializer_fields[name].source for name in fields]
+    converters = []
+    for i, name in enumerate(fields):
+        field = serializer_fields[name]
+        if isinstance(field, serializers.DateField) and not isinstance(field, serializers.DateTimeField):
+            converters.append((i, lambda value: value.isoformat()))
+        elif not isinstance(field, PASSTHROUGH_FIELDS):
+            converters.append((i, field.to_representation))
+    rows = queryset.values_list(*sources)
+    if not converters:
+        return [dict(zip(fields, row)) for row in rows]
+    result = []
+    for row in rows:
+        row = list(row)
+        for i, convert in converters:
+            if row[i] is not None:
+                row[i] = convert(row[i])
+        result.append(dict(zip(fields, row)))
+    return result
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta(object):
         model = User 
@@ -10,39 +46,54 @@ class UserSerializer(serializers.ModelSerializer):
 class IDXTotalMarketCapSerializer(serializers.ModelSerializer):
     class Meta:
         model = IDXTotalMarketCap
-        fields = '__all__'
+        exclude = ['id']
 
 class IndexDailySerializer(serializers.ModelSerializer):
     class Meta:
         model = IndexDaily
-        fields = '__all__'
+        exclude = ['id']
 
 class TickerListSerializer(serializers.ModelSerializer):
     class Meta:
         model = TickerList
-        fields = '__all__'
+        exclude = ['id']
 
 class TickerDailySerializer(serializers.ModelSerializer):
     class Meta:
         model = TickerDaily
-        fields = '__all__'
+        exclude = ['id']
 
 class BalanceSheetSerializer(serializers.ModelSerializer):
     class Meta:
         model = BalanceSh
-        fields = '__all__'
+        exclude = ['id']
 
 class CashFlowSerializer(serializers.ModelSerializer):
     class Meta:
         model = CashFlow
-        fields = '__all__'
+        exclude = ['id']
 
 class IncomeStatementSerializer(serializers.ModelSerializer):
     class Meta:
         model = IncomeStatement
-        fields = '__all__'
+        exclude = ['id']
 
 class TickerOverviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = TickerOverview
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class SectorDailySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SectorDaily
+        exclude = ['id']
+
+class TradingCalendarSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TradingCalendar
+        fields = ['date', 'is_trading_day', 'description']
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        exclude = ['dedupe_key', 'result', 'worker']
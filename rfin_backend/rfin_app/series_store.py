@@ -0,0 +1,321 @@
+import hashlib
+import struct
+import zlib
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from itertools import groupby
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import ExtractYear
+from rest_framework.settings import api_settings
+
+from .local_cache import get_data_version
+from .models import IndexDaily, SeriesBlock, TickerDaily
+
+# Datasets kept as per (key, year) blocks: model, key field, and encoded columns with their integer dtype.
+# Decimal columns are stored as integers scaled by 10 ** decimal_places, e.g. index prices in cents.
+SERIES_DATASETS = {
+    "ticker_daily": (TickerDaily, "symbol", [("open", "<i4"), ("high", "<i4"), ("low", "<i4"), ("close", "<i4"),
+                                             ("volume", "<i8")]),
+    "index_daily": (IndexDaily, "index_code", [("price", "<i8")]),
+}
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<BI")
+# How the rows of a downsampling bucket are aggregated per column, e.g. into the OHLCV bar of the bucket
+BUCKET_AGGREGATES = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum", "price": "last"}
+# Keys whose changed years are rebuilt by one table scan
+SYNC_KEYS_PER_QUERY = 500
+# Data version of a dataset its blocks were last synced at, blocks are trusted as long as it is current
+SYNCED_VERSION_KEY = "series-synced-version: {dataset}"
+
+
+def _decimal_places(model, column: str) -> int:
+    field = model._meta.get_field(column)
+    return field.decimal_places if field.get_internal_type() == "DecimalField" else 0
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    return np.diff(values, prepend=values.dtype.type(0))
+
+
+def _encode_column(values: list, dtype: str, scale: int) -> tuple:
+    mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    encoded = np.fromiter((0 if value is None else int(value * scale) for value in values),
+                          dtype=dtype, count=len(values))
+    return encoded, mask
+
+
+def encode_block(dataset: str, dates: list, columns: dict) -> bytes:
+    """
+    Encode one block as delta-encoded integer columns with null bitmaps, compressed with zlib.
+
+    Arg(s):
+        - dataset (str): One of SERIES_DATASETS
+        - dates (list): Ascending dates of the rows
+        - columns (dict): Column name to a list of values, None for nulls
+    Return(s):
+        the compressed payload bytes
+    """
+    model, _, spec = SERIES_DATASETS[dataset]
+    parts = [HEADER.pack(FORMAT_VERSION, len(dates)),
+             _delta(np.array(dates, dtype="datetime64[D]").astype("<i4")).tobytes()]
+    for name, dtype in spec:
+        encoded, mask = _encode_column(columns[name], dtype, 10 ** _decimal_places(model, name))
+        parts += [np.packbits(mask).tobytes(), _delta(encoded).tobytes()]
+    return zlib.compress(b"".join(parts))
+
+
+def decode_block(dataset: str, payload: bytes) -> tuple:
+    """
+    Decode a block encoded by `encode_block`.
+
+    Return(s):
+        a Python tuple of the datetime64[D] dates and a dictionary of column name to (values, null mask) arrays
+    """
+    _, _, spec = SERIES_DATASETS[dataset]
+    buffer = zlib.decompress(payload)
+    version, rows = HEADER.unpack_from(buffer)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported series block format {version}")
+    offset = HEADER.size
+    dates = np.cumsum(np.frombuffer(buffer, dtype="<i4", count=rows, offset=offset), dtype="<i4").astype("datetime64[D]")
+    offset += rows * 4
+    bitmap_size = (rows + 7) // 8
+    columns = {}
+    for name, dtype in spec:
+        mask = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8, count=bitmap_size, offset=offset), count=rows)
+        offset += bitmap_size
+        values = np.cumsum(np.frombuffer(buffer, dtype=dtype, count=rows, offset=offset), dtype=dtype)
+        offset += rows * np.dtype(dtype).itemsize
+        columns[name] = (values, mask.astype(bool))
+    return dates, columns
+
+
+def _render_rows(dataset: str, key: str, dates: np.ndarray, columns: dict, fields: list) -> list:
+    model, key_field, spec = SERIES_DATASETS[dataset]
+    rendered = {"date": np.datetime_as_string(dates, unit="D").tolist(), key_field: [key] * len(dates)}
+    for name, _ in spec:
+        values, mask = columns[name]
+        places = _decimal_places(model, name)
+        if places:
+            values = values / 10 ** places
+            values = [f"{value:.{places}f}" for value in values.tolist()] \
+                if api_settings.COERCE_DECIMAL_TO_STRING else values.tolist()
+        else:
+            values = values.tolist()
+        if mask.any():
+            values = [None if null else value for value, null in zip(values, mask.tolist())]
+        rendered[name] = values
+    return [dict(zip(fields, row)) for row in zip(*(rendered[field] for field in fields))]
+
+
+def _read_blocks(dataset: str, key: str, since_year: int = None):
+    # None when the key has no blocks, or when they are behind its table rows, e.g. ingested since the last sync
+    model, key_field, spec = SERIES_DATASETS[dataset]
+    blocks = SeriesBlock.objects.filter(dataset=dataset, key=key)
+    if since_year:
+        blocks = blocks.filter(year__gte=since_year)
+    blocks = list(blocks.order_by("year").values_list("payload", "rows", "last_date"))
+    if not blocks:
+        return None
+    # Only a dataset re-ingested since the sync is checked against its table
+    if cache.get(SYNCED_VERSION_KEY.format(dataset=dataset)) != get_data_version(dataset):
+        table = model.objects.filter(**{key_field: key})
+        if since_year:
+            table = table.filter(date__gte=date(since_year, 1, 1))
+        latest = table.aggregate(rows=Count("date"), last_date=Max("date"))
+        if latest["rows"] != sum(rows for _, rows, _ in blocks) or latest["last_date"] != blocks[-1][2]:
+            print(f"Stale series blocks of {dataset} {key}, reading the table")
+            return None
+    decoded = [decode_block(dataset, bytes(payload)) for payload, _, _ in blocks]
+    dates = np.concatenate([block[0] for block in decoded])
+    columns = {name: (np.concatenate([block[1][name][0] for block in decoded]),
+                      np.concatenate([block[1][name][1] for block in decoded])) for name, _ in spec}
+    return dates, columns
+
+
+def read_series_rows(dataset: str, key: str, fields: list):
+    """
+    Render the full history of a symbol or index from its blocks, the way the dataset's serializer does.
+
+    Arg(s):
+        - dataset (str): One of SERIES_DATASETS
+        - key (str): Symbol or index code, e.g. BBRI.JK or IHSG
+        - fields (list): Serializer field names to render
+    Return(s):
+        a Python list of dictionary ordered by date, or None when the key has no blocks or they are stale
+    """
+    blocks = _read_blocks(dataset, key)
+    if blocks is None:
+        return None
+    return _render_rows(dataset, key, *blocks, fields)
+
+
+def downsample_columns(dataset: str, dates: np.ndarray, columns: dict, points: int) -> tuple:
+    """
+    Downsample a series to `points` buckets of consecutive rows, aggregated per BUCKET_AGGREGATES
+    and dated by their first row, e.g. weekly-like OHLCV bars out of daily ones.
+
+    Arg(s):
+        - dataset (str): One of SERIES_DATASETS
+        - dates (ndarray): Ascending datetime64[D] dates
+        - columns (dict): Column name to (values, null mask) arrays, as decoded by `decode_block`
+        - points (int): Maximum number of rows returned
+    Return(s):
+        a Python tuple of the bucket dates and their columns, unchanged when there are no more rows than points
+    """
+    if len(dates) <= points:
+        return dates, columns
+    _, _, spec = SERIES_DATASETS[dataset]
+    starts = np.arange(points) * len(dates) // points
+    ends = np.append(starts[1:], len(dates)) - 1
+    result = {}
+    for name, dtype in spec:
+        values, mask = columns[name]
+        values = np.where(mask, np.nan, values.astype(float))
+        how = BUCKET_AGGREGATES[name]
+        if how == "first":
+            values = values[starts]
+        elif how == "last":
+            values = values[ends]
+        elif how == "max":
+            values = np.fmax.reduceat(values, starts)
+        elif how == "min":
+            values = np.fmin.reduceat(values, starts)
+        else:
+            values = np.add.reduceat(np.nan_to_num(values), starts)
+        result[name] = (np.nan_to_num(values).astype(dtype), np.isnan(values))
+    return dates[starts], result
+
+
+def read_series_window(dataset: str, key: str, fields: list, start_date: date = None, points: int = None) -> list:
+    """
+    Render a symbol or index from `start_date` onwards, downsampled to at most `points` rows.
+    Keys without blocks, or with stale ones, are read from the table.
+
+    Arg(s):
+        - dataset (str): One of SERIES_DATASETS
+        - key (str): Symbol or index code, e.g. BBRI.JK or IHSG
+        - fields (list): Serializer field names to render
+        - start_date (date): First date of the window, default to the full history
+        - points (int): Maximum number of rows, default to every row
+    Return(s):
+        a Python list of dictionary ordered by date
+    """
+    model, key_field, spec = SERIES_DATASETS[dataset]
+    blocks = _read_blocks(dataset, key, start_date.year if start_date else None)
+    if blocks is None:
+        queryset = model.objects.filter(**{key_field: key}).order_by("date")
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        rows = list(queryset.values_list("date", *[name for name, _ in spec]))
+        dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+        blocks = dates, {name: _encode_column([row[i + 1] for row in rows], dtype, 10 ** _decimal_places(model, name))
+                         for i, (name, dtype) in enumerate(spec)}
+    dates, columns = blocks
+    if start_date:
+        first = np.searchsorted(dates, np.datetime64(start_date, "D"))
+        dates, columns = dates[first:], {name: (values[first:], mask[first:]) for name, (values, mask) in columns.items()}
+    if points:
+        dates, columns = downsample_columns(dataset, dates, columns, points)
+    return _render_rows(dataset, key, dates, columns, fields)
+
+
+def _checksum(dataset: str, rows: int, first_date: date, last_date: date, counts: list, sums: list) -> str:
+    model, _, spec = SERIES_DATASETS[dataset]
+    # Sums are compared as integers in the block's scale, whatever numeric type the database returns
+    sums = [0 if total is None else int(round(Decimal(str(total)) * 10 ** _decimal_places(model, name)))
+            for total, (name, _) in zip(sums, spec)]
+    return hashlib.sha1(f"{rows}|{first_date}|{last_date}|{counts}|{sums}".encode()).hexdigest()
+
+
+def _table_checksums(dataset: str) -> dict:
+    """
+    Fingerprint every (key, year) of a dataset's table with one grouped query: its row count, first and
+    last date, and the non-null count and sum of each column, so appended, deleted, and corrected rows show up.
+    """
+    model, key_field, spec = SERIES_DATASETS[dataset]
+    aggregates = {"rows": Count("date"), "first_date": Min("date"), "last_date": Max("date")}
+    for name, _ in spec:
+        aggregates[f"count_{name}"] = Count(name)
+        aggregates[f"sum_{name}"] = Sum(name)
+    groups = (model.objects.annotate(year=ExtractYear("date")).values(key_field, "year")
+              .annotate(**aggregates).order_by())
+    return {(group[key_field], group["year"]): _checksum(dataset, group["rows"], group["first_date"], group["last_date"],
+                                                         [group[f"count_{name}"] for name, _ in spec],
+                                                         [group[f"sum_{name}"] for name, _ in spec])
+            for group in groups}
+
+
+def sync_series_blocks(dataset: str, full: bool = False, batch_size: int = 500) -> int:
+    """
+    Rebuild the blocks of a dataset whose table rows changed since they were built, i.e. whose fingerprint
+    differs from the table's, and drop the blocks of years without rows left. Corrections of earlier years
+    are picked up as well as appended days. The dataset's data version is recorded once synced, so the
+    blocks are read without checking them against the table until the dataset is bumped again.
+
+    Arg(s):
+        - dataset (str): One of SERIES_DATASETS
+        - full (bool): Rebuild every block, changed or not
+        - batch_size (int): Number of blocks upserted per query
+    Return(s):
+        a Python integer of the number of written blocks
+    """
+    model, key_field, spec = SERIES_DATASETS[dataset]
+    # Read before the scan, rows ingested and bumped meanwhile leave the blocks checked until the next sync
+    version = get_data_version(dataset)
+    checksums = _table_checksums(dataset)
+    stored = {(key, year): checksum for key, year, checksum in
+              SeriesBlock.objects.filter(dataset=dataset).values_list("key", "year", "checksum")}
+    for key, year in set(stored) - set(checksums):
+        SeriesBlock.objects.filter(dataset=dataset, key=key, year=year).delete()
+    changed = {group for group, checksum in checksums.items() if full or stored.get(group) != checksum}
+
+    # Each key is scanned from its first changed year, keys sharing that year are scanned together
+    first_changed_year = {}
+    for key, year in changed:
+        first_changed_year[key] = min(year, first_changed_year.get(key, year))
+    keys_since = defaultdict(list)
+    for key, year in first_changed_year.items():
+        keys_since[year].append(key)
+
+    written = 0
+    objs = []
+    for since_year, keys in sorted(keys_since.items()):
+        for i in range(0, len(keys), SYNC_KEYS_PER_QUERY):
+            queryset = (model.objects.filter(**{f"{key_field}__in": keys[i:i + SYNC_KEYS_PER_QUERY]},
+                                             date__gte=date(since_year, 1, 1))
+                        .order_by(key_field, "date"))
+            rows = queryset.values_list(key_field, "date", *[name for name, _ in spec]).iterator(chunk_size=10000)
+            for (key, year), group in groupby(rows, key=lambda row: (row[0], row[1].year)):
+                if (key, year) not in changed:
+                    continue
+                group = list(group)
+                dates = [row[1] for row in group]
+                columns = {name: [row[i + 2] for row in group] for i, (name, _) in enumerate(spec)}
+                checksum = _checksum(dataset, len(group), dates[0], dates[-1],
+                                     [sum(value is not None for value in columns[name]) for name, _ in spec],
+                                     [sum(value for value in columns[name] if value is not None) for name, _ in spec])
+                objs.append(SeriesBlock(dataset=dataset, key=key, year=year, rows=len(group), first_date=dates[0],
+                                        last_date=dates[-1], payload=encode_block(dataset, dates, columns),
+                                        checksum=checksum))
+                if len(objs) >= batch_size:
+                    written += _upsert(objs)
+                    objs = []
+    written += _upsert(objs)
+    cache.set(SYNCED_VERSION_KEY.format(dataset=dataset), version, None)
+    return written
+
+
+def _upsert(objs: list) -> int:
+    SeriesBlock.objects.bulk_create(
+        objs,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["dataset", "key", "year"],
+        update_fields=["rows", "first_date", "last_date", "payload", "checksum"],
+    )
+    return len(objs)
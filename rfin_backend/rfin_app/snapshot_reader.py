@@ -0,0 +1,86 @@
+"""
+Read the Parquet snapshots written by `manage.py export_parquet` without Django or the database.
+
+    from rfin_app.snapshot_reader import read_frame, read_columns
+    df = read_frame("ticker_daily", symbols=["BBRI.JK"], start_date="2020-01-01")
+    columns = read_columns("ticker_daily", ["close", "volume"], symbols=["BBRI.JK"])
+"""
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Same default as SNAPSHOT_DIR in the Django settings
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / "snapshots"
+
+
+def snapshot_root(root: str = None) -> Path:
+    """
+    Get the directory of the current snapshot, from `root`, the SNAPSHOT_DIR environment variable, or the default.
+    """
+    return Path(root or os.environ.get("SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR) / "current"
+
+
+def read_manifest(root: str = None) -> dict:
+    return json.loads((snapshot_root(root) / "_manifest.json").read_text())
+
+
+def read_table(table: str, symbols: list = None, start_date: str = None, end_date: str = None,
+               columns: list = None, root: str = None) -> pa.Table:
+    """
+    Read a snapshot table memory-mapped, pruning partitions by symbol (or index code) and year.
+
+    Arg(s):
+        - table (str): Table name, e.g. ticker_daily, index_daily, idx_total_market_cap, balance_sh
+        - symbols (list): Symbols, or index codes for index_daily, to read, default to all
+        - start_date (str): The start date of requested date range (YYYY-MM-DD)
+        - end_date (str): The end date of requested date range (YYYY-MM-DD)
+        - columns (list): Columns to read, default to all
+        - root (str): Snapshots directory
+    Return(s):
+        a PyArrow Table of the memory-mapped chunks as read, one or more per column, nothing is copied
+    """
+    filters = []
+    if symbols:
+        filters.append(("index_code" if table == "index_daily" else "symbol", "in", list(symbols)))
+    if start_date:
+        filters += [("year", ">=", int(start_date[:4])), ("date", ">=", pd.Timestamp(start_date).date())]
+    if end_date:
+        filters += [("year", "<=", int(end_date[:4])), ("date", "<=", pd.Timestamp(end_date).date())]
+    result = pq.read_table(snapshot_root(root) / table, columns=columns, filters=filters or None,
+                           memory_map=True, partitioning="hive")
+    return result
+
+
+def read_frame(table: str, **kwargs) -> pd.DataFrame:
+    """
+    Read a snapshot table into a Pandas DataFrame, see `read_table` for the arguments.
+
+    Numeric columns without nulls read as a single chunk are handed over from Arrow buffers without a further copy.
+    """
+    return read_table(table, **kwargs).to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+
+
+def read_columns(table: str, columns: list, **kwargs) -> dict:
+    """
+    Read snapshot columns as NumPy arrays, see `read_table` for the arguments.
+
+    Return(s):
+        a Python dictionary of column name to NumPy array, a zero-copy view of the Arrow buffer when the column
+        is numeric without nulls and read as a single chunk, e.g. one partition (dates are converted to datetime64[D])
+    """
+    result = read_table(table, columns=columns, **kwargs)
+    arrays = {}
+    for name in columns:
+        chunks = result.column(name).chunks
+        if len(chunks) == 1:
+            column = chunks[0]
+        else:
+            # A NumPy array is contiguous, several chunks are concatenated into one
+            column = pa.concat_arrays(chunks) if chunks else pa.array([], result.schema.field(name).type)
+        zero_copy = column.null_count == 0 and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type))
+        arrays[name] = column.to_numpy(zero_copy_only=zero_copy)
+    return arrays
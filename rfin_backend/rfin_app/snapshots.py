@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from django.conf import settings
+
+from .models import BalanceSh, CashFlow, IDXTotalMarketCap, IncomeStatement, IndexDaily, TickerDaily, TickerOverview
+
+# Exported tables: model, exported columns, and hive partition columns ("year" is derived from date)
+SNAPSHOT_TABLES = {
+    "ticker_daily": (TickerDaily, ["date", "symbol", "open", "high", "low", "close", "volume"], ["symbol", "year"]),
+    "index_daily": (IndexDaily, ["date", "index_code", "price"], ["index_code", "year"]),
+    "idx_total_market_cap": (IDXTotalMarketCap, ["date", "idx_total_market_cap"], ["year"]),
+    "balance_sh": (BalanceSh, ["symbol", "fiscal_year", "assets", "liabilities"], ["symbol"]),
+    "cash_flow": (CashFlow, ["symbol", "fiscal_year", "operating_cf", "investing_cf", "financing_cf"], ["symbol"]),
+    "income_stmt": (IncomeStatement, ["symbol", "fiscal_year", "total_revenue", "net_income"], ["symbol"]),
+    "ticker_overview": (TickerOverview, ["symbol", "company_name", "sector", "sub_sector", "industry",
+                                         "sub_industry", "listing_date", "website"], []),
+}
+# Arrow types of Django field types, decimals are exported as float64 for zero-copy NumPy reads
+ARROW_TYPES = {
+    "DateField": pa.date32(),
+    "IntegerField": pa.int32(),
+    "BigIntegerField": pa.int64(),
+    "PositiveSmallIntegerField": pa.int16(),
+    "FloatField": pa.float64(),
+    "CharField": pa.string(),
+}
+CHUNK_ROWS = 500000
+
+
+def _column_array(values, field) -> pa.Array:
+    if field.get_internal_type() == "DecimalField":
+        return pa.array(values, type=pa.decimal128(field.max_digits, field.decimal_places)).cast(pa.float64())
+    return pa.array(values, type=ARROW_TYPES[field.get_internal_type()])
+
+
+def export_table(name: str, destination: Path) -> int:
+    """
+    Export a table to hive-partitioned Parquet files, streaming it in chunks to bound memory.
+
+    Arg(s):
+        - name (str): One of SNAPSHOT_TABLES
+        - destination (Path): Snapshot directory, the table is written to its `name` subdirectory
+    Return(s):
+        a Python integer of the number of exported rows
+    """
+    model, columns, partition_by = SNAPSHOT_TABLES[name]
+    fields = [model._meta.get_field(column) for column in columns]
+    ordering = [column for column in partition_by if column != "year"] + [c for c in ("date", "fiscal_year") if c in columns]
+    rows = model.objects.order_by(*ordering).values_list(*columns).iterator(chunk_size=10000)
+    # An empty table still gets its directory, so later exports can link it into their snapshot
+    (destination / name).mkdir(parents=True, exist_ok=True)
+    exported = 0
+    part = 0
+    while True:
+        chunk = list(islice(rows, CHUNK_ROWS))
+        if not chunk:
+            break
+        table = pa.Table.from_arrays([_column_array(values, field) for values, field in zip(zip(*chunk), fields)],
+                                     names=columns)
+        if "year" in partition_by:
+            table = table.append_column("year", pc.year(table["date"]).cast(pa.int16()))
+        ds.write_dataset(
+            table,
+            destination / name,
+            format="parquet",
+            partitioning=partition_by or None,
+            partitioning_flavor="hive" if partition_by else None,
+            basename_template=f"part-{part}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_partitions=1_000_000,
+        )
+        exported += len(chunk)
+        part += 1
+    return exported
+
+
+def _new_snapshot_dir(root: Path, exported_at: datetime) -> Path:
+    # Names sort by export time, a suffix tells apart exports started in the same microsecond
+    root.mkdir(parents=True, exist_ok=True)
+    name = exported_at.strftime("%Y%m%dT%H%M%S.%f")
+    suffix = 0
+    while True:
+        destination = root / (f"{name}-{suffix}" if suffix else name)
+        try:
+            destination.mkdir()
+            return destination
+        except FileExistsError:
+            suffix += 1
+
+
+def export_snapshot(tables: list = None, root: Path = None, keep: int = 2) -> dict:
+    """
+    Export tables into a new timestamped snapshot, then atomically point the `current` symlink at it.
+    Tables that are not exported are hard-linked from the current snapshot, so a snapshot is always complete.
+
+    Arg(s):
+        - tables (list): Table names to export, default to every table in SNAPSHOT_TABLES
+        - root (Path): Snapshots directory, default to `SNAPSHOT_DIR`
+        - keep (int): Number of most recent snapshots kept on disk, at least 1
+    Return(s):
+        a Python dictionary of the snapshot manifest, i.e. its path, export time, and rows per table
+    """
+    if keep < 1:
+        raise ValueError(f"keep must be at least 1, the current snapshot is always kept, got {keep}")
+    root = Path(root or settings.SNAPSHOT_DIR)
+    exported_at = datetime.now()
+    destination = _new_snapshot_dir(root, exported_at)
+    manifest = {"exported_at": exported_at.isoformat(), "tables": {}}
+    for name in tables or list(SNAPSHOT_TABLES):
+        manifest["tables"][name] = export_table(name, destination)
+
+    link = root / "current"
+    if link.exists():
+        previous = json.loads((link / "_manifest.json").read_text())
+        for name, rows in previous["tables"].items():
+            if name in manifest["tables"]:
+                continue
+            if (link / name).is_dir():
+                shutil.copytree(link / name, destination / name, copy_function=os.link)
+            else:
+                # Empty in a snapshot exported before empty tables got a directory
+                (destination / name).mkdir()
+            manifest["tables"][name] = rows
+    (destination / "_manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    temporary_link = root / f".current-{os.getpid()}"
+    temporary_link.symlink_to(destination.name)
+    os.replace(temporary_link, link)
+    snapshots = sorted(p for p in root.iterdir() if p.is_dir() and not p.is_symlink())
+    for stale in snapshots[:-keep]:
+        shutil.rmtree(stale)
+    manifest["path"] = str(destination)
+    return manifest
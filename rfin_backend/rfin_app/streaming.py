@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Max
+from redis.exceptions import RedisError
+
+from .local_cache import redis_connection
+from .models import TickerDaily
+
+# Redis pub/sub channel carrying newly ingested ticker_daily rows
+TICKER_DAILY_CHANNEL = "rfin:ticker-daily"
+# Subscribers to every symbol
+ALL_SYMBOLS = "*"
+STREAM_BROKERS = ("redis", "memory")
+# Highest ticker_daily id already published, rows above it are the newly ingested ones
+PUBLISHED_ID_KEY = "stream: ticker-daily-published-id"
+# Rows per published message
+PUBLISH_BATCH_ROWS = 1000
+
+
+class StreamHub:
+    """
+    Fan out newly ingested rows to the SSE clients of a worker process through a single broker subscription.
+
+    With the "redis" broker one pub/sub subscriber task per worker feeds every client queue,
+    with the "memory" broker (tests) `publish_rows` dispatches to the clients of the publishing process only.
+    """
+    def __init__(self, broker: str = "redis", queue_size: int = 100):
+        if broker not in STREAM_BROKERS:
+            raise ImproperlyConfigured(f"Unknown stream broker {broker!r}, must be one of {list(STREAM_BROKERS)}")
+        self.broker = broker
+        self.queue_size = queue_size
+        self._queues = defaultdict(set)
+        self._loop = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbols: list) -> asyncio.Queue:
+        """
+        Register a client queue receiving the rows of `symbols`, or of every symbol when empty.
+        Must be called from the event loop serving the client.
+        """
+        self._loop = asyncio.get_running_loop()
+        if self.broker == "redis" and (self._listener is None or self._listener.done()):
+            self._listener = self._loop.create_task(self._listen())
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            for symbol in symbols or [ALL_SYMBOLS]:
+                self._queues[symbol].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, symbols: list):
+        with self._lock:
+            for symbol in symbols or [ALL_SYMBOLS]:
+                self._queues[symbol].discard(queue)
+                if not self._queues[symbol]:
+                    del self._queues[symbol]
+
+    def dispatch(self, rows: list):
+        """
+        Put each client's rows on its queue, dropping the oldest pending batch of clients that fall behind.
+        """
+        batches = defaultdict(list)
+        with self._lock:
+            for row in rows:
+                for queue in self._queues.get(row["symbol"], set()) | self._queues.get(ALL_SYMBOLS, set()):
+                    batches[queue].append(row)
+        for queue, batch in batches.items():
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(batch)
+
+    def publish_local(self, rows: list) -> bool:
+        # Called from ingest threads, queues may only be touched from the event loop
+        if self._loop is None or self._loop.is_closed():
+            print(f"Stream publish of {len(rows)} rows dropped: no SSE client in this process, "
+                  "the memory broker does not reach other processes")
+            return False
+        self._loop.call_soon_threadsafe(self.dispatch, rows)
+        return True
+
+    async def _listen(self):
+        from redis import asyncio as aioredis
+        # One client for the worker's lifetime, its pool reconnects after a disconnect
+        client = aioredis.from_url(settings.CACHES["default"]["LOCATION"])
+        try:
+            while True:
+                try:
+                    async with client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                        await pubsub.subscribe(TICKER_DAILY_CHANNEL)
+                        async for message in pubsub.listen():
+                            self.dispatch(json.loads(message["data"]))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:
+                    print(f"Stream listener disconnected: {err}")
+                    await asyncio.sleep(5)
+        finally:
+            await client.aclose()
+
+
+stream_hub = StreamHub(broker=settings.STREAM_BROKER, queue_size=settings.STREAM_QUEUE_SIZE)
+
+
+def publish_rows(rows: list):
+    """
+    Publish ticker_daily rows to every worker's SSE clients.
+
+    Arg(s):
+        - rows (list): Rows rendered the way /api/ticker-daily renders them, with at least date and symbol
+    """
+    if not rows:
+        return
+    if stream_hub.broker == "memory":
+        stream_hub.publish_local(rows)
+        return
+    connection = redis_connection()
+    if connection is None:
+        return
+    try:
+        connection.publish(TICKER_DAILY_CHANNEL, json.dumps(rows))
+    except RedisError as err:
+        print(f"Stream publish skipped: {err}")
+
+
+def publish_new_bars() -> int:
+    """
+    Publish the ticker_daily rows inserted since the previous call, i.e. above the highest id it published.
+    The first call, without a previous one, publishes the rows of the latest date.
+
+    Return(s):
+        a Python integer of the number of published rows
+    """
+    max_id = TickerDaily.objects.aggregate(id=Max("id"))["id"]
+    if max_id is None:
+        return 0
+    published_id = cache.get(PUBLISHED_ID_KEY)
+    # Rows inserted while publishing are left to the next call
+    queryset = TickerDaily.objects.filter(id__lte=max_id).order_by("id")
+    if published_id is None:
+        queryset = queryset.filter(date=TickerDaily.objects.aggregate(date=Max("date"))["date"])
+    else:
+        queryset = queryset.filter(id__gt=published_id)
+    published = 0
+    batch = []
+    for row in queryset.values("date", "symbol", "open", "high", "low", "close", "volume").iterator(chunk_size=PUBLISH_BATCH_ROWS):
+        batch.append({**row, "date": row["date"].isoformat()})
+        if len(batch) == PUBLISH_BATCH_ROWS:
+            publish_rows(batch)
+            published += len(batch)
+            batch = []
+    publish_rows(batch)
+    cache.set(PUBLISHED_ID_KEY, max_id, None)
+    return published + len(batch)
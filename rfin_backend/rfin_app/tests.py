@@ -1,3 +1,1143 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+import numpy as np
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from redis.exceptions import RedisError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from .analytics import QUERY_TEMPLATES, run_query
+from .backtest import rank_rebalance, run_backtest
+from .compression import brotli
+from .jobs import claim_job, requeue_stale_jobs, submit_job
+from .local_cache import bump_data_version, local_cache, redis_connection
+from .rollups import materialize_sector_daily
+from .middleware import ConcurrencyLimitMiddleware
+from .models import (BalanceSh, IndexDaily, Job, SectorDaily, SeriesBlock, TickerDaily, TickerList, TickerOverview,
+                     TradingCalendar)
+from .serializers import (IndexDailySerializer, TickerDailySerializer, TickerOverviewSerializer,
+                          TradingCalendarSerializer, serialize_values)
+from .series_store import (decode_block, downsample_columns, encode_block, read_series_rows, read_series_window,
+                           sync_series_blocks)
+from .snapshot_reader import read_columns, read_table
+from .snapshots import export_snapshot
+from .streaming import PUBLISHED_ID_KEY, StreamHub, publish_new_bars
+from .ticker_search import TickerSearchIndex
+from .throttling import IPTokenBucketThrottle, TokenBucketThrottle, get_range_cost_units
+from .views import BalanceSheetView, CompareView, FundamentalsView, TickerDailyView, TradingCalendarView
+from .warmup import (DASHBOARD_CANDLE_POINTS, DASHBOARD_INDICES, DASHBOARD_LINE_POINTS, DASHBOARD_LONG_RANGES,
+                     DASHBOARD_WINDOW, dashboard_requests, warm_cache)
+
+
+# Tests that fill or clear the cache do so in process memory, never in a shared Redis
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def redis_or_skip(test):
+    """
+    Get a Redis to run the Lua scripts on: fakeredis when installed, else the configured Redis, else skip the test.
+    """
+    try:
+        import fakeredis
+        return fakeredis.FakeStrictRedis()
+    except ImportError:
+        pass
+    connection = redis_connection()
+    try:
+        if connection is not None and connection.ping():
+            return connection
+    except RedisError:
+        pass
+    test.skipTest("Redis is not available")
+
+
+class SerializeValuesTests(TestCase):
+    """
+    `serialize_values` renders exactly what `Serializer(many=True).data` does.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        TickerDaily.objects.create(date=date(2024, 1, 2), symbol="BBRI.JK", open=5700, high=5800, low=5650,
+                                   close=5725, volume=123456789012)
+        TickerDaily.objects.create(date=date(2024, 1, 3), symbol="BBRI.JK", open=None, high=None, low=None,
+                                   close=None, volume=None)
+        IndexDaily.objects.create(date=date(2024, 1, 2), index_code="LQ45", price=Decimal("987.65"))
+        IndexDaily.objects.create(date=date(2024, 1, 3), index_code="LQ45", price=Decimal("1000.00"))
+        TickerOverview.objects.create(symbol="BBRI.JK", company_name="Bank Rakyat Indonesia (Persero) Tbk",
+                                      sector="Financials", sub_sector="Banks", industry="Banks",
+                                      sub_industry="Banks", listing_date="2003-11-10", website="bri.co.id")
+        TradingCalendar.objects.create(date=date(2024, 1, 1), is_trading_day=False, description="Tahun Baru")
+        TradingCalendar.objects.create(date=date(2024, 1, 2), is_trading_day=True)
+
+    def assert_parity(self, model, serializer_class, fields=None):
+        fields = fields or list(serializer_class().fields)
+        queryset = model.objects.order_by("pk")
+        expected = [{name: row[name] for name in fields} for row in serializer_class(queryset, many=True).data]
+        self.assertEqual(serialize_values(queryset, serializer_class, fields), expected)
+
+    def test_ticker_daily(self):
+        self.assert_parity(TickerDaily, TickerDailySerializer)
+
+    def test_index_daily_decimals(self):
+        self.assert_parity(IndexDaily, IndexDailySerializer)
+
+    def test_ticker_overview(self):
+        self.assert_parity(TickerOverview, TickerOverviewSerializer)
+
+    def test_trading_calendar(self):
+        self.assert_parity(TradingCalendar, TradingCalendarSerializer)
+
+    def test_sparse_fieldset(self):
+        self.assert_parity(TickerDaily, TickerDailySerializer, ["date", "close"])
+        self.assert_parity(IndexDaily, IndexDailySerializer, ["price", "date"])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+@override_settings(CACHES=LOCAL_CACHES)
+class ContentEncodingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        TradingCalendar.objects.bulk_create([TradingCalendar(date=date(2024, 4, day), is_trading_day=True)
+                                             for day in range(1, 6)])
+
+    def get(self, accept_encoding=None):
+        headers = {} if accept_encoding is None else {"HTTP_ACCEPT_ENCODING": accept_encoding}
+        response = self.client.get("/api/trading-calendar", **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        return response
+
+    def assertEncoded(self, response, encoding):
+        self.assertEqual(response.get("Content-Encoding"), encoding)
+        body = {"gzip": gzip.decompress, "br": lambda body: brotli.decompress(body), None: bytes}[encoding](response.content)
+        self.assertEqual([row["date"] for row in json.loads(body)], [f"2024-04-0{day}" for day in range(1, 6)])
+
+    def test_gzip(self):
+        self.assertEncoded(self.get("gzip, deflate"), "gzip")
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        self.assertEncoded(self.get("gzip, deflate, br"), "br")
+        self.assertEncoded(self.get("br;q=0.5, gzip"), "gzip")
+
+    def test_identity(self):
+        self.assertEncoded(self.get(), None)
+        self.assertEncoded(self.get("identity"), None)
+        self.assertEncoded(self.get("deflate"), None)
+
+    def test_refused_codings_are_not_served(self):
+        self.assertEncoded(self.get("gzip;q=0"), None)
+        self.assertEncoded(self.get("br;q=0, gzip;q=0.8"), "gzip")
+        self.assertEncoded(self.get("*;q=0, gzip"), "gzip")
+        self.assertEncoded(self.get("*;q=0"), None)
+
+    def test_cached_response_is_negotiated_per_request(self):
+        self.assertEncoded(self.get("gzip"), "gzip")
+        with mock.patch.object(TradingCalendarView, "build_cache_value", side_effect=AssertionError("not cached")):
+            self.assertEncoded(self.get(), None)
+            self.assertEncoded(self.get("gzip"), "gzip")
+
+
+class FundamentalsViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_blank_symbols_are_rejected(self):
+        for query in ["", "symbol=", "symbol=,", "symbol=%20,%20"]:
+            response = self.client.get(f"/api/fundamentals?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_invalid_years_are_reported_under_years(self):
+        response = self.client.get("/api/fundamentals?symbol=BBRI&years=2023,last")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("years", response.json())
+
+    def test_ingest_invalidates_the_response(self):
+        BalanceSh.objects.create(symbol="BBRI.JK", fiscal_year=2023, assets=10, liabilities=5)
+        self.assertEqual(self.client.get("/api/fundamentals?symbol=BBRI").json()["BBRI.JK"][0]["balance_sheet"]["assets"], 10)
+        BalanceSh.objects.update(assets=20)
+        bump_data_version("balance_sh")
+        self.assertEqual(self.client.get("/api/fundamentals?symbol=BBRI").json()["BBRI.JK"][0]["balance_sheet"]["assets"], 20)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ThrottleCostTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        cache.clear()
+
+    def get_view(self, view_class, query):
+        view = view_class()
+        view.request = view.initialize_request(self.factory.get(f"/api/x?{query}"))
+        view.request.accepted_renderer = JSONRenderer()
+        view.format_kwarg = None
+        return view
+
+    def test_range_units(self):
+        today = date.today()
+        cases = {
+            "": 5,
+            f"start_date={today - timedelta(days=30)}": 1,
+            f"start_date={today - timedelta(days=400)}": 2,
+            "start_date=2020-01-01&end_date=2022-12-31": 3,
+            "start_date=2000-01-01&end_date=2024-01-01": 5,
+            "start_date=yesterday": 5,
+        }
+        for query, units in cases.items():
+            request = self.get_view(TickerDailyView, query).request
+            self.assertEqual(get_range_cost_units(request), units, query)
+
+    def test_uncached_ranges_cost_more(self):
+        narrow = self.get_view(TickerDailyView, f"symbol=BBRI&start_date={date.today() - timedelta(days=30)}")
+        wide = self.get_view(TickerDailyView, "symbol=BBRI")
+        self.assertEqual(narrow.get_throttle_cost(narrow.request), 5)
+        self.assertEqual(wide.get_throttle_cost(wide.request), 25)
+
+    def test_cached_response_costs_one_token(self):
+        view = self.get_view(TickerDailyView, "symbol=BBRI")
+        cache.set(view.get_versioned_cache_key(), b"[]")
+        self.assertEqual(view.get_throttle_cost(view.request), 1)
+
+    def test_unranged_views_keep_their_base_cost(self):
+        view = self.get_view(BalanceSheetView, "symbol=BBRI")
+        self.assertEqual(view.get_throttle_cost(view.request), 1)
+
+    def test_cache_is_read_once_per_request(self):
+        connection = redis_or_skip(self)
+        TokenBucketThrottle._script = None
+        self.addCleanup(setattr, TokenBucketThrottle, "_script", None)
+        with mock.patch("rfin_app.throttling.redis_connection", return_value=connection), \
+                mock.patch("rfin_app.local_cache.get_data_version", return_value=0) as get_version, \
+                mock.patch("rfin_app.views.cache", wraps=cache) as view_cache:
+            for _ in range(2):
+                get_version.reset_mock()
+                view_cache.get.reset_mock()
+                response = self.client.get("/api/ticker-daily?symbol=BBRI", REMOTE_ADDR=f"10.{uuid.uuid4().int % 250}.0.2")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual((get_version.call_count, view_cache.get.call_count), (1, 1))
+
+
+@override_settings(THROTTLE_BUCKETS={"ip": {"capacity": 3, "rate": 1.0}})
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        self.connection = redis_or_skip(self)
+        TokenBucketThrottle._script = None
+        patcher = mock.patch("rfin_app.throttling.redis_connection", return_value=self.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 1_000_000.0
+        clock = mock.patch("rfin_app.throttling.time.time", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        # A client of its own, so a shared Redis is left untouched by other tests
+        self.request = RequestFactory().get("/api/ticker-daily", REMOTE_ADDR=f"10.{uuid.uuid4().int % 250}.0.1")
+
+    def allow(self, cost=1):
+        throttle = IPTokenBucketThrottle()
+        view = mock.Mock(spec=["throttle_cost"], throttle_cost=cost)
+        return throttle.allow_request(self.request, view), throttle.wait()
+
+    def test_burst_up_to_capacity(self):
+        self.assertEqual([self.allow()[0] for _ in range(4)], [True, True, True, False])
+
+    def test_wait_until_enough_tokens(self):
+        self.allow(cost=3)
+        allowed, wait = self.allow(cost=2)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 2.0)
+
+    def test_refill_over_time(self):
+        self.allow(cost=3)
+        self.now += 1.5
+        self.assertTrue(self.allow()[0])
+        self.assertFalse(self.allow()[0])
+
+    def test_cost_is_capped_by_capacity(self):
+        self.assertTrue(self.allow(cost=10)[0])
+        self.assertFalse(self.allow()[0])
+
+    def test_clients_cannot_pick_their_bucket(self):
+        self.allow(cost=3)
+        self.request.META["HTTP_X_FORWARDED_FOR"] = "10.255.0.1"
+        self.assertFalse(self.allow()[0])
+
+    def test_frontends_are_not_throttled(self):
+        self.request.META["REMOTE_ADDR"] = "127.0.0.1"
+        self.assertEqual([self.allow(cost=3)[0] for _ in range(3)], [True, True, True])
+
+    @override_settings(API_SERVICE_TOKEN="secret")
+    def test_service_token_skips_the_bucket(self):
+        self.request.META["HTTP_X_SERVICE_TOKEN"] = "secret"
+        self.assertEqual([self.allow(cost=3)[0] for _ in range(3)], [True, True, True])
+        self.request.META["HTTP_X_SERVICE_TOKEN"] = "guess"
+        self.assertEqual([self.allow(cost=3)[0] for _ in range(2)], [True, False])
+
+    def test_fails_open_without_redis(self):
+        with mock.patch("rfin_app.throttling.redis_connection", return_value=None):
+            self.assertEqual([self.allow(cost=3)[0] for _ in range(3)], [True, True, True])
+
+
+@override_settings(API_MAX_CONCURRENT_REQUESTS=3, API_MAX_CONCURRENT_REQUESTS_PER_CLIENT=2)
+class ConcurrencyLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        self.connection = redis_or_skip(self)
+        patcher = mock.patch("rfin_app.middleware.redis_connection", return_value=self.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = ConcurrencyLimitMiddleware(lambda request: HttpResponse("ok"))
+        self.middleware.slots_key = f"concurrency: test-{uuid.uuid4().hex}"
+        self.factory = RequestFactory()
+
+    def request(self, ip):
+        return self.factory.get("/api/ticker-daily", REMOTE_ADDR=ip)
+
+    def hold_slot(self, ip):
+        keys = self.middleware.get_slots_keys(self.request(ip))
+        return self.middleware.acquire(self.connection, keys, uuid.uuid4().hex)
+
+    def test_slots_are_released(self):
+        for _ in range(5):
+            self.assertEqual(self.middleware(self.request("10.0.0.1")).status_code, 200)
+        self.assertEqual(self.connection.zcard(self.middleware.slots_key), 0)
+
+    def test_client_over_its_share_gets_429(self):
+        self.hold_slot("10.0.0.1")
+        self.hold_slot("10.0.0.1")
+        response = self.middleware(self.request("10.0.0.1"))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(self.middleware(self.request("10.0.0.2")).status_code, 200)
+
+    def test_api_at_capacity_gets_503(self):
+        for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.3"]:
+            self.hold_slot(ip)
+        response = self.middleware(self.request("10.0.0.4"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_trusted_clients_are_only_held_to_the_api_limit(self):
+        self.hold_slot("127.0.0.1")
+        self.hold_slot("127.0.0.1")
+        self.assertEqual(self.middleware(self.request("127.0.0.1")).status_code, 200)
+        self.hold_slot("127.0.0.1")
+        self.assertEqual(self.middleware(self.request("127.0.0.1")).status_code, 503)
+
+    def test_non_api_paths_are_not_limited(self):
+        for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.3"]:
+            self.hold_slot(ip)
+        self.assertEqual(self.middleware(self.factory.get("/admin/")).status_code, 200)
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=date(year, 1, 2), symbol=symbol, open=100, high=110, low=90, close=100 + year % 10,
+                        volume=1000)
+            for year in (2022, 2023) for symbol in ("BBRI.JK", "BBCA.JK")
+        ])
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_exports_in_the_same_second_do_not_collide(self):
+        first = export_snapshot(["ticker_daily"], root=self.root, keep=5)
+        second = export_snapshot(["ticker_daily"], root=self.root, keep=5)
+        self.assertNotEqual(first["path"], second["path"])
+
+    def test_keep_must_keep_the_current_snapshot(self):
+        with self.assertRaises(ValueError):
+            export_snapshot(["ticker_daily"], root=self.root, keep=0)
+
+    def test_old_snapshots_are_removed(self):
+        paths = [export_snapshot(["ticker_daily"], root=self.root, keep=2)["path"] for _ in range(3)]
+        self.assertEqual(sorted(os.listdir(self.root)),
+                         sorted([os.path.basename(path) for path in paths[1:]] + ["current"]))
+
+    def test_empty_tables_are_linked_into_later_exports(self):
+        export_snapshot(root=self.root)
+        self.assertEqual(os.listdir(os.path.join(self.root, "current", "idx_total_market_cap")), [])
+        shutil.rmtree(os.path.join(self.root, "current", "idx_total_market_cap"))
+        manifest = export_snapshot(["ticker_daily"], root=self.root)
+        self.assertEqual(manifest["tables"]["idx_total_market_cap"], 0)
+        self.assertTrue(os.path.isdir(os.path.join(manifest["path"], "idx_total_market_cap")))
+
+    def test_read_across_partitions(self):
+        export_snapshot(["ticker_daily"], root=self.root)
+        table = read_table("ticker_daily", root=self.root)
+        self.assertEqual(table.num_rows, 4)
+        self.assertGreater(table.column("close").num_chunks, 1)
+        columns = read_columns("ticker_daily", ["close"], symbols=["BBRI.JK"], root=self.root)
+        self.assertEqual(sorted(columns["close"].tolist()), [102, 103])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AnalyticsQueryTests(TestCase):
+    dates = [date(2022, 1, 3), date(2022, 12, 30), date(2023, 1, 2), date(2023, 12, 29)]
+
+    @classmethod
+    def setUpTestData(cls):
+        # Yearly returns: BBRI.JK 10% and 10%, BBCA.JK 30% and -10%, TLKM.JK -20% and 25%
+        prices = {"BBRI.JK": ([100, 110, 110, 121], [1000, 1000, 3000, 1000]),
+                  "BBCA.JK": ([200, 260, 260, 234], [500, 500, 500, 5000]),
+                  "TLKM.JK": ([50, 40, 40, 50], [100, 100, 100, 100])}
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=day, symbol=symbol, open=close, high=close, low=close, close=close, volume=volume)
+            for symbol, (closes, volumes) in prices.items() for day, close, volume in zip(cls.dates, closes, volumes)])
+        TickerOverview.objects.bulk_create([
+            TickerOverview(symbol=symbol, company_name=symbol, sector=sector, sub_sector=sub_sector, industry="",
+                           sub_industry="", listing_date="", website="")
+            for symbol, sector, sub_sector in [("BBRI.JK", "Financials", "Banks"), ("BBCA.JK", "Financials", "Banks"),
+                                               ("TLKM.JK", "Infrastructures", "Telecommunication")]])
+        IndexDaily.objects.bulk_create([
+            IndexDaily(date=day, index_code=index_code, price=Decimal(price))
+            for index_code, prices in [("IHSG", [100, 120, 90, 110]), ("LQ45", [10, 10, 10, 10])]
+            for day, price in zip([date(2023, 1, 2), date(2023, 3, 1), date(2023, 6, 1), date(2023, 12, 29)], prices)])
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        snapshot_dir = override_settings(SNAPSHOT_DIR=self.root)
+        snapshot_dir.enable()
+        self.addCleanup(snapshot_dir.disable)
+
+    def query(self, template, **params):
+        return self.client.get("/api/analytics/query", {"template": template, **params})
+
+    def rows(self, template, **params):
+        export_snapshot(root=self.root)
+        result = run_query(template, params)
+        return [dict(zip(result["columns"], row)) for row in result["rows"]]
+
+    def test_missing_snapshot_is_unavailable(self):
+        self.assertEqual(self.query("sector_returns", start_year=2022, end_year=2023).status_code, 503)
+
+    def test_parameters_are_validated(self):
+        export_snapshot(root=self.root)
+        for template, params, key in [
+            ("drop_table", {}, "template"),
+            ("sector_returns", {"end_year": 2023}, "start_year"),
+            ("sector_returns", {"start_year": "2022a", "end_year": 2023}, "start_year"),
+            ("sector_returns", {"start_year": 1800, "end_year": 2023}, "start_year"),
+            ("sector_returns", {"start_year": 2023, "end_year": 2022}, "start_year"),
+            ("sector_returns", {"level": "symbol) o; DROP TABLE x; --", "start_year": 2022, "end_year": 2023}, "level"),
+            ("volume_rank", {"start_date": "2023-12-29", "end_date": "2023-01-02"}, "start_date"),
+            ("volume_rank", {"start_date": "2023-01-02", "end_date": "2023-01-02", "window": 1}, "window"),
+            ("index_drawdown", {"index_code": ",".join(f"I{i}" for i in range(51)), "start_year": 2023,
+                                "end_year": 2023}, "index_code"),
+        ]:
+            response = self.query(template, **params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(key, response.json(), params)
+
+    def test_templates_are_listed(self):
+        self.assertEqual(set(self.client.get("/api/analytics/query").json()), set(QUERY_TEMPLATES))
+
+    def test_sector_returns(self):
+        rows = self.rows("sector_returns", level="sector", start_year="2022", end_year="2023")
+        expected = [("Financials", 2022, 0.2, 0.2), ("Financials", 2023, 0.0, 0.2),
+                    ("Infrastructures", 2022, -0.2, -0.2), ("Infrastructures", 2023, 0.25, 0.0)]
+        self.assertEqual([(row["name"], row["year"]) for row in rows], [row[:2] for row in expected])
+        for row, (_, _, mean_return, cumulative_return) in zip(rows, expected):
+            self.assertAlmostEqual(row["mean_return"], mean_return)
+            self.assertAlmostEqual(row["cumulative_return"], cumulative_return)
+        self.assertEqual([row["constituents"] for row in rows], [2, 2, 1, 1])
+
+    def test_volume_rank(self):
+        rows = self.rows("volume_rank", start_date="2023-01-02", end_date="2023-12-29", window="2", top="1")
+        self.assertEqual([(row["date"], row["symbol"], row["avg_volume"]) for row in rows],
+                         [(date(2023, 1, 2), "BBRI.JK", 2000), (date(2023, 12, 29), "BBCA.JK", 2750)])
+
+    def test_index_drawdown(self):
+        rows = self.rows("index_drawdown", index_code="ihsg", start_year="2023", end_year="2023")
+        self.assertEqual([(row["index_code"], row["year"]) for row in rows], [("IHSG", 2023)])
+        self.assertAlmostEqual(rows[0]["yearly_return"], 0.1)
+        self.assertAlmostEqual(rows[0]["max_drawdown"], -0.25)
+
+    def test_results_are_cached_per_snapshot(self):
+        params = {"index_code": "IHSG", "start_year": "2023", "end_year": "2023"}
+        export_snapshot(root=self.root)
+        first = run_query("index_drawdown", params)
+        with mock.patch("rfin_app.analytics.execute", side_effect=AssertionError("not cached")):
+            self.assertEqual(run_query("index_drawdown", params), first)
+        export_snapshot(["index_daily"], root=self.root)
+        self.assertNotEqual(run_query("index_drawdown", params)["snapshot"], first["snapshot"])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LocalCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def local_keys(self, dataset):
+        return [key for key_dataset, key in local_cache._data if key_dataset == dataset]
+
+    def test_values_loaded_across_a_bump_are_not_kept_locally(self):
+        def loader():
+            bump_data_version("ticker_list")
+            return ["BBRI.JK"]
+        self.assertEqual(local_cache.get_or_set("ticker_list", "all", loader), ["BBRI.JK"])
+        self.assertEqual(self.local_keys("ticker_list"), [])
+        self.assertEqual(local_cache.get_or_set("ticker_list", "all", lambda: ["BBCA.JK"]), ["BBCA.JK"])
+        self.assertEqual(self.local_keys("ticker_list"), ["all"])
+
+    def test_responses_built_across_a_bump_are_not_kept_locally(self):
+        build_cache_value = TradingCalendarView.build_cache_value
+
+        def build_and_bump(view):
+            value = build_cache_value(view)
+            bump_data_version("trading_calendar")
+            return value
+        with mock.patch.object(TradingCalendarView, "build_cache_value", build_and_bump):
+            self.assertEqual(self.client.get("/api/trading-calendar").status_code, 200)
+        self.assertEqual(self.local_keys("trading_calendar"), [])
+        self.assertEqual(self.client.get("/api/trading-calendar").status_code, 200)
+        self.assertEqual(len(self.local_keys("trading_calendar")), 1)
+
+
+class SeriesBlockCodecTests(SimpleTestCase):
+    def test_ticker_daily_round_trip(self):
+        dates = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 5), date(2024, 12, 30)]
+        columns = {"open": [5700, None, 5600, 5000], "high": [5800, None, 5700, 5100], "low": [5650, None, 5500, 4900],
+                   "close": [5725, None, 5650, 5050], "volume": [123456789012, None, 0, 2 ** 40]}
+        decoded_dates, decoded = decode_block("ticker_daily", encode_block("ticker_daily", dates, columns))
+        self.assertEqual(decoded_dates.tolist(), dates)
+        for name, values in columns.items():
+            self.assertEqual([None if null else value for value, null in zip(*map(np.ndarray.tolist, decoded[name]))],
+                             values, name)
+
+    def test_index_daily_decimals_round_trip(self):
+        dates = [date(2024, 1, 2), date(2024, 1, 3)]
+        decoded_dates, decoded = decode_block("index_daily", encode_block(
+            "index_daily", dates, {"price": [Decimal("7272.80"), Decimal("7279.09")]}))
+        self.assertEqual(decoded["price"][0].tolist(), [727280, 727909])
+        self.assertFalse(decoded["price"][1].any())
+
+    def test_unsupported_format_is_rejected(self):
+        payload = bytearray(zlib.decompress(encode_block("index_daily", [date(2024, 1, 2)], {"price": [1]})))
+        payload[0] = 99
+        with self.assertRaises(ValueError):
+            decode_block("index_daily", zlib.compress(bytes(payload)))
+
+
+class DownsampleColumnsTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.dates = np.arange("2020-01-01", "2020-04-10", dtype="datetime64[D]")
+        n = len(self.dates)
+        close = rng.integers(900, 1100, n)
+        self.columns = {
+            "open": (close - 5, np.zeros(n, dtype=bool)),
+            "high": (close + 10, np.zeros(n, dtype=bool)),
+            "low": (close - 10, np.zeros(n, dtype=bool)),
+            "close": (close, np.zeros(n, dtype=bool)),
+            "volume": (rng.integers(0, 10 ** 9, n), np.zeros(n, dtype=bool)),
+        }
+        self.columns["high"][1][3] = True
+
+    def test_short_series_is_unchanged(self):
+        dates, columns = downsample_columns("ticker_daily", self.dates, self.columns, len(self.dates))
+        self.assertIs(dates, self.dates)
+        self.assertIs(columns, self.columns)
+
+    def test_buckets_aggregate_their_rows(self):
+        points = 7
+        dates, columns = downsample_columns("ticker_daily", self.dates, self.columns, points)
+        self.assertEqual(len(dates), points)
+        bounds = np.append(np.arange(points) * len(self.dates) // points, len(self.dates))
+        for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            self.assertEqual(dates[i], self.dates[start])
+            high, high_null = self.columns["high"]
+            self.assertEqual(columns["open"][0][i], self.columns["open"][0][start])
+            self.assertEqual(columns["close"][0][i], self.columns["close"][0][end - 1])
+            self.assertEqual(columns["high"][0][i], high[start:end][~high_null[start:end]].max())
+            self.assertEqual(columns["low"][0][i], self.columns["low"][0][start:end].min())
+            self.assertEqual(columns["volume"][0][i], self.columns["volume"][0][start:end].sum())
+        self.assertEqual(int(columns["volume"][0].sum()), int(self.columns["volume"][0].sum()))
+        self.assertFalse(any(mask.any() for _, mask in columns.values()))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SeriesStoreSyncTests(TestCase):
+    fields = ["date", "symbol", "open", "high", "low", "close", "volume"]
+
+    @classmethod
+    def setUpTestData(cls):
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=day, symbol="BBRI.JK", open=100 + i, high=110 + i, low=90 + i, close=105 + i, volume=1000 * i)
+            for i, day in enumerate([date(2022, 12, 29), date(2022, 12, 30), date(2023, 1, 2), date(2023, 1, 3)])
+        ])
+        IndexDaily.objects.bulk_create([
+            IndexDaily(date=date(2023, 1, 2), index_code="IHSG", price=Decimal("6850.62")),
+            IndexDaily(date=date(2023, 1, 3), index_code="IHSG", price=Decimal("6888.77")),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def table_rows(self, model=TickerDaily, serializer_class=TickerDailySerializer, fields=None):
+        return serialize_values(model.objects.order_by("date"), serializer_class, fields or self.fields)
+
+    def test_blocks_render_like_the_table(self):
+        self.assertEqual(sync_series_blocks("ticker_daily"), 2)
+        self.assertEqual(sync_series_blocks("index_daily"), 1)
+        self.assertEqual(read_series_rows("ticker_daily", "BBRI.JK", self.fields), self.table_rows())
+        index_fields = ["date", "index_code", "price"]
+        self.assertEqual(read_series_rows("index_daily", "IHSG", index_fields),
+                         self.table_rows(IndexDaily, IndexDailySerializer, index_fields))
+
+    def test_unchanged_table_writes_no_block(self):
+        sync_series_blocks("ticker_daily")
+        self.assertEqual(sync_series_blocks("ticker_daily"), 0)
+        self.assertEqual(sync_series_blocks("ticker_daily", full=True), 2)
+
+    def test_blocks_synced_at_the_current_version_are_not_checked_against_the_table(self):
+        sync_series_blocks("ticker_daily")
+        table_rows = self.table_rows()
+        with self.assertNumQueries(1):
+            self.assertEqual(read_series_rows("ticker_daily", "BBRI.JK", self.fields), table_rows)
+        with self.assertNumQueries(1):
+            read_series_window("ticker_daily", "BBRI.JK", self.fields, date(2023, 1, 1))
+
+    def test_rows_ingested_since_the_sync_are_served_from_the_table(self):
+        sync_series_blocks("ticker_daily")
+        TickerDaily.objects.create(date=date(2023, 1, 4), symbol="BBRI.JK", open=1, high=2, low=1, close=2, volume=3)
+        bump_data_version("ticker_daily")
+        self.assertIsNone(read_series_rows("ticker_daily", "BBRI.JK", self.fields))
+        window = read_series_window("ticker_daily", "BBRI.JK", self.fields, date(2023, 1, 1))
+        self.assertEqual(window[-1]["date"], "2023-01-04")
+        self.assertEqual(sync_series_blocks("ticker_daily"), 1)
+        self.assertEqual(read_series_rows("ticker_daily", "BBRI.JK", self.fields), self.table_rows())
+
+    def test_corrections_of_earlier_years_are_rebuilt(self):
+        sync_series_blocks("ticker_daily")
+        TickerDaily.objects.filter(date=date(2022, 12, 29)).update(close=999)
+        self.assertEqual(sync_series_blocks("ticker_daily"), 1)
+        self.assertEqual(read_series_rows("ticker_daily", "BBRI.JK", ["date", "close"])[0],
+                         {"date": "2022-12-29", "close": 999})
+
+    def test_blocks_of_emptied_years_are_dropped(self):
+        sync_series_blocks("ticker_daily")
+        TickerDaily.objects.filter(date__year=2022).delete()
+        sync_series_blocks("ticker_daily")
+        self.assertEqual(list(SeriesBlock.objects.filter(dataset="ticker_daily").values_list("year", flat=True)), [2023])
+        self.assertEqual(read_series_rows("ticker_daily", "BBRI.JK", self.fields), self.table_rows())
+
+
+class StreamHubTests(SimpleTestCase):
+    rows = [
+        {"date": "2024-01-03", "symbol": "BBRI.JK", "close": 5725},
+        {"date": "2024-01-03", "symbol": "BBCA.JK", "close": 9400},
+        {"date": "2024-01-03", "symbol": "TLKM.JK", "close": 3950},
+    ]
+
+    def run_async(self, test):
+        asyncio.run(asyncio.wait_for(test(), timeout=5))
+
+    def test_clients_receive_the_rows_of_their_symbols(self):
+        async def test():
+            hub = StreamHub(broker="memory")
+            banks = hub.subscribe(["BBRI.JK", "BBCA.JK"])
+            telco = hub.subscribe(["TLKM.JK"])
+            everything = hub.subscribe([])
+            other = hub.subscribe(["ASII.JK"])
+            hub.dispatch(self.rows)
+            self.assertEqual(banks.get_nowait(), self.rows[:2])
+            self.assertEqual(telco.get_nowait(), self.rows[2:])
+            self.assertEqual(everything.get_nowait(), self.rows)
+            self.assertTrue(other.empty())
+        self.run_async(test)
+
+    def test_unsubscribed_clients_receive_nothing(self):
+        async def test():
+            hub = StreamHub(broker="memory")
+            queue = hub.subscribe(["BBRI.JK"])
+            hub.unsubscribe(queue, ["BBRI.JK"])
+            hub.dispatch(self.rows)
+            self.assertTrue(queue.empty())
+            self.assertEqual(dict(hub._queues), {})
+        self.run_async(test)
+
+    def test_slow_clients_drop_their_oldest_batch(self):
+        async def test():
+            hub = StreamHub(broker="memory", queue_size=2)
+            queue = hub.subscribe(["BBRI.JK"])
+            for close in (1, 2, 3):
+                hub.dispatch([{**self.rows[0], "close": close}])
+            self.assertEqual([queue.get_nowait()[0]["close"] for _ in range(2)], [2, 3])
+        self.run_async(test)
+
+    def test_rows_published_from_another_thread_are_dispatched(self):
+        async def test():
+            hub = StreamHub(broker="memory")
+            queue = hub.subscribe(["BBCA.JK"])
+            publisher = threading.Thread(target=hub.publish_local, args=(self.rows,))
+            publisher.start()
+            self.assertEqual(await queue.get(), [self.rows[1]])
+            publisher.join()
+        self.run_async(test)
+
+    def test_rows_without_a_client_in_the_process_are_dropped(self):
+        self.assertFalse(StreamHub(broker="memory").publish_local(self.rows))
+
+    def test_unknown_broker_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            StreamHub(broker="kafka")
+
+    @override_settings(CACHES={"default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": "redis://localhost"}})
+    def test_listener_reuses_and_closes_its_client(self):
+        client = mock.MagicMock()
+        client.pubsub.side_effect = [ConnectionError("reset"), asyncio.CancelledError()]
+        client.aclose = mock.AsyncMock()
+        with mock.patch("redis.asyncio.from_url", return_value=client) as from_url, \
+                mock.patch("rfin_app.streaming.asyncio.sleep", mock.AsyncMock()):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(StreamHub(broker="redis")._listen())
+        from_url.assert_called_once()
+        client.aclose.assert_awaited_once()
+
+    def test_asgi_serves_the_streams_only(self):
+        from rfin_backend import asgi
+
+        async def call(path):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+            with mock.patch.object(asgi, "django_application", mock.AsyncMock()) as django_application:
+                await asgi.application({"type": "http", "path": path}, mock.AsyncMock(), send)
+            return sent, django_application.await_count
+
+        sent, forwarded = asyncio.run(call("/api/ticker-list"))
+        self.assertEqual((sent[0]["status"], forwarded), (404, 0))
+        sent, forwarded = asyncio.run(call("/api/stream/ticker-daily"))
+        self.assertEqual((sent, forwarded), ([], 1))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PublishNewBarsTests(TestCase):
+    def setUp(self):
+        cache.delete(PUBLISHED_ID_KEY)
+        patcher = mock.patch("rfin_app.streaming.publish_rows")
+        self.publish_rows = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_bars(self, day, symbols):
+        TickerDaily.objects.bulk_create([TickerDaily(date=day, symbol=symbol, open=1, high=1, low=1, close=1, volume=1)
+                                         for symbol in symbols])
+
+    def published(self):
+        return [(row["date"], row["symbol"]) for call in self.publish_rows.call_args_list for row in call.args[0]]
+
+    def test_only_inserted_rows_are_published(self):
+        self.add_bars(date(2024, 1, 2), ["BBRI.JK", "BBCA.JK"])
+        self.add_bars(date(2024, 1, 3), ["BBRI.JK"])
+        self.assertEqual(publish_new_bars(), 1)
+        self.assertEqual(self.published(), [("2024-01-03", "BBRI.JK")])
+
+        self.publish_rows.reset_mock()
+        self.add_bars(date(2024, 1, 3), ["BBCA.JK"])
+        self.add_bars(date(2024, 1, 4), ["BBRI.JK"])
+        self.assertEqual(publish_new_bars(), 2)
+        self.assertEqual(self.published(), [("2024-01-03", "BBCA.JK"), ("2024-01-04", "BBRI.JK")])
+
+        self.publish_rows.reset_mock()
+        self.assertEqual(publish_new_bars(), 0)
+        self.assertEqual(self.published(), [])
+
+    def test_empty_table_publishes_nothing(self):
+        self.assertEqual(publish_new_bars(), 0)
+        self.publish_rows.assert_not_called()
+
+
+@override_settings(CACHES=LOCAL_CACHES, JOB_HEARTBEAT_TIMEOUT=60, JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    params = {"symbols": ["BBCA.JK", "BBRI.JK"], "start_date": None, "end_date": None}
+
+    def submit(self, params):
+        return self.client.post("/api/jobs", {"kind": "correlation", "params": params}, content_type="application/json")
+
+    def test_json_params_are_validated(self):
+        response = self.submit({"symbols": ["bbri", "BBCA"], "start_date": None})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().params, self.params)
+        response = self.client.post("/api/jobs", {"kind": "backtest", "params": {"strategy": "rsi", "cost_bps": None}},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 202)
+        for params in [{"symbols": "BBRI"}, {"symbols": [["BBRI", "BBCA"]]}, {"symbols": {"BBRI": 1}},
+                       {"symbols": "BBRI,BBCA", "start_date": True}]:
+            self.assertEqual(self.submit(params).status_code, 400, params)
+
+    def test_identical_jobs_share_a_row(self):
+        job, created = submit_job("correlation", self.params)
+        self.assertTrue(created)
+        self.assertEqual(submit_job("correlation", self.params), (job, False))
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED)
+        retry, created = submit_job("correlation", self.params)
+        self.assertTrue(created)
+        self.assertNotEqual(retry.pk, job.pk)
+
+    def test_concurrent_submission_reuses_the_queued_job(self):
+        job, _ = submit_job("correlation", self.params)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind=job.kind, params=job.params, dedupe_key=job.dedupe_key)
+        # The lookup missed the job queued by the other submission, the constraint catches it
+        with mock.patch("rfin_app.jobs.Job.objects.filter") as lookup:
+            lookup.return_value.exclude.return_value.first.return_value = None
+            self.assertEqual(submit_job("correlation", self.params), (job, False))
+
+    def test_jobs_are_claimed_once_in_order(self):
+        first, _ = submit_job("correlation", self.params)
+        second, _ = submit_job("correlation", {**self.params, "start_date": date(2020, 1, 1)})
+        claimed = claim_job("worker-1")
+        self.assertEqual((claimed.pk, claimed.status, claimed.worker, claimed.attempts),
+                         (first.pk, Job.RUNNING, "worker-1", 1))
+        self.assertIsNotNone(claimed.heartbeat_at)
+        self.assertEqual(claim_job("worker-2").pk, second.pk)
+        self.assertIsNone(claim_job("worker-3"))
+
+    def test_jobs_missing_heartbeats_are_requeued(self):
+        job, _ = submit_job("correlation", self.params)
+        claim_job("worker-1")
+        long_ago = timezone.now() - timedelta(hours=6)
+        # Running for hours but beating, the worker is alive
+        Job.objects.filter(pk=job.pk).update(started_at=long_ago)
+        self.assertEqual(requeue_stale_jobs(), 0)
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.QUEUED)
+
+        claim_job("worker-2")
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+        requeue_stale_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+
+class TickerSearchIndexTests(SimpleTestCase):
+    index = TickerSearchIndex(1, [("BBRI.JK", "Bank Rakyat Indonesia (Persero) Tbk."),
+                                  ("BBCA.JK", "Bank Central Asia Tbk."),
+                                  ("JKON.JK", "Jaya Konstruksi Manggala Pratama Tbk.")])
+
+    def symbols(self, query):
+        return [match["symbol"] for match in self.index.search(query)]
+
+    def test_exchange_suffix_is_not_a_search_term(self):
+        self.assertEqual(self.symbols("jk"), ["JKON.JK"])
+        self.assertEqual(self.symbols("bbri.jk"), ["BBRI.JK"])
+
+    def test_symbol_matches_rank_before_name_matches(self):
+        self.assertEqual(self.symbols("bb"), ["BBCA.JK", "BBRI.JK"])
+        self.assertEqual(self.symbols("bank rakyat"), ["BBRI.JK"])
+        self.assertEqual(self.symbols("BBRI"), ["BBRI.JK"])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CompareViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=date(2024, 1, day), symbol="BBRI.JK", open=1, high=1, low=1, close=close, volume=1)
+            for day, close in [(2, 5000), (3, 5500)]])
+
+    def test_symbols_without_prices_are_reported(self):
+        response = self.client.get("/api/compare?symbols=bbri,zzzz")
+        self.assertEqual(response.status_code, 200)
+        prices = response.json()["prices"]
+        self.assertEqual(prices["series"], {"BBRI.JK": [100.0, 110.0]})
+        self.assertEqual(prices["missing"], ["ZZZZ.JK"])
+        self.assertEqual(list(response.json()["fundamentals"]), ["BBRI.JK", "ZZZZ.JK"])
+
+    def test_cost_grows_with_the_symbols(self):
+        factory = APIRequestFactory()
+        symbols = ",".join(f"S{i:03d}" for i in range(10))
+        for view_class, param in [(CompareView, "symbols"), (FundamentalsView, "symbol")]:
+            request = view_class().initialize_request(factory.get(f"/api/x?{param}={symbols}"))
+            self.assertEqual(view_class().get_throttle_cost(request), 3, view_class.__name__)
+
+
+class RankRebalanceTests(SimpleTestCase):
+    close = np.array([[10, 10, 10], [11, 10, 9], [12, 10, 8], [12, 13, 8], [12, 14, 8], [12, 14, 9]], dtype=float)
+
+    def test_top_momentum_is_held_until_the_next_rebalance(self):
+        weights = rank_rebalance(self.close, np.ones_like(self.close), lookback=2, top=1, every=2, rank_by="momentum")
+        np.testing.assert_array_equal(weights, [[0, 0, 0], [0, 0, 0], [1, 0, 0], [1, 0, 0], [0, 1, 0], [0, 1, 0]])
+
+    def test_symbols_without_a_score_are_not_held(self):
+        close = self.close.copy()
+        close[:2, 2] = np.nan
+        weights = rank_rebalance(close, np.ones_like(close), lookback=2, top=3, every=10, rank_by="momentum")
+        np.testing.assert_array_equal(weights[2:], [[0.5, 0.5, 0]] * 4)
+
+    def test_top_traded_value(self):
+        volume = np.array([[1, 1, 100]] * 6, dtype=float)
+        weights = rank_rebalance(self.close, volume, lookback=2, top=2, every=1, rank_by="value")
+        np.testing.assert_array_equal(weights, [[0, 0, 0], [0, 0, 0], [0.5, 0, 0.5], [0.5, 0, 0.5], [0, 0.5, 0.5],
+                                                [0, 0.5, 0.5]])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RunBacktestTests(TestCase):
+    dates = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4), date(2024, 1, 5), date(2024, 1, 8)]
+    # Daily momentum holds BBRI.JK on the 3rd and 4th, then BBCA.JK, each gaining 10% on one of those days
+    params = {"lookback": 1, "top": 1, "every": 1, "rank_by": "momentum"}
+
+    @classmethod
+    def setUpTestData(cls):
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=day, symbol=symbol, open=close, high=close, low=close, close=close, volume=1)
+            for symbol, closes in [("BBRI.JK", [100, 110, 121, 121, 121]), ("BBCA.JK", [100, 100, 100, 110, 121])]
+            for day, close in zip(cls.dates, closes)])
+
+    def setUp(self):
+        cache.clear()
+        # The price matrix is kept per process and versioned, a fresh cache starts over at version 0
+        patcher = mock.patch("rfin_app.backtest._matrix", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_equity_curve(self):
+        result = run_backtest("rank_rebalance", self.params, cost_bps=0)
+        self.assertEqual((result["symbols"], result["days"]), (2, 4))
+        self.assertEqual([(row["date"], row["equity"]) for row in result["equity_curve"]],
+                         [("2024-01-03", 1.0), ("2024-01-04", 1.1), ("2024-01-05", 1.1), ("2024-01-08", 1.21)])
+        self.assertAlmostEqual(result["total_return"], 0.21)
+        self.assertEqual(result["max_drawdown"], 0)
+
+    def test_costs_are_charged_on_turnover(self):
+        result = run_backtest("rank_rebalance", self.params, cost_bps=10)
+        self.assertAlmostEqual(result["total_return"], 0.999 * 1.1 * 0.998 * 1.1 - 1)
+        self.assertAlmostEqual(result["max_drawdown"], -0.002)
+        self.assertAlmostEqual(result["annual_turnover"], 3 / (4 / 252))
+
+    def test_symbols_and_dates_are_selected(self):
+        result = run_backtest("rank_rebalance", self.params, symbols=["BBCA.JK"], start_date=date(2024, 1, 5), cost_bps=0)
+        self.assertEqual((result["symbols"], result["days"]), (1, 2))
+        self.assertAlmostEqual(result["total_return"], 0.21)
+        self.assertEqual(run_backtest("rank_rebalance", self.params, start_date=date(2024, 2, 1))["days"], 0)
+
+    def test_blocks_load_like_the_table(self):
+        table = run_backtest("rank_rebalance", self.params)
+        sync_series_blocks("ticker_daily")
+        bump_data_version("ticker_daily")
+        self.assertEqual(run_backtest("rank_rebalance", self.params), table)
+
+    def test_matrix_is_reloaded_on_a_version_bump(self):
+        self.assertEqual(run_backtest("rank_rebalance", self.params)["days"], 4)
+        TickerDaily.objects.create(date=date(2024, 1, 9), symbol="BBRI.JK", open=1, high=1, low=1, close=121, volume=1)
+        self.assertEqual(run_backtest("rank_rebalance", self.params)["days"], 4)
+        bump_data_version("ticker_daily")
+        self.assertEqual(run_backtest("rank_rebalance", self.params)["days"], 5)
+
+    def test_view_validates_the_strategy(self):
+        for query, key in [("strategy=buy_and_hold", "strategy"), ("strategy=ma_crossover&fast=50&slow=20", "fast"),
+                           ("strategy=rank_rebalance&rank_by=volume", "rank_by"), ("strategy=rsi&cost_bps=x", "cost_bps")]:
+            response = self.client.get(f"/api/backtest?{query}")
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn(key, response.json(), query)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PopulateTradingCalendarTests(TestCase):
+    holidays = {
+        "2024-04-10": {"summary": ["Hari Raya Idul Fitri", "Cuti Bersama Idul Fitri"]},
+        "2024-04-11": {"summary": "Hari Raya Idul Fitri"},
+    }
+
+    def test_days_with_several_holidays_list_them_all(self):
+        with mock.patch("rfin_app.management.commands.populate_trading_calendar.TanggalMerah") as tanggal_merah:
+            tanggal_merah.return_value.data = self.holidays
+            call_command("populate_trading_calendar", "--year", "2024", stdout=io.StringIO())
+        days = {row.date.isoformat(): (row.is_trading_day, row.description)
+                for row in TradingCalendar.objects.filter(date__range=(date(2024, 4, 9), date(2024, 4, 13)))}
+        self.assertEqual(days, {
+            "2024-04-09": (True, ""),
+            "2024-04-10": (False, "Hari Raya Idul Fitri, Cuti Bersama Idul Fitri"),
+            "2024-04-11": (False, "Hari Raya Idul Fitri"),
+            "2024-04-12": (True, ""),
+            "2024-04-13": (False, "Saturday"),
+        })
+        self.assertEqual(TradingCalendar.objects.count(), 366)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class WarmCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        TickerList.objects.create(symbol="BBRI.JK", company_name="Bank Rakyat Indonesia (Persero) Tbk.")
+        TickerDaily.objects.create(date=date.today(), symbol="BBRI.JK", open=1, high=1, low=1, close=1, volume=1)
+        IndexDaily.objects.create(date=date.today(), index_code="IHSG", price=Decimal("7000.00"))
+
+    # The urls of rfin_mini_dashboard's _market_cap_url, _index_urls, and _ticker_urls
+    def window_start(self, window):
+        return (datetime.today() + window).date()
+
+    def long_range_urls(self, url, points):
+        return [f"{url}&start_date={self.window_start(window)}&points={points}" if window else f"{url}&points={points}"
+                for window in DASHBOARD_LONG_RANGES]
+
+    def market_cap_url(self):
+        return f"/api/idx-total-market-cap?start_date={self.window_start(DASHBOARD_WINDOW)}&format=arrow"
+
+    def index_urls(self, index_code):
+        url = f"/api/index-daily?index_code={index_code}&format=arrow"
+        return [url, *self.long_range_urls(url, DASHBOARD_LINE_POINTS)]
+
+    def ticker_urls(self, symbol):
+        url = f"/api/ticker-daily?symbol={symbol}&format=arrow"
+        return [f"/api/ticker-overview?symbol={symbol}", url, *self.long_range_urls(url, DASHBOARD_CANDLE_POINTS),
+                *[f"/api/{path}?symbol={symbol}&format=arrow" for path in ["income-statement", "balance-sheet", "cash-flow"]]]
+
+    def warm(self):
+        with mock.patch("rfin_app.warmup.cache", wraps=cache) as warmup_cache:
+            stats = warm_cache(dashboard_requests(), workers=1)
+        self.assertEqual(stats["failed"], 0)
+        return {key for call in warmup_cache.set_many.call_args_list for key in call.args[0]}
+
+    def test_dashboard_requests_are_served_from_the_warmed_entries(self):
+        self.warm()
+        with mock.patch("rfin_app.views.CachedListMixin.build_cache_value", side_effect=AssertionError("not warmed")):
+            for url in [self.market_cap_url(), *self.index_urls("IHSG"), *self.ticker_urls("BBRI.JK")]:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+
+    def test_every_warmed_entry_is_read_by_the_dashboard(self):
+        warmed = self.warm()
+        urls = [self.market_cap_url(), "/api/ticker-list", *self.ticker_urls("BBRI.JK")]
+        urls += [url for index_code in DASHBOARD_INDICES for url in self.index_urls(index_code)]
+        with mock.patch("rfin_app.views.cache", wraps=cache) as view_cache:
+            for url in urls:
+                self.client.get(url)
+        self.assertEqual({call.args[0] for call in view_cache.get.call_args_list}, warmed)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TradingCalendarViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        TradingCalendar.objects.bulk_create([
+            TradingCalendar(date=date(2024, 4, day), is_trading_day=day not in (10, 11, 13, 14)) for day in range(8, 16)])
+
+    def test_range_is_validated(self):
+        rows = self.client.get("/api/trading-calendar?start_date=20240410&end_date=2024-04-12").json()
+        self.assertEqual([(row["date"], row["is_trading_day"]) for row in rows],
+                         [("2024-04-10", False), ("2024-04-11", False), ("2024-04-12", True)])
+        for query in ["start_date=garbage", "end_date=2024-04-31"]:
+            response = self.client.get(f"/api/trading-calendar?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class MarketSnapshotViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=day, symbol=symbol, open=1, high=1, low=1, close=close, volume=1)
+            for day, symbol, close in [(date(2024, 1, 4), "BBRI.JK", 10), (date(2024, 1, 5), "BBRI.JK", 11),
+                                       (date(2024, 1, 4), "BBCA.JK", 20)]])
+
+    def test_latest_row_of_every_symbol(self):
+        rows = self.client.get("/api/market-snapshot?date=2024-01-05").json()
+        self.assertEqual([(row["symbol"], row["date"]) for row in rows],
+                         [("BBCA.JK", "2024-01-04"), ("BBRI.JK", "2024-01-05")])
+
+    def test_equivalent_dates_share_a_cache_entry(self):
+        self.client.get("/api/market-snapshot?date=20240105")
+        with mock.patch.object(TickerDaily.objects, "filter", side_effect=AssertionError("not cached")):
+            self.assertEqual(self.client.get("/api/market-snapshot?date=2024-01-05").status_code, 200)
+
+    def test_malformed_date_is_rejected(self):
+        for value in ["garbage", "2024-1-5"]:
+            response = self.client.get(f"/api/market-snapshot?date={value}")
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("date", response.json())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SectorDailyTests(TestCase):
+    closes = {
+        # symbol: [(close, volume) on Jan 2, 3, 4]
+        "BBRI.JK": [(100, 10), (110, 20), (110, 5)],
+        "BBCA.JK": [(200, 10), (190, 30), (209, 5)],
+        "ADRO.JK": [(50, 40), (50, 40), (45, 5)],
+    }
+
+    def setUp(self):
+        cache.clear()
+        TickerOverview.objects.bulk_create([
+            TickerOverview(symbol=symbol, company_name=symbol, sector=sector, sub_sector=sub_sector, industry="",
+                           sub_industry="", listing_date="", website="")
+            for symbol, sector, sub_sector in [("BBRI.JK", "Financials", "Banks"), ("BBCA.JK", "Financials", "Banks"),
+                                               ("ADRO.JK", "Energy", "Coal")]])
+        self.add_day(0)
+        self.add_day(1)
+
+    def add_day(self, i):
+        TickerDaily.objects.bulk_create([
+            TickerDaily(date=date(2024, 1, 2 + i), symbol=symbol, open=bars[i][0], high=bars[i][0], low=bars[i][0],
+                        close=bars[i][0], volume=bars[i][1])
+            for symbol, bars in self.closes.items()])
+
+    def rollup(self, name, day):
+        return SectorDaily.objects.get(level="sector", name=name, date=day)
+
+    def test_returns_are_weighted_by_previous_traded_value(self):
+        self.assertEqual(materialize_sector_daily(start_date=date(2024, 1, 3)), 4)
+        financials = self.rollup("Financials", date(2024, 1, 3))
+        self.assertAlmostEqual(financials.equal_weighted_return, 0.025)
+        # +10% on Rp1,000 traded and -5% on Rp2,000 traded the day before
+        self.assertAlmostEqual(financials.value_weighted_return, 0.0)
+        self.assertEqual((financials.advancers, financials.decliners, financials.unchanged, financials.constituents,
+                          financials.total_volume), (1, 1, 0, 2, 50))
+        self.assertEqual(SectorDaily.objects.get(level="sub_sector", name="Coal").unchanged, 1)
+
+    def test_first_day_has_no_return(self):
+        materialize_sector_daily()
+        first = self.rollup("Energy", date(2024, 1, 2))
+        self.assertEqual((first.value_weighted_return, first.equal_weighted_return, first.constituents), (None, None, 1))
+
+    def test_incremental_and_chunked_runs_match_a_full_run(self):
+        materialize_sector_daily()
+        self.add_day(2)
+        self.assertEqual(materialize_sector_daily(incremental=True), 4)
+        incremental = list(SectorDaily.objects.order_by("level", "name", "date").values())
+        SectorDaily.objects.all().delete()
+        materialize_sector_daily(chunk_days=1)
+        chunked = list(SectorDaily.objects.order_by("level", "name", "date").values())
+        for row in incremental + chunked:
+            del row["id"]
+        self.assertEqual(incremental, chunked)
+        self.assertAlmostEqual(self.rollup("Financials", date(2024, 1, 4)).equal_weighted_return, 0.05)
+
+    def test_view_filters_by_validated_dates(self):
+        materialize_sector_daily()
+        rows = self.client.get("/api/sector-daily?level=sub_sector&name=banks&start_date=20240103").json()
+        self.assertEqual([row["date"] for row in rows], ["2024-01-03"])
+        for query in ["start_date=garbage", "end_date=2024-13-01"]:
+            response = self.client.get(f"/api/sector-daily?{query}")
+            self.assertEqual(response.status_code, 400, query)
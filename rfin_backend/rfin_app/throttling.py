@@ -0,0 +1,143 @@
+import hmac
+import math
+import time
+from datetime import date
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .local_cache import redis_connection
+
+# Refill the bucket for the elapsed time, then take `cost` tokens if there are enough of them.
+# Returns {allowed, seconds to wait until enough tokens are available}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+def get_client_ip(request) -> str:
+    """
+    Get the IP a client is throttled by. X-Forwarded-For is only read behind the `NUM_PROXIES` proxies DRF is told of,
+    otherwise a client could pick its own bucket by sending the header.
+    """
+    if api_settings.NUM_PROXIES:
+        return BaseThrottle().get_ident(request)
+    return request.META.get("REMOTE_ADDR")
+
+
+def is_trusted_client(request) -> bool:
+    """
+    Whether the request comes from the project's own frontends, which call the API on behalf of all their users:
+    from a `THROTTLE_TRUSTED_IPS` socket peer, or with the `API_SERVICE_TOKEN` in an X-Service-Token header.
+    """
+    token = settings.API_SERVICE_TOKEN
+    if token and hmac.compare_digest(request.META.get("HTTP_X_SERVICE_TOKEN", ""), token):
+        return True
+    return request.META.get("REMOTE_ADDR") in settings.THROTTLE_TRUSTED_IPS
+
+
+def get_range_cost_units(request) -> int:
+    """
+    Get the number of `THROTTLE_RANGE_DAYS` spans between `?start_date=` and `?end_date=` (default to today),
+    an unbounded or invalid range is charged as the widest one, `THROTTLE_MAX_RANGE_UNITS`.
+    """
+    max_units = settings.THROTTLE_MAX_RANGE_UNITS
+    try:
+        start_date = request.query_params.get("start_date", None)
+        end_date = request.query_params.get("end_date", None)
+        if not start_date:
+            return max_units
+        days = ((date.fromisoformat(end_date) if end_date else date.today()) - date.fromisoformat(start_date)).days
+    except ValueError:
+        return max_units
+    return min(max_units, max(1, math.ceil(days / settings.THROTTLE_RANGE_DAYS)))
+
+
+def get_request_cost(request, view) -> float:
+    """
+    Get the number of tokens a request takes, views weight expensive requests with `get_throttle_cost`.
+    """
+    get_throttle_cost = getattr(view, "get_throttle_cost", None)
+    if get_throttle_cost is not None:
+        return get_throttle_cost(request)
+    return getattr(view, "throttle_cost", 1)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Redis-backed token bucket shared by every worker, configured by `THROTTLE_BUCKETS[scope]`
+    with a burst `capacity` and a refill `rate` in tokens per second.
+    """
+    scope = None
+    _script = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError(".get_ident_key() must be overridden")
+
+    def allow_request(self, request, view):
+        self._wait = None
+        if is_trusted_client(request):
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+        connection = redis_connection()
+        if connection is None:
+            return True
+        bucket = settings.THROTTLE_BUCKETS[self.scope]
+        cost = min(get_request_cost(request, view), bucket["capacity"])
+        try:
+            if TokenBucketThrottle._script is None:
+                TokenBucketThrottle._script = connection.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, wait = TokenBucketThrottle._script(
+                keys=[f"throttle: {self.scope}-{ident}"],
+                args=[bucket["capacity"], bucket["rate"], time.time(), cost],
+                client=connection,
+            )
+        except RedisError as err:
+            # Fail open, an unavailable Redis must not take the API down with it
+            print(f"Throttle skipped: {err}")
+            return True
+        if int(allowed) == 1:
+            return True
+        self._wait = float(wait)
+        return False
+
+    def wait(self):
+        return self._wait
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    scope = "ip"
+
+    def get_ident_key(self, request):
+        return get_client_ip(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    scope = "user"
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
@@ -0,0 +1,92 @@
+import re
+import threading
+from bisect import bisect_left
+
+from .local_cache import get_data_version
+from .models import TickerList
+
+# Match ranks, lower is better: the query is the symbol, prefixes the symbol, prefixes the company name,
+# or every query token prefixes a token of the symbol or company name
+EXACT_SYMBOL, SYMBOL_PREFIX, NAME_PREFIX, TOKEN_PREFIX = range(4)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def strip_exchange(symbol: str) -> str:
+    # Every symbol ends with .JK, a "jk" token would match them all
+    return symbol.strip().lower().removesuffix(".jk")
+
+
+class TickerSearchIndex:
+    """
+    Sorted (term, ticker) pairs over symbols and company name tokens, searched by prefix with binary search.
+    """
+    def __init__(self, version: int, tickers: list):
+        self.version = version
+        self.tickers = sorted(tickers)
+        self.symbols = [strip_exchange(symbol) for symbol, _ in self.tickers]
+        self.names = [" ".join(tokenize(company_name)) for _, company_name in self.tickers]
+        terms = set()
+        for i, (symbol, company_name) in enumerate(zip(self.symbols, self.names)):
+            terms.update((token, i) for token in tokenize(symbol) + company_name.split())
+        self.terms = sorted(terms)
+
+    def _prefixed(self, token: str) -> set:
+        start = bisect_left(self.terms, (token, -1))
+        matches = set()
+        for term, i in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            matches.add(i)
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Get the best matching tickers of a query, e.g. "bbr" or "bank rakyat".
+
+        Arg(s):
+            - query (str): Symbol or company name, or prefixes of their words
+            - limit (int): Maximum number of matches
+        Return(s):
+            a Python list of dictionary with the symbol and company name, best match first
+        """
+        tokens = tokenize(strip_exchange(query))
+        if not tokens:
+            return [{"symbol": symbol, "company_name": name} for symbol, name in self.tickers[:limit]]
+        candidates = self._prefixed(tokens[0])
+        for token in tokens[1:]:
+            candidates &= self._prefixed(token)
+        symbol_query, name_query = "".join(tokens), " ".join(tokens)
+
+        def rank(i):
+            if self.symbols[i] == symbol_query:
+                return EXACT_SYMBOL, i
+            if self.symbols[i].startswith(symbol_query):
+                return SYMBOL_PREFIX, i
+            if self.names[i].startswith(name_query):
+                return NAME_PREFIX, i
+            return TOKEN_PREFIX, i
+
+        return [{"symbol": self.tickers[i][0], "company_name": self.tickers[i][1]}
+                for i in sorted(candidates, key=rank)[:limit]]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def search_index() -> TickerSearchIndex:
+    """
+    Get the process-level search index, rebuilt once the ticker_list data version changes.
+    """
+    global _index
+    version = get_data_version("ticker_list")
+    if _index is not None and _index.version == version:
+        return _index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = TickerSearchIndex(version, list(TickerList.objects.values_list("symbol", "company_name")))
+        return _index
@@ -8,9 +8,22 @@ urlpatterns = [
     path("idx-total-market-cap", IDXTotalMarketCapView.as_view(), name="idx-total-market-cap"),
     path("index-daily", IndexDailyView.as_view(), name="index-daily"),
     path("ticker-list", TickerListView.as_view(), name="ticker-list"),
+    path("ticker-search", TickerSearchView.as_view(), name="ticker-search"),
     path("ticker-daily", TickerDailyView.as_view(), name="ticker-daily"),
     path("balance-sheet", BalanceSheetView.as_view(), name="balance-sheet"),
     path("cash-flow", CashFlowView.as_view(), name="cash-flow"),
     path("income-statement", IncomeStatementView.as_view(), name="income-statement"),
     path("ticker-overview", TickerOverviewView.as_view(), name="ticker-overview"),
+    path("sector-daily", SectorDailyView.as_view(), name="sector-daily"),
+    path("market-snapshot", MarketSnapshotView.as_view(), name="market-snapshot"),
+    path("trading-calendar", TradingCalendarView.as_view(), name="trading-calendar"),
+    path("fundamentals", FundamentalsView.as_view(), name="fundamentals"),
+    path("compare", CompareView.as_view(), name="compare"),
+    path("data-version", DataVersionView.as_view(), name="data-version"),
+    path("analytics/query", AnalyticsQueryView.as_view(), name="analytics-query"),
+    path("backtest", BacktestView.as_view(), name="backtest"),
+    path("jobs", JobListView.as_view(), name="jobs"),
+    path("jobs/<uuid:job_id>", JobDetailView.as_view(), name="job-detail"),
+    path("jobs/<uuid:job_id>/result", JobResultView.as_view(), name="job-result"),
+    path("stream/ticker-daily", stream_ticker_daily, name="stream-ticker-daily"),
 ]
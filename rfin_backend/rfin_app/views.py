@@ -1,5 +1,6 @@
 from django.shortcuts import render
 from rest_framework.generics import ListAPIView
+from rest_framework.views import APIView
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -7,17 +8,182 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 
 from .models import *
 from .serializers import *
+from django.conf import settings
 from django.core.cache import cache
+from .local_cache import get_data_version, local_cache
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db import connection
+from django.db.models import Q, OuterRef, Subquery
 
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from .compression import compress_variants, decompress_body, precompressed_response
+from .renderers import ARROW_STREAM_MEDIA_TYPE, ArrowStreamRenderer, rows_to_ipc
+from .analytics import QUERY_TEMPLATES, iso_date, parse_params, run_query
+from .backtest import STRATEGIES, normalized_performance, run_backtest
+from .jobs import JOB_KINDS, submit_job
+from .series_store import read_series_rows, read_series_window
+from .streaming import stream_hub
+from .throttling import get_range_cost_units
+from .ticker_search import search_index
+
+import asyncio
+import hashlib
+import json
 from datetime import date
 
+# Helpers
+def normalize_symbol(symbol: str) -> str:
+    symbol = symbol.strip().upper()
+    if not symbol.endswith(".JK"):
+        symbol = f"{symbol}.JK"
+    return symbol
+
+def parse_years(years: str, name: str = "year") -> list:
+    try:
+        return [int(year) for year in years.split(",") if year.strip()]
+    except ValueError:
+        raise ValidationError({name: f"Invalid year(s): {years}, must be comma separated integers, e.g. 2022,2023"})
+
+def parse_date_range(query_params) -> dict:
+    """
+    Get `?start_date=` and `?end_date=` as dates, None when absent, raises a ValidationError if malformed.
+    """
+    return {name: iso_date(name, query_params[name]) if query_params.get(name) else None
+            for name in ("start_date", "end_date")}
+
+# Bounds of `?points=` on the per-symbol and per-index series
+MIN_POINTS = 10
+MAX_POINTS = 5000
+
+def parse_points(points: str):
+    if not points:
+        return None
+    try:
+        points = int(points)
+    except ValueError:
+        points = None
+    if points is None or not MIN_POINTS <= points <= MAX_POINTS:
+        raise ValidationError({"points": f"Invalid points, must be an integer between {MIN_POINTS} and {MAX_POINTS}"})
+    return points
+
+# Mixins
+class SparseFieldsMixin:
+    """
+    Support `?fields=date,close` on list endpoints and render rows straight from values_list(),
+    bypassing model instances and per-field serializer calls.
+    """
+    def get_fields(self):
+        available = list(self.serializer_class().fields)
+        requested = self.request.query_params.get("fields", None)
+        if not requested:
+            return available
+        fields = [field.strip() for field in requested.split(",") if field.strip()]
+        invalid = [field for field in fields if field not in available]
+        if invalid:
+            raise ValidationError({"fields": f"Invalid field(s): {invalid}, must be within {available}"})
+        return fields
+
+    def serialize(self, queryset, fields):
+        return serialize_values(queryset, self.serializer_class, fields)
+
+class CachedListMixin(SparseFieldsMixin):
+    """
+    Cache the rendered rows of a list endpoint under a key versioned by the dataset it reads,
+    so bumping the dataset version after an ingest invalidates every cached response at once.
+    Small reference tables set `use_local_cache` to be served from the per-process cache in front of Redis.
+    Rows are served as JSON, or as an Arrow IPC stream with `?format=arrow`, each cached on its own.
+    """
+    dataset = None
+    use_local_cache = False
+    # Views filtered by ?start_date=/?end_date= are charged per year of dates requested
+    range_throttle_cost = False
+    cache_timeout = settings.API_CACHE_TIMEOUT
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, ArrowStreamRenderer]
+    # Per request, see get_versioned_cache_key and get_cached_value
+    _versioned_cache_key = None
+    _local_generation = None
+    _cached_value = None
+    _cached_locally = False
+    _cache_read = False
+
+    def get_cache_key(self):
+        raise NotImplementedError(".get_cache_key() must be overridden")
+
+    def get_response_format(self):
+        renderer = getattr(self.request, "accepted_renderer", None)
+        if renderer is not None:
+            return renderer.format
+        # Requests built outside of content negotiation, e.g. by the cache warm-up
+        return self.request.query_params.get(api_settings.URL_FORMAT_OVERRIDE, "json")
+
+    def get_local_cache_key(self):
+        cache_key = f"{self.get_cache_key()}-{','.join(self.get_fields())}"
+        return f"{cache_key}-arrow" if self.get_response_format() == "arrow" else cache_key
+
+    def get_versioned_cache_key(self):
+        # Once per request, reading the dataset version is a cache round trip
+        if self._versioned_cache_key is None:
+            # Read before the version, a response built from a version bumped meanwhile is not kept locally
+            self._local_generation = local_cache.generation(self.dataset)
+            self._versioned_cache_key = local_cache.shared_key(self.dataset, self.get_local_cache_key())
+        return self._versioned_cache_key
+
+    def get_cached_value(self):
+        """
+        Get the cached response of the request, or None. Read once, by the throttles pricing the request,
+        and kept for `list()` to serve.
+        """
+        if not self._cache_read:
+            value = local_cache.get(self.dataset, self.get_local_cache_key()) if self.use_local_cache else None
+            self._cached_locally = value is not None
+            self._cached_value = value if value is not None else cache.get(self.get_versioned_cache_key())
+            self._cache_read = True
+        return self._cached_value
+
+    def get_throttle_cost(self, request):
+        # A cached response costs a single token, an uncached one the view's base cost, per year of dates if ranged
+        base_cost = getattr(self, "throttle_cost", 1)
+        try:
+            if self.get_cached_value() is not None:
+                return 1
+        except ValidationError:
+            # The view rejects the request itself
+            return base_cost
+        return base_cost * get_range_cost_units(request) if self.range_throttle_cost else base_cost
+
+    def get_rows(self):
+        return self.serialize(self.get_queryset(), self.get_fields())
+
+    def build_cache_value(self):
+        # Render and compress once per cache fill rather than once per request
+        if self.get_response_format() == "arrow":
+            return rows_to_ipc(self.get_rows(), self.serializer_class, self.get_fields())
+        return compress_variants(JSONRenderer().render(self.get_rows()))
+
+    def list(self, request):
+        result = self.get_cached_value()
+        if result is None:
+            print("Hitting DB")
+            result = self.build_cache_value()
+            cache.set(self.get_versioned_cache_key(), result, self.cache_timeout)
+        else:
+            print("Cache retrieved!")
+        if self.use_local_cache and not self._cached_locally:
+            local_cache.set(self.dataset, self.get_local_cache_key(), result, generation=self._local_generation)
+        if request.accepted_renderer.format == "arrow":
+            return HttpResponse(result, content_type=ARROW_STREAM_MEDIA_TYPE)
+        if request.accepted_renderer.format == "json":
+            return precompressed_response(result, request)
+        return Response(json.loads(decompress_body(result)))
+
 # Views
 @api_view(['POST'])
 def signup(request):
@@ -46,9 +212,11 @@ def login(request):
 def test_token(request):
     return Response(f"passed for {request.user.email}")
 
-class IDXTotalMarketCapView(ListAPIView):
+class IDXTotalMarketCapView(CachedListMixin, ListAPIView):
     queryset = IDXTotalMarketCap.objects.all()
     serializer_class = IDXTotalMarketCapSerializer
+    dataset = "idx_total_market_cap"
+    range_throttle_cost = True
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -62,7 +230,7 @@ class IDXTotalMarketCapView(ListAPIView):
             queryset = queryset.filter(date__range=[start_date, end_date])
         return queryset
     
-    def list(self, request):
+    def get_cache_key(self):
         start_date = self.request.query_params.get("start_date", None)
         end_date = self.request.query_params.get("end_date", None)
         if start_date:
@@ -71,19 +239,17 @@ class IDXTotalMarketCapView(ListAPIView):
             cache_key = f"idx-market-cap: {end_date}"
         elif start_date and end_date:
             cache_key = f"idx-market-cap: {start_date}-{end_date}"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
         else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
+            cache_key = "idx-market-cap: all"
+        return cache_key
     
-class IndexDailyView(ListAPIView):
+class IndexDailyView(CachedListMixin, ListAPIView):
     queryset = IndexDaily.objects.all()
     serializer_class = IndexDailySerializer
+    dataset = "index_daily"
+    # Per year of an index's history read
+    throttle_cost = 3
+    range_throttle_cost = True
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -103,12 +269,15 @@ class IndexDailyView(ListAPIView):
             queryset
         return queryset
 
-    def list(self, request):
+    def get_cache_key(self):
         index_code = self.request.query_params.get("index_code", None)
         start_date = self.request.query_params.get("start_date", None)
         end_date = self.request.query_params.get("end_date", None)
         if index_code:
             cache_key = f"index-daily: {index_code}"
+            points = parse_points(self.request.query_params.get("points", None))
+            if points:
+                cache_key = f"{cache_key}-{start_date}-p{points}"
         elif start_date:
             cache_key = f"index-daily: {index_code}-{start_date}"
         elif end_date:
@@ -117,39 +286,43 @@ class IndexDailyView(ListAPIView):
             cache_key = f"index-daily: {index_code}-{start_date}-{end_date}"
         else:
             cache_key = "all"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
-        else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data) 
+        return cache_key
+
+    def get_rows(self):
+        # Full index history from its compact per-year blocks, the ORM only serves indices without blocks
+        index_code = self.request.query_params.get("index_code", None)
+        points = parse_points(self.request.query_params.get("points", None))
+        if index_code and points:
+            # A window of the history bucketed to the chart's width, e.g. /api/index-daily?index_code=IHSG&start_date=2020-01-01&points=600
+            start_date = self.request.query_params.get("start_date", None)
+            return read_series_window(self.dataset, index_code.upper(), self.get_fields(),
+                                      iso_date("start_date", start_date) if start_date else None, points)
+        if index_code:
+            rows = read_series_rows(self.dataset, index_code.upper(), self.get_fields())
+            if rows is not None:
+                return rows
+        return super().get_rows()
     
-class TickerListView(ListAPIView):
+class TickerListView(CachedListMixin, ListAPIView):
     queryset = TickerList.objects.all()
     serializer_class = TickerListSerializer
+    dataset = "ticker_list"
+    use_local_cache = True
 
     def get_queryset(self):
         return super().get_queryset()
 
-class TickerDailyView(ListAPIView):
+    def get_cache_key(self):
+        return "ticker-list"
+
+class TickerDailyView(CachedListMixin, ListAPIView):
     queryset = TickerDaily.objects.all()
     serializer_class = TickerDailySerializer
+    dataset = "ticker_daily"
+    # Per year of a ticker's history read
+    throttle_cost = 5
+    range_throttle_cost = True
 
-    def list(self, request):
-        cache_key = "ticker-list"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
-        else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
-    
     def get_queryset(self):
         queryset = super().get_queryset()
         symbol = self.request.query_params.get("symbol", None)
@@ -168,31 +341,44 @@ class TickerDailyView(ListAPIView):
             queryset = queryset.filter(Q(symbol__contains=symbol) & Q(date__range=[start_date, end_date]))
         return queryset
 
-    def list(self, request):
+    def get_cache_key(self):
         symbol = self.request.query_params.get("symbol", None)
         start_date = self.request.query_params.get("start_date", None)
         end_date = self.request.query_params.get("end_date", None)
         if symbol:
             cache_key = f"ticker-daily: {symbol}"
+            points = parse_points(self.request.query_params.get("points", None))
+            if points:
+                cache_key = f"{cache_key}-{start_date}-p{points}"
         elif start_date:
             cache_key = f"ticker-daily: {symbol}-{start_date}"
         elif end_date:
             cache_key = f"ticker-daily: {symbol}-{end_date}"
         elif start_date and end_date:
             cache_key = f"ticker-daily: {symbol}-{start_date}-{end_date}"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
         else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
+            cache_key = "ticker-daily: all"
+        return cache_key
+
+    def get_rows(self):
+        # Full ticker history from its compact per-year blocks, the ORM only serves symbols without blocks
+        symbol = self.request.query_params.get("symbol", None)
+        points = parse_points(self.request.query_params.get("points", None))
+        if symbol and points:
+            # A window of the history bucketed into OHLCV bars, e.g. /api/ticker-daily?symbol=BBRI&start_date=2020-01-01&points=600
+            start_date = self.request.query_params.get("start_date", None)
+            return read_series_window(self.dataset, normalize_symbol(symbol), self.get_fields(),
+                                      iso_date("start_date", start_date) if start_date else None, points)
+        if symbol:
+            rows = read_series_rows(self.dataset, normalize_symbol(symbol), self.get_fields())
+            if rows is not None:
+                return rows
+        return super().get_rows()
     
-class BalanceSheetView(ListAPIView):
+class BalanceSheetView(CachedListMixin, ListAPIView):
     queryset = BalanceSh.objects.all()
     serializer_class = BalanceSheetSerializer
+    dataset = "balance_sh"
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -203,38 +389,33 @@ class BalanceSheetView(ListAPIView):
             if not symbol.endswith(".JK"):
                 symbol = f"{symbol}.JK"
             queryset = queryset.filter(
-                Q(symbol__contains=symbol) & Q(year__contains=year))
+                Q(symbol__contains=symbol) & Q(fiscal_year__in=parse_years(year)))
         elif symbol:
             symbol = symbol.upper()
             if not symbol.endswith(".JK"):
                 symbol = f"{symbol}.JK"
             queryset = queryset.filter(symbol__contains=symbol)
         elif year:
-            queryset = queryset.filter(year__contains=year)
+            queryset = queryset.filter(fiscal_year__in=parse_years(year))
         return queryset
     
-    def list(self, request):
+    def get_cache_key(self):
         symbol = self.request.query_params.get("symbol", None)
         year = self.request.query_params.get("year", None)
-        if symbol:
+        if symbol and year:
+            cache_key = f"balance-sheet: {symbol}-{year}"
+        elif symbol:
             cache_key = f"balance-sheet: {symbol}"
         elif year:
             cache_key = f"balance-sheet: {year}"
-        elif symbol and year:
-            cache_key = f"balance-sheet: {symbol}-{year}"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
         else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
+            cache_key = "balance-sheet: all"
+        return cache_key
     
-class CashFlowView(ListAPIView):
+class CashFlowView(CachedListMixin, ListAPIView):
     queryset = CashFlow.objects.all()
     serializer_class = CashFlowSerializer
+    dataset = "cash_flow"
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -245,38 +426,33 @@ class CashFlowView(ListAPIView):
             if not symbol.endswith(".JK"):
                 symbol = f"{symbol}.JK"
             queryset = queryset.filter(
-                Q(symbol__contains=symbol) & Q(year__contains=year))
+                Q(symbol__contains=symbol) & Q(fiscal_year__in=parse_years(year)))
         elif symbol:
             symbol = symbol.upper()
             if not symbol.endswith(".JK"):
                 symbol = f"{symbol}.JK"
             queryset = queryset.filter(symbol__contains=symbol)
         elif year:
-            queryset = queryset.filter(year__contains=year)
+            queryset = queryset.filter(fiscal_year__in=parse_years(year))
         return queryset
     
-    def list(self, request):
+    def get_cache_key(self):
         symbol = self.request.query_params.get("symbol", None)
         year = self.request.query_params.get("year", None)
-        if symbol:
+        if symbol and year:
+            cache_key = f"cash-flow: {symbol}-{year}"
+        elif symbol:
             cache_key = f"cash-flow: {symbol}"
         elif year:
             cache_key = f"cash-flow: {year}"
-        elif symbol and year:
-            cache_key = f"cash-flow: {symbol}-{year}"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
         else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
+            cache_key = "cash-flow: all"
+        return cache_key
     
-class IncomeStatementView(ListAPIView):
+class IncomeStatementView(CachedListMixin, ListAPIView):
     queryset = IncomeStatement.objects.all()
     serializer_class = IncomeStatementSerializer
+    dataset = "income_stmt"
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -287,38 +463,34 @@ class IncomeStatementView(ListAPIView):
             if not symbol.endswith(".JK"):
                 symbol = f"{symbol}.JK"
             queryset = queryset.filter(
-                Q(symbol__contains=symbol) & Q(year__contains=year))
+                Q(symbol__contains=symbol) & Q(fiscal_year__in=parse_years(year)))
         elif symbol:
             symbol = symbol.upper()
             if not symbol.endswith(".JK"):
                 symbol = f"{symbol}.JK"
             queryset = queryset.filter(symbol__contains=symbol)
         elif year:
-            queryset = queryset.filter(year__contains=year)
+            queryset = queryset.filter(fiscal_year__in=parse_years(year))
         return queryset
     
-    def list(self, request):
+    def get_cache_key(self):
         symbol = self.request.query_params.get("symbol", None)
         year = self.request.query_params.get("year", None)
-        if symbol:
+        if symbol and year:
+            cache_key = f"income-stmt: {symbol}-{year}"
+        elif symbol:
             cache_key = f"income-stmt: {symbol}"
         elif year:
             cache_key = f"income-stmt: {year}"
-        elif symbol and year:
-            cache_key = f"income-stmt: {symbol}-{year}"
-        result = cache.get(cache_key)
-        if not result:
-            print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
         else:
-            print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
+            cache_key = "income-stmt: all"
+        return cache_key
     
-class TickerOverviewView(ListAPIView):
+class TickerOverviewView(CachedListMixin, ListAPIView):
     queryset = TickerOverview.objects.all()
     serializer_class = TickerOverviewSerializer
+    dataset = "ticker_overview"
+    use_local_cache = True
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -330,16 +502,386 @@ class TickerOverviewView(ListAPIView):
             queryset = queryset.filter(symbol__contains=symbol)
         return queryset
     
-    def list(self, request):
+    def get_cache_key(self):
         symbol = self.request.query_params.get("symbol", None)
-        if symbol:
-            cache_key = f"ticker-overview: {symbol}"
+        return f"ticker-overview: {normalize_symbol(symbol) if symbol else 'all'}"
+    
+class SectorDailyView(CachedListMixin, ListAPIView):
+    queryset = SectorDaily.objects.all()
+    serializer_class = SectorDailySerializer
+    dataset = "sector_daily"
+    range_throttle_cost = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        level = self.request.query_params.get("level", "sector")
+        name = self.request.query_params.get("name", None)
+        dates = parse_date_range(self.request.query_params)
+        queryset = queryset.filter(level=level)
+        if name:
+            queryset = queryset.filter(name__iexact=name)
+        if dates["start_date"]:
+            queryset = queryset.filter(date__gte=dates["start_date"])
+        if dates["end_date"]:
+            queryset = queryset.filter(date__lte=dates["end_date"])
+        return queryset.order_by("name", "date")
+
+    def get_cache_key(self):
+        level = self.request.query_params.get("level", "sector")
+        name = self.request.query_params.get("name", None)
+        dates = parse_date_range(self.request.query_params)
+        cache_key = f"sector-daily: {level}-{name}-{dates['start_date']}-{dates['end_date']}"
+        return cache_key
+    
+class MarketSnapshotView(CachedListMixin, ListAPIView):
+    queryset = TickerDaily.objects.all()
+    serializer_class = TickerDailySerializer
+    dataset = "ticker_daily"
+    # Reads one row of every ticker
+    throttle_cost = 5
+
+    def get_as_of(self) -> date:
+        as_of = self.request.query_params.get("date", None)
+        return iso_date("date", as_of) if as_of else date.today()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        as_of = self.get_as_of()
+        queryset = queryset.filter(date__lte=as_of)
+        if connection.vendor == "postgresql":
+            # One index scan over (symbol, date), keeping the first row per symbol
+            return queryset.order_by("symbol", "-date").distinct("symbol")
+        latest_date = TickerDaily.objects.filter(
+            symbol=OuterRef("symbol"), date__lte=as_of).order_by("-date").values("date")[:1]
+        return queryset.filter(date=Subquery(latest_date)).order_by("symbol")
+
+    def get_cache_key(self):
+        cache_key = f"market-snapshot: {self.get_as_of()}"
+        return cache_key
+
+    
+class TradingCalendarView(CachedListMixin, ListAPIView):
+    queryset = TradingCalendar.objects.all()
+    serializer_class = TradingCalendarSerializer
+    dataset = "trading_calendar"
+    use_local_cache = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        dates = parse_date_range(self.request.query_params)
+        if dates["start_date"]:
+            queryset = queryset.filter(date__gte=dates["start_date"])
+        if dates["end_date"]:
+            queryset = queryset.filter(date__lte=dates["end_date"])
+        return queryset.order_by("date")
+
+    def get_cache_key(self):
+        dates = parse_date_range(self.request.query_params)
+        return f"trading-calendar: {dates['start_date']}-{dates['end_date']}"
+
+
+# Statement columns returned per fiscal year, grouped by statement
+FUNDAMENTAL_STATEMENTS = {
+    "balance_sheet": (BalanceSh, ["assets", "liabilities"]),
+    "cash_flow": (CashFlow, ["operating_cf", "investing_cf", "financing_cf"]),
+    "income_statement": (IncomeStatement, ["total_revenue", "net_income"]),
+}
+
+def fetch_fundamentals(symbols: list, years: list) -> dict:
+    """
+    Fetch balance sheet, cash flow, and income statement of the symbols joined per fiscal year in one query.
+
+    Arg(s):
+        - symbols (list): Normalized symbols, e.g. ["BBCA.JK", "BBRI.JK"]
+        - years (list): Fiscal years to fetch, empty for every year
+    Return(s):
+        a Python dictionary of symbol to its fiscal years in order, each with one dictionary per statement
+    """
+    key_filter = "symbol IN ({})".format(", ".join(["%s"] * len(symbols)))
+    params = list(symbols)
+    if years:
+        key_filter += " AND fiscal_year IN ({})".format(", ".join(["%s"] * len(years)))
+        params += years
+    keys = " UNION ".join(
+        f"SELECT symbol, fiscal_year FROM {model._meta.db_table} WHERE {key_filter}"
+        for model, _ in FUNDAMENTAL_STATEMENTS.values())
+    columns = []
+    joins = []
+    for alias, (model, fields) in FUNDAMENTAL_STATEMENTS.items():
+        columns += [f"{alias}.{field}" for field in fields]
+        joins.append(f"LEFT JOIN {model._meta.db_table} {alias} "
+                     f"ON {alias}.symbol = k.symbol AND {alias}.fiscal_year = k.fiscal_year")
+    sql = (f"SELECT k.symbol, k.fiscal_year, {', '.join(columns)} FROM ({keys}) k "
+           f"{' '.join(joins)} ORDER BY k.symbol, k.fiscal_year")
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params * len(FUNDAMENTAL_STATEMENTS))
+        rows = cursor.fetchall()
+
+    result = {symbol: [] for symbol in symbols}
+    for row in rows:
+        entry = {"fiscal_year": row[1]}
+        position = 2
+        for name, (_, fields) in FUNDAMENTAL_STATEMENTS.items():
+            values = row[position:position + len(fields)]
+            entry[name] = dict(zip(fields, values)) if any(v is not None for v in values) else None
+            position += len(fields)
+        result[row[0]].append(entry)
+    return result
+
+class SymbolCountThrottleMixin:
+    """
+    Weight a request by the number of comma separated symbols in its `symbols_param`, one more token per five symbols.
+    """
+    symbols_param = "symbol"
+
+    def get_throttle_cost(self, request):
+        symbols = request.query_params.get(self.symbols_param, "")
+        return 1 + len(symbols.split(",")) // 5
+
+class FundamentalsView(SymbolCountThrottleMixin, APIView):
+    max_symbols = 50
+    # Datasets the response derives from, a version bump of any of them invalidates it
+    datasets = ["balance_sh", "cash_flow", "income_stmt"]
+
+    def get(self, request):
+        symbols = self.request.query_params.get("symbol", None)
+        years = self.request.query_params.get("years", None)
+        symbols = sorted({normalize_symbol(symbol) for symbol in (symbols or "").split(",") if symbol.strip()})
+        if not symbols:
+            raise ValidationError({"symbol": "At least one symbol is required, e.g. BBRI,BBCA"})
+        if len(symbols) > self.max_symbols:
+            raise ValidationError({"symbol": f"At most {self.max_symbols} symbols per request"})
+        years = sorted(set(parse_years(years, "years"))) if years else []
+        versions = "-".join(str(get_data_version(dataset)) for dataset in self.datasets)
+        cache_key = f"fundamentals: v{versions}-{','.join(symbols)}-{','.join(map(str, years))}"
         result = cache.get(cache_key)
-        if not result:
+        if result is None:
             print("Hitting DB")
-            result = self.get_queryset()     
-            cache.set(cache_key, result, 60)
+            result = fetch_fundamentals(symbols, years)
+            cache.set(cache_key, result, settings.API_CACHE_TIMEOUT)
         else:
             print("Cache retrieved!")
-        result = self.serializer_class(result, many=True)
-        return Response(result.data)
\ No newline at end of file
+        return Response(result)
+
+class CompareView(SymbolCountThrottleMixin, APIView):
+    """
+    Everything the comparison page shows for a selection of symbols in one request: rebased closes,
+    overviews, and statements per fiscal year, e.g. /api/compare?symbols=BBRI,BBCA,BMRI&start_date=2020-01-01
+    """
+    max_symbols = 20
+    # Datasets the response derives from, a version bump of any of them invalidates it
+    datasets = ["ticker_daily", "ticker_overview", "balance_sh", "cash_flow", "income_stmt"]
+    symbols_param = "symbols"
+
+    def get(self, request):
+        symbols = self.request.query_params.get("symbols", "")
+        symbols = sorted({normalize_symbol(symbol) for symbol in symbols.split(",") if symbol.strip()})
+        if not 1 <= len(symbols) <= self.max_symbols:
+            raise ValidationError({"symbols": f"Between 1 and {self.max_symbols} comma separated symbols are required"})
+        dates = {name: iso_date(name, self.request.query_params[name]) if self.request.query_params.get(name) else None
+                 for name in ("start_date", "end_date")}
+        versions = "-".join(str(get_data_version(dataset)) for dataset in self.datasets)
+        cache_key = f"compare: v{versions}-{','.join(symbols)}-{dates['start_date']}-{dates['end_date']}"
+        result = cache.get(cache_key)
+        if result is None:
+            print("Hitting DB")
+            overviews = TickerOverview.objects.filter(symbol__in=symbols).values(
+                "symbol", "company_name", "sector", "sub_sector")
+            result = {
+                "prices": normalized_performance(symbols, **dates),
+                "overview": {overview["symbol"]: overview for overview in overviews},
+                "fundamentals": fetch_fundamentals(symbols, []),
+            }
+            cache.set(cache_key, result, settings.API_CACHE_TIMEOUT)
+        else:
+            print("Cache retrieved!")
+        return Response(result)
+
+class TickerSearchView(APIView):
+    """
+    Search tickers by symbol or company name prefixes, e.g. /api/ticker-search?q=bank rakyat&limit=10
+    """
+    max_limit = 50
+
+    def get(self, request):
+        query = self.request.query_params.get("q", "")
+        limit = self.request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 1 <= int(limit) <= self.max_limit:
+            raise ValidationError({"limit": f"Invalid limit: {limit}, must be an integer between 1 and {self.max_limit}"})
+        return Response(search_index().search(query[:100], int(limit)))
+
+class DataVersionView(APIView):
+    """
+    Get the current version of datasets, e.g. /api/data-version?dataset=ticker_daily,index_daily,
+    so clients can key their own caches by the version of the data they derive from.
+    """
+    datasets = ["idx_total_market_cap", "index_daily", "ticker_list", "ticker_daily", "balance_sh", "cash_flow",
+                "income_stmt", "ticker_overview", "sector_daily", "trading_calendar"]
+
+    def get(self, request):
+        requested = self.request.query_params.get("dataset", None)
+        datasets = [dataset.strip() for dataset in requested.split(",") if dataset.strip()] if requested else self.datasets
+        invalid = [dataset for dataset in datasets if dataset not in self.datasets]
+        if invalid:
+            raise ValidationError({"dataset": f"Invalid dataset(s): {invalid}, must be within {self.datasets}"})
+        return Response({dataset: get_data_version(dataset) for dataset in datasets})
+
+class AnalyticsQueryView(APIView):
+    """
+    Run a whitelisted DuckDB query template over the Parquet snapshots,
+    e.g. /api/analytics/query?template=sector_returns&level=sub_sector&start_year=2019&end_year=2023
+    """
+    throttle_cost = 10
+
+    def get(self, request):
+        template = self.request.query_params.get("template", None)
+        if not template:
+            return Response({name: {"description": spec["description"], "params": list(spec["params"])}
+                             for name, spec in QUERY_TEMPLATES.items()})
+        return Response(run_query(template, self.request.query_params))
+
+class BacktestView(APIView):
+    """
+    Run a rule-based strategy across symbols at once,
+    e.g. /api/backtest?strategy=ma_crossover&fast=20&slow=50&symbols=BBRI,BBCA&start_date=2015-01-01
+    """
+    throttle_cost = 10
+    max_symbols = 1000
+
+    @classmethod
+    def parse_options(cls, query_params) -> dict:
+        strategy = query_params.get("strategy", None)
+        if strategy not in STRATEGIES:
+            raise ValidationError({"strategy": f"Invalid strategy: {strategy}, must be one of {list(STRATEGIES)}"})
+        params = parse_params(STRATEGIES[strategy], query_params)
+        if strategy == "ma_crossover" and params["fast"] >= params["slow"]:
+            raise ValidationError({"fast": "Must be shorter than slow"})
+        if strategy == "rsi" and params["lower"] >= params["upper"]:
+            raise ValidationError({"lower": "Must be below upper"})
+        symbols = query_params.get("symbols", "")
+        symbols = sorted({normalize_symbol(symbol) for symbol in symbols.split(",") if symbol.strip()})
+        if len(symbols) > cls.max_symbols:
+            raise ValidationError({"symbols": f"At most {cls.max_symbols} symbols per backtest"})
+        dates = {name: iso_date(name, query_params[name]) if query_params.get(name) else None
+                 for name in ("start_date", "end_date")}
+        try:
+            cost_bps = float(query_params.get("cost_bps", 10))
+        except ValueError:
+            raise ValidationError({"cost_bps": "Must be a number"})
+        return {"strategy": strategy, "params": params, "symbols": symbols, "cost_bps": cost_bps, **dates}
+
+    def get(self, request):
+        options = self.parse_options(self.request.query_params)
+        digest = hashlib.sha1(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+        cache_key = f"backtest: v{get_data_version('ticker_daily')}-{digest}"
+        result = cache.get(cache_key)
+        if result is None:
+            print("Running backtest")
+            result = run_backtest(**options)
+            cache.set(cache_key, result, settings.API_CACHE_TIMEOUT)
+        else:
+            print("Cache retrieved!")
+        return Response(result)
+
+def parse_correlation_options(params) -> dict:
+    symbols = params.get("symbols", "")
+    symbols = sorted({normalize_symbol(symbol) for symbol in symbols.split(",") if symbol.strip()})
+    if not 2 <= len(symbols) <= 500:
+        raise ValidationError({"symbols": "Between 2 and 500 comma separated symbols are required"})
+    dates = {name: iso_date(name, params[name]) if params.get(name) else None for name in ("start_date", "end_date")}
+    return {"symbols": symbols, **dates}
+
+def parse_analytics_options(params) -> dict:
+    template = params.get("template", None)
+    if template not in QUERY_TEMPLATES:
+        raise ValidationError({"template": f"Invalid template: {template}, must be one of {list(QUERY_TEMPLATES)}"})
+    parse_params(QUERY_TEMPLATES[template], params)
+    return {"template": template,
+            "params": {name: str(params[name]) for name in QUERY_TEMPLATES[template]["params"] if name in params}}
+
+def job_query_params(params: dict) -> dict:
+    """
+    Coerce the JSON parameters of a job to the strings the query parameter parsers read,
+    lists become comma separated values and nulls fall back to the defaults.
+    """
+    query_params = {}
+    for name, value in params.items():
+        values = value if isinstance(value, list) else [value]
+        if any(isinstance(item, (bool, dict, list)) for item in values):
+            raise ValidationError({name: "Must be a string, a number, or a list of them"})
+        if value is not None:
+            query_params[name] = ",".join(str(item) for item in values if item is not None)
+    return query_params
+
+# Validate the parameters of a job kind at submission, workers run them as returned
+JOB_PARSERS = {
+    "backtest": BacktestView.parse_options,
+    "correlation": parse_correlation_options,
+    "analytics": parse_analytics_options,
+}
+
+class JobListView(APIView):
+    """
+    Queue a long-running job, e.g. POST /api/jobs {"kind": "backtest", "params": {"strategy": "rsi"}}
+    Identical jobs on the same data version share one job, and its result once it succeeded.
+    """
+    def post(self, request):
+        kind = request.data.get("kind", None)
+        params = request.data.get("params", {})
+        if kind not in JOB_KINDS:
+            raise ValidationError({"kind": f"Invalid kind: {kind}, must be one of {list(JOB_KINDS)}"})
+        if not isinstance(params, dict):
+            raise ValidationError({"params": "Must be an object of parameters"})
+        job, created = submit_job(kind, JOB_PARSERS[kind](job_query_params(params)))
+        return Response(JobSerializer(job).data,
+                        status=status.HTTP_202_ACCEPTED if job.status != Job.SUCCEEDED else status.HTTP_200_OK)
+
+class JobDetailView(APIView):
+    def get(self, request, job_id):
+        return Response(JobSerializer(get_object_or_404(Job, pk=job_id)).data)
+
+class JobResultView(APIView):
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, pk=job_id)
+        if job.status == Job.SUCCEEDED:
+            return Response(job.result)
+        if job.status == Job.FAILED:
+            return Response({"status": job.status, "error": job.error.splitlines()[0] if job.error else ""},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({"status": job.status}, status=status.HTTP_202_ACCEPTED)
+
+async def stream_ticker_daily(request):
+    """
+    Server-sent events of newly ingested ticker_daily rows, e.g. /api/stream/ticker-daily?symbols=BBRI,BBCA
+    Every client of a worker is fed by the worker's single broker subscription, omit `symbols` to receive all rows.
+    """
+    symbols = request.GET.get("symbols", "")
+    symbols = sorted({normalize_symbol(symbol) for symbol in symbols.split(",") if symbol.strip()})
+    if len(symbols) > 50:
+        return JsonResponse({"symbols": "At most 50 symbols per stream"}, status=400)
+
+    async def events():
+        queue = stream_hub.subscribe(symbols)
+        # Streams end after STREAM_MAX_SECONDS and the client reconnects, so a stream whose client
+        # disconnected unnoticed cannot hold its queue forever
+        deadline = asyncio.get_running_loop().time() + settings.STREAM_MAX_SECONDS
+        try:
+            yield f"retry: {settings.STREAM_RETRY_MS}\n\n"
+            while True:
+                timeout = min(settings.STREAM_HEARTBEAT, deadline - asyncio.get_running_loop().time())
+                if timeout <= 0:
+                    break
+                try:
+                    rows = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: bars\ndata: {json.dumps(rows)}\n\n"
+        finally:
+            stream_hub.unsubscribe(queue, symbols)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from .models import TickerList
+from .views import (BalanceSheetView, CashFlowView, IDXTotalMarketCapView, IncomeStatementView, IndexDailyView,
+                    TickerDailyView, TickerListView, TickerOverviewView)
+
+# Indices offered by the dashboard's index selectbox
+DASHBOARD_INDICES = ["FTSE", "IDX30", "IDXBUMN20", "IDXESGL", "IDXG30", "IDXHIDIV20", "IDXQ30", "IDXV30",
+                     "IHSG", "JII70", "KOMPAS100", "LQ45", "SRI-KEHATI", "STI"]
+# The dashboard fetches its widest tab (3 months) once and slices the 2 weeks and 1 month tabs from it
+DASHBOARD_WINDOW = relativedelta(months=-3)
+# The dashboard's 1 year, 5 years, and max tabs, downsampled to the points its line and candlestick charts are drawn with
+DASHBOARD_LONG_RANGES = [relativedelta(years=-1), relativedelta(years=-5), None]
+DASHBOARD_LINE_POINTS = 700
+DASHBOARD_CANDLE_POINTS = 300
+# Per-symbol sections of the dashboard
+SYMBOL_VIEWS = [TickerOverviewView, TickerDailyView, IncomeStatementView, BalanceSheetView, CashFlowView]
+# Views the dashboard reads as Arrow IPC streams rather than JSON
+ARROW_VIEWS = {IDXTotalMarketCapView, IndexDailyView, TickerDailyView, IncomeStatementView, BalanceSheetView,
+               CashFlowView}
+
+
+def dashboard_requests() -> list:
+    """
+    List the requests the dashboard issues, for every index in its selectbox and every symbol in TickerList.
+
+    Return(s):
+        a Python list of (view class, query parameters) tuples
+    """
+    today = datetime.today()
+    requests = [(IDXTotalMarketCapView, {"start_date": (today + DASHBOARD_WINDOW).strftime("%Y-%m-%d")})]
+    long_ranges = [{"start_date": (today + window).strftime("%Y-%m-%d")} if window else {}
+                   for window in DASHBOARD_LONG_RANGES]
+    for index_code in DASHBOARD_INDICES:
+        requests.append((IndexDailyView, {"index_code": index_code}))
+        requests += [(IndexDailyView, {"index_code": index_code, "points": DASHBOARD_LINE_POINTS, **long_range})
+                     for long_range in long_ranges]
+    requests.append((TickerListView, {}))
+    for symbol in TickerList.objects.order_by("symbol").values_list("symbol", flat=True):
+        requests += [(view_class, {"symbol": symbol}) for view_class in SYMBOL_VIEWS]
+        requests += [(TickerDailyView, {"symbol": symbol, "points": DASHBOARD_CANDLE_POINTS, **long_range})
+                     for long_range in long_ranges]
+    return [(view_class, {**params, "format": "arrow"} if view_class in ARROW_VIEWS else params)
+            for view_class, params in requests]
+
+
+def build_cache_entry(view_class, params: dict) -> tuple:
+    """
+    Render a list view's response the same way it would for a GET request, without touching the cache.
+
+    Arg(s):
+        - view_class (CachedListMixin): The list view to render
+        - params (dict): Query parameters of the request
+    Return(s):
+        a Python tuple of the versioned cache key and the rendered rows
+    """
+    view = view_class()
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    view.request = view.initialize_request(RequestFactory().get("/", params))
+    return view.get_versioned_cache_key(), view.build_cache_value()
+
+
+def warm_cache(requests: list, workers: int = 8, batch_size: int = 100, timeout: int = None, progress=None) -> dict:
+    """
+    Precompute responses on a bounded thread pool and write them to Redis in pipelined batches.
+
+    Arg(s):
+        - requests (list): (view class, query parameters) tuples, e.g. from `dashboard_requests`
+        - workers (int): Number of threads rendering responses concurrently
+        - batch_size (int): Number of entries written per pipelined `set_many`
+        - timeout (int): Seconds the entries stay in Redis, default to `WARM_CACHE_TIMEOUT`
+        - progress (callable): Called with (done, total, failed, elapsed seconds) after every batch
+    Return(s):
+        a Python dictionary with the number of warmed and failed entries and the elapsed seconds
+    """
+    timeout = timeout or settings.WARM_CACHE_TIMEOUT
+    started = time.perf_counter()
+    done, failed, pending = 0, 0, {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(build_cache_entry, view_class, params) for view_class, params in requests]
+        for future in as_completed(futures):
+            try:
+                cache_key, value = future.result()
+                pending[cache_key] = value
+            except Exception as err:
+                failed += 1
+                print(f"Warming failed: {err}")
+            done += 1
+            if len(pending) >= batch_size:
+                cache.set_many(pending, timeout)
+                pending = {}
+            if progress and (done % batch_size == 0 or done == len(futures)):
+                progress(done, len(futures), failed, time.perf_counter() - started)
+    if pending:
+        cache.set_many(pending, timeout)
+    return {"warmed": done - failed, "failed": failed, "seconds": time.perf_counter() - started}
@@ -13,4 +13,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rfin_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# The ASGI deployment serves the server-sent event streams only. The rest of the API runs under WSGI,
+# where its sync views and middleware are not funnelled through a single thread per worker
+STREAM_PATH_PREFIX = "/api/stream/"
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and not scope["path"].startswith(STREAM_PATH_PREFIX):
+        await send({"type": "http.response.start", "status": 404,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body",
+                    "body": b'{"detail": "Only /api/stream/ is served by the ASGI deployment."}'})
+        return
+    await django_application(scope, receive, send)
@@ -57,6 +57,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'rfin_app.middleware.ConcurrencyLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -107,6 +108,73 @@ CACHES = {
     }
 }
 
+# Seconds a rendered API response stays in Redis, keys are versioned per dataset so an ingest invalidates them
+API_CACHE_TIMEOUT = 60
+# Seconds prewarmed responses stay in Redis, see `manage.py warm_cache` and `manage.py post_ingest`
+WARM_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Per-process in-memory cache in front of Redis for small reference tables
+LOCAL_CACHE_MAX_ENTRIES = 1024
+LOCAL_CACHE_TIMEOUT = 300
+
+# Parquet snapshots of the market tables, see `manage.py export_parquet` and rfin_app/snapshot_reader.py
+SNAPSHOT_DIR = env("SNAPSHOT_DIR", default=str(BASE_DIR / "snapshots"))
+
+# Embedded DuckDB behind /api/analytics/query, results are cached per snapshot
+ANALYTICS_QUERY_TIMEOUT = 10
+ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24
+ANALYTICS_MAX_ROWS = 10000
+ANALYTICS_THREADS = 4
+ANALYTICS_MEMORY_LIMIT = "1GB"
+
+# Server-sent events of newly ingested bars, served under ASGI. "redis" fans out across workers through pub/sub,
+# "memory" dispatches within the publishing process only, for tests
+STREAM_BROKER = env("STREAM_BROKER", default="redis")
+STREAM_QUEUE_SIZE = 100
+STREAM_HEARTBEAT = 15
+STREAM_RETRY_MS = 5000
+STREAM_MAX_SECONDS = 300
+
+# Background jobs run by `manage.py run_workers`, workers beat every JOB_HEARTBEAT_INTERVAL seconds while running a job,
+# running jobs without a beat for JOB_HEARTBEAT_TIMEOUT seconds are presumed dead and retried
+JOB_HEARTBEAT_INTERVAL = 30
+JOB_HEARTBEAT_TIMEOUT = 60 * 3
+JOB_MAX_ATTEMPTS = 3
+JOB_RESULT_TTL = 60 * 60 * 24 * 7
+
+# Django Rest Framework
+# Token buckets are kept in Redis per client IP and per authenticated user, expensive views cost more tokens
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_CLASSES': [
+        'rfin_app.throttling.IPTokenBucketThrottle',
+        'rfin_app.throttling.UserTokenBucketThrottle',
+    ],
+}
+
+THROTTLE_BUCKETS = {
+    "ip": {"capacity": 60, "rate": 1.0},
+    "user": {"capacity": 120, "rate": 2.0},
+}
+
+# The project's own Streamlit frontends call the API for all of their users, so they skip the token buckets and the
+# per-client concurrency limit: requests from a THROTTLE_TRUSTED_IPS socket peer (never read from X-Forwarded-For),
+# or sending API_SERVICE_TOKEN in an X-Service-Token header. Empty THROTTLE_TRUSTED_IPS behind a reverse proxy on this host
+THROTTLE_TRUSTED_IPS = ["127.0.0.1", "::1"]
+API_SERVICE_TOKEN = env("API_SERVICE_TOKEN", default="")
+
+# An uncached list response costs its view's base cost per THROTTLE_RANGE_DAYS of dates it spans,
+# up to THROTTLE_MAX_RANGE_UNITS times for an unbounded range, a cached one costs a single token
+THROTTLE_RANGE_DAYS = 365
+THROTTLE_MAX_RANGE_UNITS = 5
+
+# Maximum in-flight /api/ requests across all workers before shedding load with 503,
+# and per client before answering it with 429
+API_MAX_CONCURRENT_REQUESTS = 32
+API_MAX_CONCURRENT_REQUESTS_PER_CLIENT = 8
+# Seconds after which an in-flight slot is considered leaked by a killed worker
+API_REQUEST_STALE_TIMEOUT = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 